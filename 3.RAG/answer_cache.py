@@ -0,0 +1,211 @@
+"""RAG 답변 의미 캐시
+
+"연차는 며칠이야?"와 "연차가 며칠이지?"처럼 표현만 다른 질문마다 LLM을 호출하지 않도록
+검색 단계 뒤, 생성 단계 앞에서 이전 질문들의 벡터 색인을 조회합니다. 질문 벡터는 한글 토큰의 앞 두
+글자를 어간으로 쓴(조사나 어미가 달라도 겹치도록) 해싱 TF 벡터이고, 코사인 유사도가 threshold 이상인
+이전 질문 중 검색된 상위 k개 청크(내용 해시, 순위 순서)가 이번 질문의 상위 k개와 똑같은 항목의
+답변과 근거 청크를 반환합니다. "타운홀 미팅은 언제야?"와 "스크럼 미팅은 언제야?"처럼 질문은 비슷해도
+다른 규정이 검색되면 재사용하지 않습니다.
+
+규정 파일이 바뀌어 근거 청크의 내용이 달라지면 검색 결과의 해시도 달라지므로 캐시된 답변은 쓰이지 않고,
+invalidate()에 새 해시 집합을 넘기면 해당 항목을 바로 지웁니다. 근거 청크가 없는 답변("규정에 없습니다")은
+규정이 바뀌었는지 판단할 수 없으므로 저장하지 않습니다. 항목 수는 max_entries로 제한하며 가장 오래 쓰지
+않은 항목부터 내보냅니다.
+
+사용법:
+    python answer_cache.py bench                  # 가짜 LLM으로 바꿔 말한 질문들의 적중률 측정
+    python answer_cache.py bench --threshold 0.5
+"""
+import argparse
+import collections
+import re
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, List, Any, Optional, Set, Tuple
+import logging
+
+from rag_index import DEFAULT_DIMS, embed, tokenize
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 1024
+# 이 코사인 유사도 이상인 이전 질문의 답변을 재사용
+# ("연차 이월" / "연차 며칠"처럼 두 단어 중 하나만 같은 질문이 0.5이므로 그보다 높게)
+DEFAULT_SIMILARITY_THRESHOLD = 0.55
+
+_HANGUL_RE = re.compile(r'^[가-힣]+$')
+
+def question_vector(question: str, dims: int = DEFAULT_DIMS) -> Dict[int, float]:
+    """질문의 L2 정규화 해싱 벡터 (특징 번호 → 가중치)
+
+    세 글자 이상 한글 토큰은 앞 두 글자만 써서 "며칠이야" / "며칠인가요", "연차는" / "연차"가 같은 특징이 됩니다.
+    """
+    terms = [token[:2] if len(token) > 2 and _HANGUL_RE.match(token) else token for token in tokenize(question)]
+    features, weights = embed(' '.join(terms), dims)
+    return dict(zip(features.tolist(), weights.tolist()))
+
+class AnswerCache:
+    """질문 벡터 색인으로 비슷한 질문의 답변을 재사용하는 크기 제한 캐시 (스레드 안전)
+
+    특징 번호 → 항목 번호 역색인으로 질문과 특징을 공유하는 항목만 점수를 계산하므로
+    조회 비용은 전체 항목 수가 아니라 겹치는 항목 수에 비례합니다.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 threshold: float = DEFAULT_SIMILARITY_THRESHOLD, dims: int = DEFAULT_DIMS):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.dims = dims
+        self._entries: "collections.OrderedDict[int, Dict[str, Any]]" = collections.OrderedDict()
+        self._postings: Dict[int, Set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+        self.invalidated = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _similar(self, vector: Dict[int, float]) -> List[tuple]:
+        """유사도가 threshold 이상인 (유사도, 항목 번호) 목록 (유사도 내림차순)"""
+        scores: Dict[int, float] = collections.defaultdict(float)
+        for feature, weight in vector.items():
+            for entry_id in self._postings.get(feature, ()):
+                scores[entry_id] += weight * self._entries[entry_id]['vector'][feature]
+        return sorted(((score, entry_id) for entry_id, score in scores.items() if score >= self.threshold), reverse=True)
+
+    def get(self, question: str, chunk_hashes: Iterable[str]) -> Optional[Dict[str, Any]]:
+        """비슷한 이전 질문의 답변 (answer, chunks, question, similarity) - 없으면 None
+
+        chunk_hashes는 이번 질문으로 검색한 상위 k개 청크의 해시(순위 순서)이며, 근거 청크가 이와
+        똑같은 항목만 사용합니다.
+        """
+        chunk_hashes = tuple(chunk_hashes)
+        if not chunk_hashes:
+            self.misses += 1
+            return None
+        vector = question_vector(question, self.dims)
+        with self._lock:
+            similar = self._similar(vector)
+            for similarity, entry_id in similar:
+                entry = self._entries[entry_id]
+                if entry['chunk_hashes'] == chunk_hashes:
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return {
+                        'answer': entry['answer'],
+                        'chunks': entry['chunks'],
+                        'question': entry['question'],
+                        'similarity': round(similarity, 4)
+                    }
+            if similar:
+                # 비슷한 질문은 있지만 검색된 청크가 다름 (다른 규정을 묻는 질문이거나 규정이 갱신된 경우)
+                self.stale += 1
+            self.misses += 1
+            return None
+
+    def set(self, question: str, answer: str, chunks: List[Dict[str, Any]], chunk_hashes: Iterable[str]):
+        """답변과 근거 청크 저장 (근거 청크가 없으면 저장하지 않고, max_entries를 넘으면 가장 오래 쓰지 않은 항목부터 제거)"""
+        chunk_hashes = tuple(chunk_hashes)
+        if self.max_entries <= 0 or not chunk_hashes:
+            return
+        vector = question_vector(question, self.dims)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = {
+                'question': question,
+                'vector': vector,
+                'answer': answer,
+                'chunks': chunks,
+                'chunk_hashes': chunk_hashes
+            }
+            for feature in vector:
+                self._postings.setdefault(feature, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        for feature in entry['vector']:
+            postings = self._postings[feature]
+            postings.discard(entry_id)
+            if not postings:
+                del self._postings[feature]
+
+    def invalidate(self, live_hashes: FrozenSet[str]) -> int:
+        """live_hashes에 없는 청크를 근거로 한 답변 제거 (제거한 항목 수 반환)"""
+        with self._lock:
+            stale_ids = [entry_id for entry_id, entry in self._entries.items()
+                         if not live_hashes.issuperset(entry['chunk_hashes'])]
+            for entry_id in stale_ids:
+                self._remove(entry_id)
+            self.invalidated += len(stale_ids)
+        if stale_ids:
+            logger.info(f"규정 변경으로 캐시된 답변 {len(stale_ids)}개 제거")
+        return len(stale_ids)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._postings.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale': self.stale,
+            'evictions': self.evictions,
+            'invalidated': self.invalidated,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+# 벤치마크용 질문 묶음 (같은 묶음은 같은 뜻을 다르게 표현한 질문)
+_PARAPHRASES = [
+    ["연차는 며칠이야?", "연차가 며칠이지?", "연차 며칠 받아?", "연차 휴가는 며칠인가요?"],
+    ["외부 미팅 복장은?", "외부 미팅 때 복장이 어떻게 돼?", "외부 미팅 복장 규정 알려줘"],
+    ["타운홀 미팅은 언제야?", "타운홀 미팅이 언제인가요?", "전사 타운홀 미팅 시간"],
+    ["스크럼은 몇 시에 시작해?", "일일 스크럼 시작 시간", "스크럼 몇 시야?"]
+]
+
+def run_benchmark(threshold: float = DEFAULT_SIMILARITY_THRESHOLD, rounds: int = 2) -> Dict[str, Any]:
+    """가짜 LLM으로 질문 묶음을 rounds번 돌려 LLM 호출 수와 캐시 적중률 측정"""
+    from simple_rag import FakeLLM, SimpleRAG
+
+    llm = FakeLLM()
+    rag = SimpleRAG(store_dir=None, generator=llm, cache_threshold=threshold)
+    started_at = time.perf_counter()
+    questions = [question for group in _PARAPHRASES for question in group] * rounds
+    for question in questions:
+        result = rag.ask(question)
+        logger.debug(f"{question} → {'캐시' if result['cached'] else 'LLM'} {result.get('similarity', '')}")
+    return {
+        'questions': len(questions),
+        'distinct_meanings': len(_PARAPHRASES),
+        'llm_calls': llm.calls,
+        'seconds': round(time.perf_counter() - started_at, 3),
+        **rag.cache.stats()
+    }
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="RAG 답변 의미 캐시")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    bench_parser = subparsers.add_parser('bench', help="가짜 LLM으로 캐시 적중률 측정")
+    bench_parser.add_argument('--threshold', type=float, default=DEFAULT_SIMILARITY_THRESHOLD)
+    bench_parser.add_argument('--rounds', type=int, default=2)
+    bench_parser.add_argument('-v', '--verbose', action='store_true')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+
+    stats = run_benchmark(args.threshold, args.rounds)
+    for name, value in stats.items():
+        print(f"{name:18s} {value}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,300 @@
+"""규정 문서 검색 인덱스 (RAG의 '검색' 단계)
+
+company_rules.txt 같은 규정 파일을 번호 항목("1. ...") 또는 문단 단위 청크로 나누고,
+청크마다 해싱 TF 벡터를 만들어 NumPy 역색인에 넣습니다. 질문이 오면 질문 벡터에 IDF를
+곱해 청크 벡터와 내적한 점수로 상위 k개 청크만 돌려주므로, 문서가 커져도 LLM에 보내는
+프롬프트 크기는 k에 비례해 일정하게 유지됩니다. 네트워크나 임베딩 API는 쓰지 않습니다.
+
+사용법:
+    python rag_index.py search "연차는 며칠이야?" --file company_rules.txt -k 3
+    python rag_index.py bench --chunks 100000 --queries 200
+"""
+import argparse
+import functools
+import json
+import random
+import re
+import sys
+import time
+import zlib
+from collections import Counter
+from typing import Dict, List, Any, Iterable, Optional, Sequence, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 해싱 벡터 차원 (2의 거듭제곱, 클수록 해시 충돌이 줄어듦)
+DEFAULT_DIMS = 1 << 20
+DEFAULT_TOP_K = 3
+# 청크 최대 길이 (문자). 더 긴 문단은 문장 경계에서 나눔
+MAX_CHUNK_CHARS = 500
+
+# 영문/숫자 단어 또는 한글 음절 연속 구간
+_TOKEN_RE = re.compile(r"[0-9a-z_]+|[가-힣]+")
+# "1." "2)" "제3조" 처럼 번호로 시작하는 항목
+_ITEM_RE = re.compile(r'^\s*(?:\d+[.)]|제\s*\d+\s*조)\s*')
+_SENTENCE_RE = re.compile(r'(?<=[.!?다요])\s+')
+
+def tokenize(text: str) -> List[str]:
+    """검색용 토큰화
+
+    영문/숫자는 소문자 단어 단위, 한글은 조사/어미가 붙어도 매칭되도록 단어 전체와
+    음절 bigram을 함께 씁니다. 예: "연차는" → ["연차는", "연차", "차는"]
+    """
+    tokens = []
+    for word in _TOKEN_RE.findall(text.lower()):
+        tokens.append(word)
+        if '가' <= word[0] <= '힣' and len(word) > 2:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+def _split_long(text: str, max_chars: int) -> List[str]:
+    """max_chars보다 긴 문단을 문장 경계에서 나눔"""
+    if len(text) <= max_chars:
+        return [text]
+    parts, current = [], ''
+    for sentence in _SENTENCE_RE.split(text):
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            parts.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        parts.append(current)
+    return parts
+
+def split_chunks(text: str, source: str = '', max_chars: int = MAX_CHUNK_CHARS) -> List[Dict[str, Any]]:
+    """규정 텍스트를 번호 항목 또는 문단 단위 청크로 분리
+
+    번호 항목은 다음 번호가 나올 때까지 이어지는 줄을 한 청크로 묶고, 번호가 없는 부분은
+    빈 줄로 구분한 문단을 청크로 씁니다. 첫 번호 항목 앞의 짧은 문단(문서 제목)은 각 청크의
+    heading으로 붙여 검색과 프롬프트에 함께 사용합니다.
+    """
+    blocks: List[str] = []
+    current: List[str] = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or (_ITEM_RE.match(stripped) and current):
+            if current:
+                blocks.append(' '.join(current))
+                current = []
+            if not stripped:
+                continue
+        current.append(stripped)
+    if current:
+        blocks.append(' '.join(current))
+
+    heading = ''
+    if len(blocks) > 1 and not _ITEM_RE.match(blocks[0]) and len(blocks[0]) <= 80:
+        heading = blocks.pop(0)
+
+    chunks = []
+    for block in blocks:
+        for part in _split_long(block, max_chars):
+            chunks.append({'id': len(chunks), 'source': source, 'heading': heading, 'text': part})
+    return chunks
+
+@functools.lru_cache(maxsize=1 << 18)
+def _feature(token: str, dims: int) -> int:
+    """토큰의 해싱 특징 번호 (프로세스와 무관하게 같은 값)"""
+    return zlib.crc32(token.encode('utf-8')) & (dims - 1)
+
+def _term_counts(text: str, dims: int) -> Counter:
+    return Counter(_feature(token, dims) for token in tokenize(text))
+
+def _weigh(counts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """1 + log(tf) 가중치를 벡터(lengths 길이씩 이어 붙인 구간)별로 L2 정규화"""
+    weights = 1.0 + np.log(counts.astype(np.float32))
+    nonempty = lengths > 0
+    norms = np.sqrt(np.add.reduceat(weights * weights, np.cumsum(lengths)[nonempty] - lengths[nonempty]))
+    return (weights / np.repeat(norms, lengths[nonempty])).astype(np.float32)
+
+def embed(text: str, dims: int = DEFAULT_DIMS) -> Tuple[np.ndarray, np.ndarray]:
+    """해싱 TF 벡터 (특징 번호 배열, L2 정규화한 1 + log(tf) 가중치 배열)
+
+    어휘 사전 없이 토큰 해시를 특징 번호로 쓰므로 청크마다 독립적으로 계산할 수 있습니다.
+    """
+    return embed_many([text], dims)[:2]
+
+def embed_many(texts: Sequence[str], dims: int = DEFAULT_DIMS) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """여러 텍스트의 해싱 TF 벡터를 이어 붙인 (특징 번호, 가중치, 텍스트별 특징 수) 배열
+
+    NumPy 연산을 텍스트마다 하지 않고 전체에 한 번씩만 수행합니다.
+    """
+    features: List[int] = []
+    counts: List[int] = []
+    lengths = np.empty(len(texts), dtype=np.int64)
+    for i, text in enumerate(texts):
+        term_counts = _term_counts(text, dims)
+        features.extend(term_counts.keys())
+        counts.extend(term_counts.values())
+        lengths[i] = len(term_counts)
+    if not features:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), lengths
+    return np.array(features, dtype=np.int64), _weigh(np.array(counts), lengths), lengths
+
+def chunk_text(chunk: Dict[str, Any]) -> str:
+    """임베딩할 청크 텍스트 (문서 제목 + 본문)"""
+    return f"{chunk['heading']} {chunk['text']}" if chunk.get('heading') else chunk['text']
+
+# 역색인을 이루는 배열 이름 (rag_store가 같은 이름의 파일로 저장)
+POSTING_ARRAYS = ('features', 'starts', 'df', 'chunk_ids', 'weights')
+
+def build_postings(features: np.ndarray, weights: np.ndarray, lengths: np.ndarray) -> Dict[str, np.ndarray]:
+    """embed_many() 결과(청크 순서)를 특징 번호 순 역색인 배열로 변환"""
+    chunk_ids = np.repeat(np.arange(len(lengths), dtype=np.int32), lengths)
+    # 특징 번호 순으로 정렬해 특징별 posting 구간을 연속 배열로 보관
+    order = np.argsort(features, kind='stable')
+    unique, starts, df = np.unique(features[order], return_index=True, return_counts=True)
+    return {
+        'features': unique,
+        'starts': starts.astype(np.int64),
+        'df': df.astype(np.int64),
+        'chunk_ids': chunk_ids[order],
+        'weights': weights[order].astype(np.float32)
+    }
+
+class RuleIndex:
+    """청크 해싱 벡터의 역색인 (특징 번호 → (청크 번호 배열, 가중치 배열))
+
+    질문 점수는 Σ idf(f)² · q(f) · d(f)로, IDF는 특징별 청크 빈도에서 조회 시점에 계산합니다.
+    postings를 주면(rag_store의 메모리 매핑 배열 등) 임베딩 없이 그대로 사용합니다.
+    chunks는 청크 번호로 dict를 꺼낼 수 있는 시퀀스면 됩니다.
+    """
+
+    def __init__(self, chunks: Sequence[Dict[str, Any]], dims: int = DEFAULT_DIMS,
+                 postings: Optional[Dict[str, np.ndarray]] = None):
+        self.chunks = chunks
+        self.dims = dims
+        started_at = time.perf_counter()
+
+        if postings is None:
+            postings = build_postings(*embed_many([chunk_text(chunk) for chunk in chunks], dims))
+        for name in POSTING_ARRAYS:
+            setattr(self, name, postings[name])
+        self.build_seconds = time.perf_counter() - started_at
+        logger.debug(f"규정 인덱스 준비: 청크 {len(chunks)}개, 특징 {len(self.features)}개 ({self.build_seconds:.3f}s)")
+
+    @classmethod
+    def from_files(cls, paths: Iterable[str], dims: int = DEFAULT_DIMS) -> "RuleIndex":
+        """규정 파일들을 읽어 인덱스 생성"""
+        chunks: List[Dict[str, Any]] = []
+        for path in paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                for chunk in split_chunks(f.read(), source=path):
+                    chunk['id'] = len(chunks)
+                    chunks.append(chunk)
+        return cls(chunks, dims)
+
+    @property
+    def size(self) -> int:
+        return len(self.chunks)
+
+    def search(self, question: str, k: int = DEFAULT_TOP_K) -> List[Dict[str, Any]]:
+        """질문과 가장 관련 있는 청크 k개 (score 포함, 관련 청크가 없으면 빈 목록)"""
+        query_features, query_weights = embed(question, self.dims)
+        if not len(self.features) or not len(query_features):
+            return []
+        positions = np.minimum(np.searchsorted(self.features, query_features), len(self.features) - 1)
+        found = self.features[positions] == query_features
+        if not found.any():
+            return []
+
+        idf = np.log1p(self.size / self.df[positions[found]])
+        slices = [
+            (int(self.starts[p]), int(self.df[p]), float(w))
+            for p, w in zip(positions[found], query_weights[found] * idf * idf)
+        ]
+        ids = np.concatenate([self.chunk_ids[start:start + count] for start, count, _ in slices])
+        contributions = np.concatenate([self.weights[start:start + count] * w for start, count, w in slices])
+        scores = np.bincount(ids, weights=contributions, minlength=self.size)
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(scores[candidates], -k)[-k:]]
+        ranked = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [{**self.chunks[i], 'score': round(float(scores[i]), 4)} for i in ranked]
+
+    def memory_bytes(self) -> int:
+        """역색인 배열이 차지하는 메모리 (청크 텍스트 제외)"""
+        return sum(getattr(self, name).nbytes for name in POSTING_ARRAYS)
+
+# 벤치마크용 합성 규정 문장 재료
+_SUBJECTS = ['연차 휴가', '병가', '재택 근무', '출장비', '야근 식대', '보안 교육', '장비 반납', '경조사 휴가',
+             '복지 포인트', '교육 지원금', '회의실 예약', '주차 등록', '법인 카드', '코드 리뷰', '배포 승인']
+_CONDITIONS = ['입사일 기준으로', '팀장 승인 후', '매 분기마다', '신청일로부터 7일 이내에', '정규직에 한해',
+               '수습 기간에는', '본부장 결재로', '사전 신청 시', '매월 말일까지', '외부 미팅 시에는']
+_ACTIONS = ['{n}일 부여됩니다', '최대 {n}만원까지 지원합니다', '주 {n}회 허용됩니다', '{n}시간 이수해야 합니다',
+            '{n}영업일 안에 처리됩니다', '{n}회까지 사용할 수 있습니다']
+
+def synthetic_corpus(count: int, seed: int = 1) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """합성 규정 청크 count개와 질문 목록 생성"""
+    rng = random.Random(seed)
+    chunks = []
+    for i in range(count):
+        subject = rng.choice(_SUBJECTS)
+        text = (f"{i + 1}. {subject} 규정 {i % 997}호: {rng.choice(_CONDITIONS)} "
+                f"{rng.choice(_ACTIONS).format(n=rng.randint(1, 30))}. 부서 코드 D{rng.randint(100, 999)}.")
+        chunks.append({'id': i, 'source': 'synthetic', 'heading': '', 'text': text})
+    questions = [f"{rng.choice(_SUBJECTS)} {rng.choice(_CONDITIONS)} 몇 일이야? 규정 {rng.randint(0, 996)}호" for _ in range(200)]
+    return chunks, questions
+
+def _percentile(samples: Sequence[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+
+def run_benchmark(chunk_count: int, query_count: int, k: int = DEFAULT_TOP_K, dims: int = DEFAULT_DIMS) -> Dict[str, Any]:
+    """합성 코퍼스로 인덱스 생성 시간과 질문당 검색 지연 시간 측정"""
+    chunks, questions = synthetic_corpus(chunk_count)
+    index = RuleIndex(chunks, dims)
+    latencies = []
+    for i in range(query_count):
+        started_at = time.perf_counter()
+        index.search(questions[i % len(questions)], k)
+        latencies.append(time.perf_counter() - started_at)
+    return {
+        'chunks': chunk_count,
+        'features': int(len(index.features)),
+        'build_seconds': round(index.build_seconds, 3),
+        'index_mib': round(index.memory_bytes() / (1 << 20), 1),
+        'queries': query_count,
+        'query_ms': {
+            'p50': round(_percentile(latencies, 50) * 1000, 3),
+            'p95': round(_percentile(latencies, 95) * 1000, 3),
+            'p99': round(_percentile(latencies, 99) * 1000, 3)
+        }
+    }
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="규정 문서 검색 인덱스")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    search_parser = subparsers.add_parser('search', help="규정 파일에서 질문과 관련된 청크 검색")
+    search_parser.add_argument('question')
+    search_parser.add_argument('--file', action='append', help="규정 파일 (여러 번 지정 가능, 기본 company_rules.txt)")
+    search_parser.add_argument('-k', type=int, default=DEFAULT_TOP_K)
+
+    bench_parser = subparsers.add_parser('bench', help="합성 코퍼스로 생성/검색 시간 측정")
+    bench_parser.add_argument('--chunks', type=int, default=100000)
+    bench_parser.add_argument('--queries', type=int, default=200)
+    bench_parser.add_argument('-k', type=int, default=DEFAULT_TOP_K)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == 'bench':
+        print(json.dumps(run_benchmark(args.chunks, args.queries, args.k), ensure_ascii=False, indent=2))
+        return
+
+    index = RuleIndex.from_files(args.file or ['company_rules.txt'])
+    started_at = time.perf_counter()
+    results = index.search(args.question, args.k)
+    elapsed_ms = (time.perf_counter() - started_at) * 1000
+    for rank, chunk in enumerate(results, 1):
+        print(f"{rank:3d}. [{chunk['score']:.3f}] {chunk['text']}")
+    print(f"{len(results)}개 청크, {elapsed_ms:.3f}ms", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,459 @@
+"""증분 갱신되는 규정 벡터 저장소 (메모리 매핑, 여러 프로세스가 읽기 전용으로 공유)
+
+규정 파일이 바뀌면 청크마다 내용 해시를 계산해 새로 생기거나 바뀐 청크만 임베딩합니다.
+임베딩한 벡터는 append-only 로그(vectors-<세대>.i64 / .f32)에 이어 쓰고, 갱신할 때마다
+현재 청크들의 역색인과 청크 메타데이터를 스냅샷 디렉터리에 파일로 쓴 뒤 CURRENT.json을
+원자적으로 교체합니다. 조회 프로세스는 스냅샷 파일을 메모리 매핑하므로 각자 복사본을
+올리지 않고 페이지 캐시를 공유하며, 갱신 중에도 이전 스냅샷으로 계속 응답합니다.
+로그를 정리(compaction)할 때는 새 세대 이름의 로그 파일에 쓰고 그 이름을 CURRENT.json에 기록하므로,
+로그와 그 안의 위치 정보는 CURRENT.json 교체 한 번으로 함께 바뀝니다.
+갱신은 저장소의 LOCK 파일에 프로세스 간 배타적 잠금을 잡고 하므로 여러 프로세스가 동시에 갱신해도
+서로의 로그나 스냅샷을 지우지 않습니다. 조회만 하는 작업 프로세스는 SnapshotReader만 쓰고,
+갱신은 `rag_store.py watch` 프로세스 하나에 맡기는 것을 권장합니다.
+
+    rag_store/
+    ├── CURRENT.json          # 현재 스냅샷과 벡터 로그 이름, 청크 해시 → 로그 위치, 파일 상태
+    ├── LOCK                  # 갱신용 프로세스 간 잠금 파일
+    ├── vectors-<세대>.i64 / .f32  # 임베딩 로그 (특징 번호 / 가중치, 덧붙이기만 함)
+    └── snapshots/<세대>/      # 역색인 배열(*.npy)과 청크 메타데이터(chunks.bin + chunk_offsets.u64)
+
+사용법:
+    python rag_store.py update company_rules.txt
+    python rag_store.py watch company_rules.txt --interval 2
+    python rag_store.py search "연차는 며칠이야?"
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Any, Iterator, Optional, Sequence, Tuple
+import logging
+
+try:
+    import fcntl
+    msvcrt = None
+except ImportError:  # Windows
+    import msvcrt
+    fcntl = None
+
+import numpy as np
+
+from rag_index import (RuleIndex, POSTING_ARRAYS, DEFAULT_DIMS, DEFAULT_TOP_K, build_postings, chunk_text,
+                       embed_many, split_chunks)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_DIR = os.environ.get(
+    'RAG_STORE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rag_store')
+)
+STORE_VERSION = 2
+DEFAULT_WATCH_INTERVAL = 2.0
+# 벡터 로그에서 더 이상 쓰지 않는 항목이 이 비율을 넘으면 로그를 다시 씀
+COMPACT_DEAD_RATIO = 0.5
+# 조회 중인 프로세스를 위해 남겨 두는 이전 스냅샷 수
+KEEP_SNAPSHOTS = 2
+
+CURRENT_FILE = 'CURRENT.json'
+LOCK_FILE = 'LOCK'
+VECTOR_LOG_PREFIX = 'vectors'
+VECTOR_FEATURES_SUFFIX = '.i64'
+VECTOR_WEIGHTS_SUFFIX = '.f32'
+SNAPSHOT_DIR = 'snapshots'
+CHUNKS_FILE = 'chunks.bin'
+CHUNK_OFFSETS_FILE = 'chunk_offsets.u64'
+
+def chunk_hash(chunk: Dict[str, Any], dims: int = DEFAULT_DIMS) -> str:
+    """임베딩 결과를 결정하는 내용(제목 + 본문 + 차원)의 해시"""
+    data = f"{dims}\x00{chunk_text(chunk)}".encode('utf-8')
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def vector_log_paths(store_dir: str, log_name: str) -> Tuple[str, str]:
+    """벡터 로그의 (특징 번호 파일, 가중치 파일) 경로"""
+    return (os.path.join(store_dir, log_name + VECTOR_FEATURES_SUFFIX),
+            os.path.join(store_dir, log_name + VECTOR_WEIGHTS_SUFFIX))
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    """파일의 (mtime_ns, 크기) - 변경 감지용 (없으면 None)"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+@contextmanager
+def store_lock(store_dir: str) -> Iterator[None]:
+    """저장소 갱신용 프로세스 간 배타적 잠금 (다른 프로세스가 갱신 중이면 끝날 때까지 대기)"""
+    os.makedirs(store_dir, exist_ok=True)
+    with open(os.path.join(store_dir, LOCK_FILE), 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    # LK_LOCK은 10번 재시도 후 OSError를 내므로 잠금을 얻을 때까지 반복
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _memmap(path: str, dtype) -> np.ndarray:
+    """빈 파일도 다룰 수 있는 읽기 전용 메모리 매핑"""
+    if os.path.getsize(path) == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r')
+
+def _load_json(path: str, default: Any) -> Any:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default
+
+class ChunkStore:
+    """스냅샷의 청크 메타데이터 (청크별 JSON을 이어 붙인 파일을 메모리 매핑해 필요할 때만 파싱)"""
+
+    def __init__(self, snapshot_dir: str):
+        self.offsets = _memmap(os.path.join(snapshot_dir, CHUNK_OFFSETS_FILE), np.uint64)
+        self.data = _memmap(os.path.join(snapshot_dir, CHUNKS_FILE), np.uint8)
+
+    def __len__(self) -> int:
+        return max(0, len(self.offsets) - 1)
+
+    def __getitem__(self, chunk_id: int) -> Dict[str, Any]:
+        start, end = int(self.offsets[chunk_id]), int(self.offsets[chunk_id + 1])
+        return json.loads(self.data[start:end].tobytes())
+
+    @staticmethod
+    def write(snapshot_dir: str, chunks: Sequence[Dict[str, Any]]):
+        offsets = np.empty(len(chunks) + 1, dtype=np.uint64)
+        offsets[0] = 0
+        with open(os.path.join(snapshot_dir, CHUNKS_FILE), 'wb') as f:
+            for i, chunk in enumerate(chunks):
+                data = json.dumps(chunk, ensure_ascii=False).encode('utf-8')
+                f.write(data)
+                offsets[i + 1] = offsets[i] + len(data)
+        offsets.tofile(os.path.join(snapshot_dir, CHUNK_OFFSETS_FILE))
+
+def open_snapshot(store_dir: str = DEFAULT_STORE_DIR) -> Optional[RuleIndex]:
+    """현재 스냅샷을 메모리 매핑한 RuleIndex (저장소가 없으면 None)"""
+    current = _load_json(os.path.join(store_dir, CURRENT_FILE), None)
+    if not current or current.get('version') != STORE_VERSION:
+        return None
+    snapshot_dir = os.path.join(store_dir, SNAPSHOT_DIR, current['snapshot'])
+    postings = {
+        name: np.load(os.path.join(snapshot_dir, f"{name}.npy"), mmap_mode='r')
+        for name in POSTING_ARRAYS
+    }
+    index = RuleIndex(ChunkStore(snapshot_dir), current['dims'], postings)
+    index.generation = current['generation']
+    # 현재 청크 해시 집합 (답변 캐시 무효화용)
+    index.chunk_hashes = frozenset(current['vectors'])
+    return index
+
+def current_stamp(store_dir: str = DEFAULT_STORE_DIR) -> Optional[Tuple[int, int]]:
+    """CURRENT.json의 (inode, mtime) - 새 스냅샷 감지용 (없으면 None)"""
+    try:
+        stat = os.stat(os.path.join(store_dir, CURRENT_FILE))
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+class SnapshotReader:
+    """저장소의 최신 스냅샷을 읽는 쪽 (조회 프로세스마다 하나)
+
+    index에 접근할 때 CURRENT.json이 바뀌었으면 새 스냅샷을 열어 교체합니다. 이미 꺼내 간
+    이전 RuleIndex는 그대로 유효하므로 진행 중인 조회는 이전 스냅샷으로 끝납니다.
+    """
+
+    def __init__(self, store_dir: str = DEFAULT_STORE_DIR):
+        self.store_dir = store_dir
+        self._index: Optional[RuleIndex] = None
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    @property
+    def index(self) -> Optional[RuleIndex]:
+        stamp = current_stamp(self.store_dir)
+        if stamp != self._stamp:
+            with self._lock:
+                if stamp != self._stamp:
+                    try:
+                        self._index = open_snapshot(self.store_dir)
+                        self._stamp = stamp
+                        if self._index is not None:
+                            logger.info(f"규정 스냅샷 사용: 세대 {self._index.generation}, 청크 {self._index.size}개")
+                    except Exception as e:
+                        # 교체 중인 스냅샷을 읽지 못하면 이전 스냅샷을 계속 사용
+                        logger.warning(f"규정 스냅샷 열기 실패: {e}")
+        return self._index
+
+    def search(self, question: str, k: int = DEFAULT_TOP_K) -> List[Dict[str, Any]]:
+        index = self.index
+        return index.search(question, k) if index is not None else []
+
+class RuleStore:
+    """규정 파일을 감시해 저장소를 증분 갱신하는 쪽 (저장소당 하나만 실행)"""
+
+    def __init__(self, knowledge_files: Sequence[str], store_dir: str = DEFAULT_STORE_DIR, dims: int = DEFAULT_DIMS):
+        self.knowledge_files = [os.path.abspath(path) for path in knowledge_files]
+        self.store_dir = store_dir
+        self.dims = dims
+        self._lock = threading.Lock()
+        self._watch_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _current(self) -> Dict[str, Any]:
+        current = _load_json(os.path.join(self.store_dir, CURRENT_FILE), {})
+        if current.get('version') != STORE_VERSION or current.get('dims') != self.dims:
+            return {}
+        return current
+
+    def changed(self) -> bool:
+        """마지막 갱신 이후 규정 파일이 바뀌었는지 여부"""
+        files = self._current().get('files', {})
+        if set(files) != set(self.knowledge_files):
+            return True
+        return any(files[path] != list(_file_stamp(path) or ()) for path in self.knowledge_files)
+
+    def update(self, force: bool = False) -> Dict[str, Any]:
+        """바뀐 청크만 임베딩해 새 스냅샷 생성 (파일이 그대로면 아무것도 하지 않음)
+
+        저장소 잠금을 잡은 뒤 CURRENT.json을 다시 읽으므로, 다른 프로세스가 먼저 갱신했으면 그 결과를 이어받습니다.
+        """
+        with self._lock, store_lock(self.store_dir):
+            if not force and not self.changed():
+                return {'updated': False}
+            return self._update()
+
+    def _update(self) -> Dict[str, Any]:
+        started_at = time.perf_counter()
+        os.makedirs(os.path.join(self.store_dir, SNAPSHOT_DIR), exist_ok=True)
+        current = self._current()
+        vectors: Dict[str, List[int]] = current.get('vectors', {})
+        log_name = current.get('vector_log')
+        if not current or not log_name or not all(map(os.path.exists, vector_log_paths(self.store_dir, log_name))):
+            # 새 저장소 (또는 버전/차원이 바뀌었거나 로그가 없어짐): 빈 벡터 로그로 다시 시작 (기존 로그는 교체 후 삭제)
+            vectors = {}
+            log_name = self._new_log_name()
+            for path in vector_log_paths(self.store_dir, log_name):
+                open(path, 'wb').close()
+        features_path, weights_path = vector_log_paths(self.store_dir, log_name)
+
+        # 현재 청크 목록과 해시 (파일 상태는 읽기 전에 기록해 읽는 중 바뀐 내용은 다음 갱신에서 반영)
+        file_stamps = {path: list(_file_stamp(path) or ()) for path in self.knowledge_files}
+        chunks: List[Dict[str, Any]] = []
+        for path in self.knowledge_files:
+            if not os.path.exists(path):
+                logger.warning(f"규정 파일 없음: {path}")
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                for chunk in split_chunks(f.read(), source=os.path.basename(path)):
+                    chunk['id'] = len(chunks)
+                    chunk['hash'] = chunk_hash(chunk, self.dims)
+                    chunks.append(chunk)
+
+        # 로그에 없는 청크만 임베딩해 덧붙임 (현재 CURRENT.json이 가리키는 위치 뒤에만 쓰므로 중간에 실패해도 안전)
+        new_chunks = list({chunk['hash']: chunk for chunk in chunks if chunk['hash'] not in vectors}.values())
+        if new_chunks:
+            features, weights, lengths = embed_many([chunk_text(chunk) for chunk in new_chunks], self.dims)
+            offset = os.path.getsize(features_path) // np.dtype(np.int64).itemsize
+            with open(features_path, 'ab') as f:
+                features.astype(np.int64).tofile(f)
+            with open(weights_path, 'ab') as f:
+                weights.astype(np.float32).tofile(f)
+            for chunk, length in zip(new_chunks, lengths.tolist()):
+                vectors[chunk['hash']] = [offset, length]
+                offset += length
+
+        live_hashes = {chunk['hash'] for chunk in chunks}
+        vectors = {key: value for key, value in vectors.items() if key in live_hashes}
+        log_entries = os.path.getsize(features_path) // np.dtype(np.int64).itemsize
+        live_entries = sum(length for _, length in vectors.values())
+        if log_entries and (log_entries - live_entries) / log_entries > COMPACT_DEAD_RATIO:
+            vectors, log_name = self._compact(vectors, log_name)
+
+        generation = time.time_ns()
+        snapshot_name = str(generation)
+        self._write_snapshot(snapshot_name, chunks, vectors, log_name)
+        self._write_current({
+            'version': STORE_VERSION,
+            'generation': generation,
+            'snapshot': snapshot_name,
+            'dims': self.dims,
+            'chunks': len(chunks),
+            'vector_log': log_name,
+            'vectors': vectors,
+            'files': file_stamps
+        })
+        self._remove_old_snapshots(snapshot_name)
+        self._remove_old_logs(log_name)
+
+        stats = {
+            'updated': True,
+            'generation': generation,
+            'chunks': len(chunks),
+            'embedded': len(new_chunks),
+            'reused': len(chunks) - len(new_chunks),
+            'seconds': round(time.perf_counter() - started_at, 3)
+        }
+        logger.info(
+            f"규정 저장소 갱신: 청크 {stats['chunks']}개 (새로 임베딩 {stats['embedded']}, "
+            f"재사용 {stats['reused']}), {stats['seconds']:.3f}s"
+        )
+        return stats
+
+    @staticmethod
+    def _new_log_name() -> str:
+        return f"{VECTOR_LOG_PREFIX}-{time.time_ns()}"
+
+    def _read_vectors(self, vectors: Dict[str, List[int]], hashes: Sequence[str],
+                      log_name: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """벡터 로그에서 hashes 순서대로 (특징 번호, 가중치, 청크별 길이) 배열을 모음"""
+        features_path, weights_path = vector_log_paths(self.store_dir, log_name)
+        features_log = _memmap(features_path, np.int64)
+        weights_log = _memmap(weights_path, np.float32)
+        spans = np.array([vectors[key] for key in hashes], dtype=np.int64).reshape(-1, 2)
+        lengths = spans[:, 1]
+        # 청크별 (시작 위치 + 0..길이-1)을 한 번에 만들어 로그에서 모아 옴
+        positions = np.repeat(spans[:, 0] - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        return np.asarray(features_log[positions]), np.asarray(weights_log[positions]), lengths
+
+    def _compact(self, vectors: Dict[str, List[int]], log_name: str) -> Tuple[Dict[str, List[int]], str]:
+        """쓰지 않는 벡터를 뺀 새 세대 로그를 쓰고 (새 위치 정보, 새 로그 이름) 반환
+
+        기존 로그는 건드리지 않으므로 CURRENT.json을 교체하기 전에 실패해도 이전 상태가 그대로 유효합니다.
+        """
+        hashes = list(vectors)
+        features, weights, lengths = self._read_vectors(vectors, hashes, log_name)
+        new_log_name = self._new_log_name()
+        for path, array in zip(vector_log_paths(self.store_dir, new_log_name), (features, weights)):
+            array.tofile(path)
+        offsets = np.cumsum(lengths) - lengths
+        logger.info(f"벡터 로그 정리: {len(hashes)}개 청크 → {new_log_name}")
+        return {key: [int(offset), int(length)] for key, offset, length in zip(hashes, offsets, lengths)}, new_log_name
+
+    def _write_snapshot(self, snapshot_name: str, chunks: List[Dict[str, Any]], vectors: Dict[str, List[int]],
+                        log_name: str):
+        """현재 청크들의 역색인 배열과 메타데이터를 스냅샷 디렉터리에 기록 (임베딩은 로그 재사용)"""
+        snapshot_dir = os.path.join(self.store_dir, SNAPSHOT_DIR, snapshot_name)
+        tmp_dir = snapshot_dir + '.tmp'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        postings = build_postings(*self._read_vectors(vectors, [chunk['hash'] for chunk in chunks], log_name))
+        for name in POSTING_ARRAYS:
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), postings[name])
+        ChunkStore.write(tmp_dir, chunks)
+        os.replace(tmp_dir, snapshot_dir)
+
+    def _write_current(self, current: Dict[str, Any]):
+        """CURRENT.json 원자적 교체 (조회 프로세스는 파일 변경으로 새 스냅샷 감지)"""
+        path = os.path.join(self.store_dir, CURRENT_FILE)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(json.dumps(current, ensure_ascii=False))
+        os.replace(path + '.tmp', path)
+
+    def _remove_old_snapshots(self, keep: str):
+        """최근 KEEP_SNAPSHOTS개를 제외한 스냅샷과 중단된 갱신이 남긴 *.tmp 디렉터리 삭제 (저장소 잠금 안에서만 호출)
+
+        아직 매핑 중인 파일은 POSIX에서는 삭제 후에도 유효하고, Windows에서는 삭제에 실패하면
+        남겨 두었다가 다음 갱신 때 다시 지웁니다.
+        """
+        snapshots_dir = os.path.join(self.store_dir, SNAPSHOT_DIR)
+        names = sorted((name for name in os.listdir(snapshots_dir) if name.isdigit()), key=int)
+        leftovers = [name for name in os.listdir(snapshots_dir) if name.endswith('.tmp')]
+        for name in names[:-KEEP_SNAPSHOTS] + leftovers:
+            if name == keep:
+                continue
+            shutil.rmtree(os.path.join(snapshots_dir, name), ignore_errors=True)
+            if os.path.exists(os.path.join(snapshots_dir, name)):
+                logger.info(f"사용 중인 이전 규정 스냅샷은 다음 갱신 때 삭제: {name}")
+
+    def _remove_old_logs(self, keep: str):
+        """CURRENT.json이 가리키지 않는 벡터 로그 삭제 (정리 전 로그, 이전 버전의 vectors.i64 등, 저장소 잠금 안에서만 호출)"""
+        for name in os.listdir(self.store_dir):
+            stem, suffix = os.path.splitext(name)
+            if (stem.startswith(VECTOR_LOG_PREFIX) and stem != keep
+                    and suffix in (VECTOR_FEATURES_SUFFIX, VECTOR_WEIGHTS_SUFFIX)):
+                try:
+                    os.remove(os.path.join(self.store_dir, name))
+                except OSError as e:
+                    logger.warning(f"이전 벡터 로그 삭제 실패 ({name}): {e}")
+
+    def start_watching(self, interval: float = DEFAULT_WATCH_INTERVAL):
+        """백그라운드 스레드에서 interval초마다 파일 변경을 확인해 갱신"""
+        if self._watch_thread is not None and self._watch_thread.is_alive():
+            return
+        self._stop.clear()
+        self._watch_thread = threading.Thread(target=self._watch, args=(interval,), name="rag-store-watch", daemon=True)
+        self._watch_thread.start()
+
+    def _watch(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.update()
+            except Exception as e:
+                logger.error(f"규정 저장소 갱신 실패: {e}")
+
+    def stop_watching(self):
+        self._stop.set()
+        if self._watch_thread is not None:
+            self._watch_thread.join()
+            self._watch_thread = None
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="증분 갱신 규정 벡터 저장소")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    for command, help_text in (('update', "바뀐 청크만 임베딩해 스냅샷 갱신"),
+                               ('watch', "규정 파일을 감시하며 계속 갱신")):
+        command_parser = subparsers.add_parser(command, help=help_text)
+        command_parser.add_argument('files', nargs='*', default=['company_rules.txt'])
+        command_parser.add_argument('--store-dir', default=DEFAULT_STORE_DIR)
+        command_parser.add_argument('--full', action='store_true', help="변경 여부와 관계없이 새 스냅샷 생성")
+        if command == 'watch':
+            command_parser.add_argument('--interval', type=float, default=DEFAULT_WATCH_INTERVAL)
+
+    search_parser = subparsers.add_parser('search', help="현재 스냅샷에서 검색")
+    search_parser.add_argument('question')
+    search_parser.add_argument('--store-dir', default=DEFAULT_STORE_DIR)
+    search_parser.add_argument('-k', type=int, default=DEFAULT_TOP_K)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == 'search':
+        started_at = time.perf_counter()
+        results = SnapshotReader(args.store_dir).search(args.question, args.k)
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        for rank, chunk in enumerate(results, 1):
+            print(f"{rank:3d}. [{chunk['score']:.3f}] {chunk['text']}")
+        print(f"{len(results)}개 청크, {elapsed_ms:.3f}ms", file=sys.stderr)
+        return
+
+    store = RuleStore(args.files, args.store_dir)
+    print(json.dumps(store.update(force=args.full), ensure_ascii=False))
+    if args.command == 'watch':
+        store.start_watching(args.interval)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            store.stop_watching()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+"""간단한 RAG 실행기
+
+1. 검색 : company_rules.txt를 청크로 나눈 인덱스(rag_index.RuleIndex)에서 질문과 관련된 상위 k개 청크를 찾습니다.
+          인덱스는 rag_store에 저장되어 규정 파일이 바뀌면 바뀐 청크만 다시 임베딩합니다.
+2. 보강 : '검색한 청크 + 사용자 질문'으로 프롬프트를 만듭니다. 파일 전체를 넣지 않으므로 크기가 일정합니다.
+3. 생성 : 보강된 프롬프트를 OpenAI 모델에 보내 규정에 근거한 답변을 받습니다 (openai>=1.0).
+
+비슷한 질문에 이미 답했고 이번 질문으로 검색한 청크가 그때의 근거 청크와 같다면 생성 없이 answer_cache의 답변을 재사용합니다.
+
+사용법:
+    python simple_rag.py                          # 대화형
+    python simple_rag.py "연차는 며칠이야?" -k 3
+    python simple_rag.py "연차는 며칠이야?" --dry-run   # API 호출 없이 프롬프트만 출력
+    python simple_rag.py --watch                  # 대화 중 규정 파일이 바뀌면 백그라운드에서 반영
+    python simple_rag.py --read-only              # 저장소를 갱신하지 않고 현재 스냅샷만 조회 (갱신은 rag_store.py watch)
+    python simple_rag.py --fake-llm               # API 없이 근거 청크를 그대로 답하는 가짜 LLM 사용
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Callable, Dict, FrozenSet, List, Any, Optional
+import logging
+
+from answer_cache import AnswerCache, DEFAULT_MAX_ENTRIES, DEFAULT_SIMILARITY_THRESHOLD
+from rag_index import RuleIndex, DEFAULT_TOP_K
+from rag_store import RuleStore, SnapshotReader, DEFAULT_STORE_DIR, chunk_hash
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KNOWLEDGE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'company_rules.txt')
+DEFAULT_MODEL = os.environ.get('OPENAI_MODEL', 'gpt-4o-mini')
+
+SYSTEM_PROMPT = (
+    "당신은 회사 규정 안내 챗봇입니다. 반드시 아래 '참고 규정'에 있는 내용만 근거로 답변하고, "
+    "규정에 없는 내용은 '규정에서 찾을 수 없습니다'라고 답하세요."
+)
+
+def build_prompt(question: str, chunks: List[Dict[str, Any]]) -> str:
+    """검색한 청크와 질문으로 보강된 프롬프트 생성"""
+    if chunks:
+        context = "\n".join(f"- {chunk['text']}" for chunk in chunks)
+    else:
+        context = "(관련 규정 없음)"
+    return f"[참고 규정]\n{context}\n\n[질문]\n{question}"
+
+class FakeLLM:
+    """API 호출 없이 프롬프트의 첫 번째 참고 규정을 답변으로 돌려주는 가짜 LLM (테스트 / 벤치마크용)"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self, prompt: str) -> str:
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        context = prompt.split("\n\n[질문]", 1)[0].splitlines()[1:]
+        if not context or not context[0].startswith("- "):
+            return "규정에서 찾을 수 없습니다"
+        return context[0][2:]
+
+class SimpleRAG:
+    """규정 파일 기반 질의응답 (검색 → 보강 → 생성)
+
+    store_dir가 있으면 시작할 때 저장소를 증분 갱신하고 현재 스냅샷에서 검색합니다.
+    watch가 True면 규정 파일 변경을 백그라운드에서 반영하며, 갱신 중에는 이전 스냅샷으로 답합니다.
+    read_only가 True면 저장소를 갱신하지 않고 SnapshotReader로 현재 스냅샷만 조회합니다. 작업 프로세스 여러 개가
+    저장소를 공유할 때는 모두 read_only로 열고 갱신은 `rag_store.py watch` 프로세스 하나에 맡깁니다.
+    store_dir가 None이면 저장소 없이 메모리에서 인덱스를 만듭니다.
+    generator를 주면 OpenAI 대신 그 함수(프롬프트 → 답변)로 생성하고, cache_size가 0이면 답변 캐시를 쓰지 않습니다.
+    """
+
+    def __init__(self, knowledge_files: Optional[List[str]] = None, model: str = DEFAULT_MODEL,
+                 top_k: int = DEFAULT_TOP_K, store_dir: Optional[str] = DEFAULT_STORE_DIR, watch: bool = False,
+                 generator: Optional[Callable[[str], str]] = None, cache_size: int = DEFAULT_MAX_ENTRIES,
+                 cache_threshold: float = DEFAULT_SIMILARITY_THRESHOLD, read_only: bool = False):
+        knowledge_files = knowledge_files or [DEFAULT_KNOWLEDGE_FILE]
+        self.store: Optional[RuleStore] = None
+        if store_dir and read_only:
+            if watch:
+                raise ValueError("read_only 모드에서는 watch를 쓸 수 없습니다 (rag_store.py watch로 갱신)")
+            self.reader = SnapshotReader(store_dir)
+            if self.reader.index is None:
+                logger.warning(f"규정 스냅샷이 아직 없습니다: {store_dir} (rag_store.py update/watch로 생성)")
+        elif store_dir:
+            self.store = RuleStore(knowledge_files, store_dir)
+            self.store.update()
+            self.reader = SnapshotReader(store_dir)
+            if watch:
+                self.store.start_watching()
+        else:
+            self.reader = None
+            self._index = RuleIndex.from_files(knowledge_files)
+        self.model = model
+        self.top_k = top_k
+        self.generator = generator
+        self.cache = AnswerCache(cache_size, cache_threshold)
+        self._live_index: Optional[RuleIndex] = None
+        self._live_hashes: FrozenSet[str] = frozenset()
+        self._client = None
+
+    @property
+    def index(self) -> Optional[RuleIndex]:
+        """현재 검색 인덱스 (저장소를 쓰면 최신 스냅샷)"""
+        return self.reader.index if self.reader is not None else self._index
+
+    @property
+    def client(self):
+        """OpenAI 클라이언트 (처음 생성할 때 OPENAI_API_KEY 사용)"""
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI()
+        return self._client
+
+    def retrieve(self, question: str) -> List[Dict[str, Any]]:
+        index = self.index
+        return index.search(question, self.top_k) if index is not None else []
+
+    def generate(self, prompt: str) -> str:
+        if self.generator is not None:
+            return self.generator(prompt)
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0
+        )
+        return response.choices[0].message.content
+
+    def _current_hashes(self, index: Optional[RuleIndex]) -> FrozenSet[str]:
+        """현재 인덱스의 청크 해시 집합 (스냅샷이 바뀌면 사라진 청크를 근거로 한 캐시 답변 제거)"""
+        if index is not self._live_index:
+            if index is None:
+                live_hashes = frozenset()
+            else:
+                live_hashes = getattr(index, 'chunk_hashes', None)
+                if live_hashes is None:
+                    live_hashes = frozenset(chunk.get('hash') or chunk_hash(chunk, index.dims) for chunk in index.chunks)
+            if self._live_index is not None:
+                self.cache.invalidate(live_hashes)
+            self._live_index, self._live_hashes = index, live_hashes
+        return self._live_hashes
+
+    def ask(self, question: str) -> Dict[str, Any]:
+        """질문 하나에 대한 답변과 근거 청크, 단계별 소요 시간
+
+        cached가 True면 검색된 청크가 같은 비슷한 이전 질문의 답변과 근거 청크를 재사용한 결과입니다 (similarity 포함).
+        검색은 로컬 인덱스 조회라 생성보다 훨씬 싸므로 캐시 조회 전에 항상 수행합니다.
+        """
+        started_at = time.perf_counter()
+        index = self.index
+        self._current_hashes(index)
+        chunks = index.search(question, self.top_k) if index is not None else []
+        chunk_hashes = [chunk.get('hash') or chunk_hash(chunk, index.dims) for chunk in chunks]
+        retrieved_at = time.perf_counter()
+        cached = self.cache.get(question, chunk_hashes)
+        if cached is not None:
+            return {
+                'answer': cached['answer'],
+                'chunks': cached['chunks'],
+                'prompt_chars': 0,
+                'cached': True,
+                'similarity': cached['similarity'],
+                'timings': {'retrieve': retrieved_at - started_at, 'cache': time.perf_counter() - retrieved_at}
+            }
+
+        prompt = build_prompt(question, chunks)
+        answer = self.generate(prompt)
+        self.cache.set(question, answer, chunks, chunk_hashes)
+        return {
+            'answer': answer,
+            'chunks': chunks,
+            'prompt_chars': len(prompt),
+            'cached': False,
+            'timings': {
+                'retrieve': retrieved_at - started_at,
+                'generate': time.perf_counter() - retrieved_at
+            }
+        }
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="company_rules.txt 기반 RAG 챗봇")
+    parser.add_argument('question', nargs='?', help="질문 (없으면 대화형으로 실행)")
+    parser.add_argument('--file', action='append', help="규정 파일 (여러 번 지정 가능, 기본 company_rules.txt)")
+    parser.add_argument('-k', type=int, default=DEFAULT_TOP_K, help="프롬프트에 넣을 청크 수")
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--dry-run', action='store_true', help="모델을 호출하지 않고 보강된 프롬프트만 출력")
+    parser.add_argument('--store-dir', default=DEFAULT_STORE_DIR, help="증분 갱신 벡터 저장소 위치")
+    parser.add_argument('--no-store', action='store_true', help="저장소 없이 메모리에서 인덱스 생성")
+    parser.add_argument('--watch', action='store_true', help="규정 파일 변경을 백그라운드에서 반영")
+    parser.add_argument('--read-only', action='store_true',
+                        help="저장소를 갱신하지 않고 현재 스냅샷만 조회 (여러 프로세스가 공유할 때)")
+    parser.add_argument('--fake-llm', action='store_true', help="API 대신 근거 청크를 그대로 답하는 가짜 LLM 사용")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_ENTRIES, help="답변 캐시 항목 수 (0이면 사용 안 함)")
+    parser.add_argument('--cache-threshold', type=float, default=DEFAULT_SIMILARITY_THRESHOLD,
+                        help="캐시된 답변을 재사용할 질문 유사도")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    rag = SimpleRAG(args.file, args.model, args.k, None if args.no_store else args.store_dir, args.watch,
+                    FakeLLM() if args.fake_llm else None, args.cache_size, args.cache_threshold, args.read_only)
+
+    def answer(question: str):
+        if args.dry_run:
+            print(build_prompt(question, rag.retrieve(question)))
+            return
+        result = rag.ask(question)
+        print(f"\n🤖 {result['answer']}")
+        sources = ", ".join(chunk['text'][:20] + "..." for chunk in result['chunks'])
+        if result['cached']:
+            print(f"   (근거: {sources or '없음'} | 캐시된 답변 재사용, 유사도 {result['similarity']:.2f}, "
+                  f"{result['timings']['cache'] * 1000:.1f}ms)")
+            return
+        print(f"   (근거: {sources or '없음'} | 프롬프트 {result['prompt_chars']}자, "
+              f"검색 {result['timings']['retrieve'] * 1000:.1f}ms, 생성 {result['timings']['generate']:.2f}s)")
+
+    if args.question:
+        answer(args.question)
+        return
+
+    print("회사 규정 챗봇입니다. 종료하려면 'exit'를 입력하세요.")
+    while True:
+        try:
+            question = input("\n질문: ").strip()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if question.lower() in ('exit', 'quit', '종료'):
+            break
+        if question:
+            try:
+                answer(question)
+            except Exception as e:
+                print(f"오류가 발생했습니다: {e}", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""답변 의미 캐시 회귀 테스트 (가짜 LLM 사용, API 호출 없음)
+
+    python -m unittest test_answer_cache
+"""
+import unittest
+
+from answer_cache import AnswerCache
+from simple_rag import FakeLLM, SimpleRAG
+
+class AnswerCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.llm = FakeLLM()
+        self.rag = SimpleRAG(store_dir=None, generator=self.llm)
+
+    def test_paraphrase_reuses_answer(self):
+        first = self.rag.ask("타운홀 미팅은 언제야?")
+        second = self.rag.ask("타운홀 미팅이 언제인가요?")
+        self.assertFalse(first['cached'])
+        self.assertTrue(second['cached'])
+        self.assertEqual(self.llm.calls, 1)
+
+    def test_similar_question_with_different_chunks_is_not_reused(self):
+        townhall = self.rag.ask("타운홀 미팅은 언제야?")
+        scrum = self.rag.ask("스크럼 미팅은 언제야?")
+        self.assertFalse(scrum['cached'])
+        self.assertNotEqual(scrum['answer'], townhall['answer'])
+        self.assertIn("스크럼", scrum['answer'])
+        self.assertEqual(self.llm.calls, 2)
+
+    def test_answer_without_chunks_is_not_cached(self):
+        self.rag.ask("주차 등록 방법")
+        again = self.rag.ask("주차 등록 방법")
+        self.assertFalse(again['cached'])
+        self.assertEqual(len(self.rag.cache), 0)
+
+    def test_invalidate_removes_entries_of_changed_chunks(self):
+        cache = AnswerCache()
+        cache.set("연차는 며칠이야?", "15일", [], ['a', 'b'])
+        self.assertIsNotNone(cache.get("연차가 며칠이지?", ['a', 'b']))
+        self.assertIsNone(cache.get("연차가 며칠이지?", ['a', 'c']))
+        self.assertEqual(cache.invalidate(frozenset({'a', 'c'})), 1)
+        self.assertEqual(len(cache), 0)
+
+if __name__ == '__main__':
+    unittest.main()
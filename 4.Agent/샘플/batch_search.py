@@ -0,0 +1,106 @@
+"""검색어 파일 일괄 검색
+
+파일에서 한 줄에 하나씩 검색어를 읽어 동시에 검색하고, 끝나는 순서대로 결과를 JSONL로 씁니다.
+빈 줄과 #으로 시작하는 줄은 건너뜁니다. 검색 결과는 검색 캐시에도 저장되므로
+야간에 자주 찾는 검색어를 미리 검색해 두는 용도로 쓸 수 있습니다.
+
+사용법:
+    python batch_search.py queries.txt -o results.jsonl --concurrency 16
+    python batch_search.py queries.txt --mcp-server ddg_search      # MCP 서버로 배치 검색
+    cat queries.txt | python batch_search.py - > results.jsonl
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import List, Optional, TextIO
+import logging
+
+from search_engines import search_aggregator, DEFAULT_BATCH_CONCURRENCY
+from mcp_client import mcp_client
+from mcp_client_simple import simple_mcp_client
+
+logger = logging.getLogger(__name__)
+
+def read_queries(source: TextIO) -> List[str]:
+    """검색어 목록 (빈 줄과 # 주석 제외)"""
+    queries = []
+    for line in source:
+        query = line.strip()
+        if query and not query.startswith('#'):
+            queries.append(query)
+    return queries
+
+def _write_line(output: TextIO, record: dict):
+    output.write(json.dumps(record, ensure_ascii=False) + "\n")
+    output.flush()
+
+async def run_aggregator(queries: List[str], output: TextIO, args: argparse.Namespace) -> int:
+    """SearchAggregator.search_many로 웹 + 문서 통합 검색"""
+    written = 0
+    try:
+        async for index, query, response in search_aggregator.search_many(
+            queries, args.concurrency, args.web, args.docs, args.deadline
+        ):
+            _write_line(output, {'index': index, 'query': query, **response.to_dict()})
+            written += 1
+    finally:
+        # 엔진 → HTTP 세션 → MCP 서버 → 캐시 순으로 정리 (search_service.py와 같은 순서)
+        await search_aggregator.registry.aclose()
+        await simple_mcp_client.aclose()
+        await mcp_client.cleanup()
+        search_aggregator.cache.close()
+    return written
+
+async def run_mcp(queries: List[str], output: TextIO, args: argparse.Namespace) -> int:
+    """MCP 서버로 검색 (서버 설정에 "batch": true면 JSON-RPC 배치 배열로 전송)"""
+    ready = await mcp_client.start_all([args.mcp_server])
+    if not ready.get(args.mcp_server):
+        raise RuntimeError(f"MCP 서버 '{args.mcp_server}'를 시작하지 못했습니다")
+    
+    written = 0
+    try:
+        # concurrency개씩 묶어 보내고 묶음 단위로 결과 기록
+        for start in range(0, len(queries), args.concurrency):
+            chunk = queries[start:start + args.concurrency]
+            results = await mcp_client.search_batch(args.mcp_server, chunk, args.web)
+            for offset, (query, items) in enumerate(zip(chunk, results)):
+                _write_line(output, {'index': start + offset, 'query': query, 'results': items})
+                written += 1
+    finally:
+        await mcp_client.cleanup()
+    return written
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="검색어 파일 일괄 검색 (JSONL 출력)")
+    parser.add_argument('queries', help="검색어 파일 (한 줄에 하나, '-'면 표준 입력)")
+    parser.add_argument('-o', '--output', help="결과 JSONL 파일 (기본: 표준 출력)")
+    parser.add_argument('-c', '--concurrency', type=int, default=DEFAULT_BATCH_CONCURRENCY, help="동시 검색 수")
+    parser.add_argument('--web', type=int, default=10, help="검색어당 웹 결과 수")
+    parser.add_argument('--docs', type=int, default=50, help="검색어당 기술 문서 결과 수")
+    parser.add_argument('--deadline', type=float, default=None, help="검색어당 응답 시간 예산 (초)")
+    parser.add_argument('--mcp-server', help="mcp_config.json의 서버 이름 (지정하면 MCP 서버로 검색)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    
+    if args.queries == '-':
+        queries = read_queries(sys.stdin)
+    else:
+        with open(args.queries, 'r', encoding='utf-8') as f:
+            queries = read_queries(f)
+    
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    started_at = time.perf_counter()
+    try:
+        run = run_mcp if args.mcp_server else run_aggregator
+        written = asyncio.run(run(queries, output, args))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    
+    elapsed = time.perf_counter() - started_at
+    logger.info(f"일괄 검색 완료: {written}/{len(queries)}개 검색어, {elapsed:.2f}s ({written / elapsed:.1f}개/s)")
+
+if __name__ == "__main__":
+    main()
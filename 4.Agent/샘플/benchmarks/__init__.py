@@ -0,0 +1,8 @@
+"""오프라인 벤치마크
+
+인터넷이나 npx 없이 가짜 MCP 서버(stub_mcp_server.py)와 가짜 DuckDuckGo 서버
+(stub_ddg_server.py)를 띄워 검색 경로별 지연 시간, 처리량, 최대 메모리를 측정합니다.
+
+    cd 4.Agent/샘플
+    python -m benchmarks.run --users 10 --requests 50
+"""
@@ -0,0 +1,379 @@
+"""오프라인 벤치마크 실행기
+
+각 시나리오를 별도 프로세스에서 실행해 p50/p95/p99 지연 시간, N명 동시 사용자 처리량,
+최대 RSS를 측정하고 결과를 JSON으로 저장합니다. --compare로 이전 결과와 비교할 수 있습니다.
+
+    python -m benchmarks.run                              # 모든 시나리오
+    python -m benchmarks.run -s search_all -s relevance_docs --users 20
+    python -m benchmarks.run --compare benchmarks/results/이전결과.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Callable, Awaitable, AsyncIterator
+import logging
+
+# 저장소 모듈(mcp_client, search_engines 등)은 benchmarks 상위 폴더에 있음
+SAMPLE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SAMPLE_DIR not in sys.path:
+    sys.path.insert(0, SAMPLE_DIR)
+
+from mcp_client import MCPClient
+from mcp_client_simple import simple_mcp_client
+from relevance import BM25FScorer, WEB_FIELDS, DOC_FIELDS
+from search_cache import SearchCache
+from search_engines import SearchAggregator
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+STUB_MCP_SERVER = os.path.join(BENCHMARK_DIR, 'stub_mcp_server.py')
+STUB_DDG_SERVER = os.path.join(BENCHMARK_DIR, 'stub_ddg_server.py')
+DEFAULT_RESULTS_DIR = os.path.join(BENCHMARK_DIR, 'results')
+SCENARIO_TIMEOUT = 600  # 시나리오 하나의 최대 실행 시간 (초)
+
+def percentile(samples: List[float], p: float) -> Optional[float]:
+    """정렬된 표본의 p 백분위수 (nearest-rank)"""
+    if not samples:
+        return None
+    index = min(len(samples) - 1, max(0, int(round(p / 100 * len(samples))) - 1))
+    return samples[index]
+
+def peak_rss_mb() -> Optional[float]:
+    """현재 프로세스의 최대 RSS (MB, 측정할 수 없으면 None)"""
+    try:
+        import resource
+    except ImportError:
+        # Windows: psutil이 있으면 peak working set 사용
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except Exception:
+            return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 바이트 단위
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+async def run_load(call: Callable[[int], Awaitable[bool]], users: int, requests_per_user: int) -> Dict[str, Any]:
+    """users명이 각자 requests_per_user번 연속 호출할 때의 지연 시간과 처리량
+
+    call(i)는 성공 여부를 반환하며, 예외도 실패로 셉니다.
+    """
+    latencies: List[float] = []
+    errors = 0
+    
+    async def user(index: int):
+        nonlocal errors
+        for n in range(requests_per_user):
+            started_at = time.perf_counter()
+            try:
+                ok = await call(index * requests_per_user + n)
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - started_at)
+            if not ok:
+                errors += 1
+    
+    started_at = time.perf_counter()
+    await asyncio.gather(*(user(i) for i in range(users)))
+    wall = time.perf_counter() - started_at
+    
+    latencies.sort()
+    total = len(latencies)
+    return {
+        'users': users,
+        'requests': total,
+        'errors': errors,
+        'error_rate': errors / total if total else 0.0,
+        'wall_seconds': round(wall, 4),
+        'throughput_rps': round(total / wall, 2) if wall else None,
+        'latency_ms': {
+            'mean': round(sum(latencies) / total * 1000, 3) if total else None,
+            'p50': round(percentile(latencies, 50) * 1000, 3) if total else None,
+            'p95': round(percentile(latencies, 95) * 1000, 3) if total else None,
+            'p99': round(percentile(latencies, 99) * 1000, 3) if total else None,
+            'max': round(latencies[-1] * 1000, 3) if total else None
+        }
+    }
+
+@contextlib.asynccontextmanager
+async def ddg_stub(options: argparse.Namespace) -> AsyncIterator[str]:
+    """가짜 DuckDuckGo 서버를 별도 프로세스로 띄우고 URL 반환"""
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, STUB_DDG_SERVER,
+        '--port', '0',
+        '--latency', str(options.ddg_latency),
+        '--jitter', str(options.ddg_latency / 4),
+        '--topics', str(options.ddg_topics),
+        '--error-rate', str(options.error_rate),
+        '--max-concurrency', str(options.ddg_capacity),
+        '--seed', '1',
+        stdout=asyncio.subprocess.PIPE
+    )
+    try:
+        line = (await asyncio.wait_for(process.stdout.readline(), 30)).decode().strip()
+        if not line.startswith('PORT '):
+            raise RuntimeError(f"가짜 DuckDuckGo 서버 시작 실패: {line!r}")
+        yield f"http://127.0.0.1:{line.split()[1]}/"
+    finally:
+        process.terminate()
+        await process.wait()
+
+@contextlib.asynccontextmanager
+async def stub_web_search(options: argparse.Namespace) -> AsyncIterator[None]:
+    """전역 simple_mcp_client가 가짜 DuckDuckGo 서버를 보도록 전환 (요청 제한은 --ddg-rate)"""
+    original_url = simple_mcp_client.web_search_url
+    async with ddg_stub(options) as url:
+        simple_mcp_client.web_search_url = url
+        simple_mcp_client.rate_limiter.configure(
+            simple_mcp_client.rate_limiter.host_of(url), rate=options.ddg_rate, burst=max(1, int(options.ddg_rate))
+        )
+        try:
+            yield
+        finally:
+            simple_mcp_client.web_search_url = original_url
+            await simple_mcp_client.aclose()
+
+async def scenario_mcp_send_request(options: argparse.Namespace) -> Dict[str, Any]:
+    """MCPClient.send_request - 가짜 MCP 서버 워커 풀에 동시 요청"""
+    server_config = {
+        'command': sys.executable,
+        'args': [
+            STUB_MCP_SERVER,
+            '--latency', str(options.mcp_latency),
+            '--jitter', str(options.mcp_latency / 4),
+            '--payload-bytes', str(options.mcp_payload_bytes),
+            '--error-rate', str(options.error_rate),
+            '--seed', '1'
+        ],
+        'pool_size': options.mcp_pool_size
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, 'mcp_config.json')
+        with open(config_path, 'w', encoding='utf-8') as f:
+            json.dump({'mcpServers': {'stub': server_config}}, f)
+        
+        client = MCPClient(config_path)
+        ready = await client.start_all()
+        if not ready.get('stub'):
+            raise RuntimeError("가짜 MCP 서버 시작 실패")
+        try:
+            async def call(i: int) -> bool:
+                response = await client.send_request('stub', 'search', {'query': f"query {i}", 'max_results': 10})
+                return bool(response) and 'result' in response
+            
+            report = await run_load(call, options.users, options.requests)
+            report['startup_seconds'] = client.last_start_all_seconds
+            return report
+        finally:
+            await client.cleanup()
+
+async def scenario_ddg_search_web_direct(options: argparse.Namespace) -> Dict[str, Any]:
+    """SimpleMCPClient.search_web_direct - 공유 연결 풀로 가짜 DuckDuckGo 호출"""
+    async with stub_web_search(options):
+        async def call(i: int) -> bool:
+            # HTTP 오류는 예외로 전달되어 run_load가 실패로 셈
+            results = await simple_mcp_client.search_web_direct(f"query {i}", 10)
+            return bool(results)
+        
+        report = await run_load(call, options.users, options.requests)
+        report['rate_limit'] = simple_mcp_client.rate_limiter.stats()
+        return report
+
+async def scenario_search_all(options: argparse.Namespace) -> Dict[str, Any]:
+    """SearchAggregator.search_all - 캐시에 없는 검색어 (웹 + 문서)"""
+    async with stub_web_search(options):
+        aggregator = SearchAggregator(cache=SearchCache(db_path=None))
+        
+        async def call(i: int) -> bool:
+            response = await aggregator.search_all(f"python async {i}", 10, 50)
+            return not response.partial and not response.unavailable_engines
+        
+        report = await run_load(call, options.users, options.requests)
+        report['circuit'] = aggregator.breakers.stats()
+        return report
+
+async def scenario_search_all_cached(options: argparse.Namespace) -> Dict[str, Any]:
+    """SearchAggregator.search_all - 같은 검색어 반복 (캐시 적중 경로)"""
+    async with stub_web_search(options):
+        aggregator = SearchAggregator(cache=SearchCache(db_path=None))
+        await aggregator.search_all("python async", 10, 50)
+        
+        async def call(i: int) -> bool:
+            response = await aggregator.search_all("python async", 10, 50)
+            return not response.partial
+        
+        report = await run_load(call, options.users, options.requests)
+        report['cache'] = aggregator.get_cache_stats()
+        return report
+
+def _synthetic_results(count: int, with_code: bool) -> List[Dict[str, Any]]:
+    """관련도 계산용 가짜 결과 묶음"""
+    topics = ['asyncio', 'event loop', 'coroutine', 'react hooks', 'useEffect', '비동기 프로그래밍', 'numpy array', '머신러닝']
+    results = []
+    for i in range(count):
+        topic = topics[i % len(topics)]
+        result = {
+            'title': f"{topic} 가이드 {i}",
+            'snippet': f"{topic}에 대한 설명과 예제입니다. " * 4 + f"python async await {i}",
+            'content': f"{topic} 문서 본문 {i} " * 10
+        }
+        if with_code:
+            result['code_snippet'] = f"import asyncio\nasync def main_{i}():\n    await asyncio.sleep({i})"
+        results.append(result)
+    return results
+
+async def _scorer_load(options: argparse.Namespace, fields, count: int, with_code: bool) -> Dict[str, Any]:
+    scorer = BM25FScorer(fields)
+    results = _synthetic_results(count, with_code)
+    
+    async def call(i: int) -> bool:
+        scorer.score("python 비동기 asyncio", results)
+        return True
+    
+    # CPU만 쓰는 계산이라 동시 사용자 수와 무관하게 한 명으로 측정
+    report = await run_load(call, 1, options.requests)
+    report['batch_size'] = count
+    return report
+
+async def scenario_relevance_web(options: argparse.Namespace) -> Dict[str, Any]:
+    """BM25FScorer - 웹 결과 10개 묶음"""
+    return await _scorer_load(options, WEB_FIELDS, 10, False)
+
+async def scenario_relevance_docs(options: argparse.Namespace) -> Dict[str, Any]:
+    """BM25FScorer - 문서 결과 100개 묶음"""
+    return await _scorer_load(options, DOC_FIELDS, 100, True)
+
+SCENARIOS: Dict[str, Callable[[argparse.Namespace], Awaitable[Dict[str, Any]]]] = {
+    'mcp_send_request': scenario_mcp_send_request,
+    'ddg_search_web_direct': scenario_ddg_search_web_direct,
+    'search_all': scenario_search_all,
+    'search_all_cached': scenario_search_all_cached,
+    'relevance_web': scenario_relevance_web,
+    'relevance_docs': scenario_relevance_docs
+}
+
+def _configure_logging(verbose: bool):
+    # 요청마다 찍히는 INFO 로그는 --verbose일 때만 출력
+    logging.basicConfig(level=logging.INFO if verbose else logging.WARNING)
+
+def run_scenario(name: str, options: argparse.Namespace) -> Dict[str, Any]:
+    """현재 프로세스에서 시나리오 하나 실행"""
+    _configure_logging(options.verbose)
+    report = asyncio.run(SCENARIOS[name](options))
+    peak = peak_rss_mb()
+    report['peak_rss_mb'] = round(peak, 1) if peak is not None else None
+    return report
+
+def _child(name: str, options: argparse.Namespace, queue):
+    try:
+        queue.put({'ok': True, 'report': run_scenario(name, options)})
+    except Exception as e:
+        queue.put({'ok': False, 'error': f"{type(e).__name__}: {e}"})
+
+def run_isolated(name: str, options: argparse.Namespace) -> Dict[str, Any]:
+    """시나리오를 새 프로세스에서 실행 (최대 RSS가 시나리오별로 측정되도록)"""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_child, args=(name, options, queue))
+    process.start()
+    try:
+        outcome = queue.get(timeout=SCENARIO_TIMEOUT)
+    except Exception:
+        process.kill()
+        outcome = {'ok': False, 'error': f"{SCENARIO_TIMEOUT}초 안에 끝나지 않았습니다"}
+    process.join()
+    if not outcome['ok']:
+        return {'error': outcome['error']}
+    return outcome['report']
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=BENCHMARK_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def compare(current: Dict[str, Any], previous: Dict[str, Any]):
+    """이전 결과 대비 p95 지연 시간과 처리량 변화 출력"""
+    print(f"\n이전 결과({previous.get('revision')}, {previous.get('timestamp')})와 비교:")
+    for name, report in current['scenarios'].items():
+        before = previous.get('scenarios', {}).get(name)
+        if not before or 'error' in before or 'error' in report:
+            continue
+        p95_before, p95_now = before['latency_ms']['p95'], report['latency_ms']['p95']
+        rps_before, rps_now = before['throughput_rps'], report['throughput_rps']
+        p95_change = (p95_now - p95_before) / p95_before * 100 if p95_before else 0.0
+        rps_change = (rps_now - rps_before) / rps_before * 100 if rps_before else 0.0
+        print(f"  {name:24s} p95 {p95_before:9.2f} → {p95_now:9.2f} ms ({p95_change:+6.1f}%)  "
+              f"처리량 {rps_before:9.1f} → {rps_now:9.1f} rps ({rps_change:+6.1f}%)")
+
+def print_report(name: str, report: Dict[str, Any]):
+    if 'error' in report:
+        print(f"  {name:24s} 실패: {report['error']}")
+        return
+    latency = report['latency_ms']
+    print(f"  {name:24s} p50 {latency['p50']:9.2f}  p95 {latency['p95']:9.2f}  p99 {latency['p99']:9.2f} ms  "
+          f"{report['throughput_rps']:9.1f} rps  오류 {report['error_rate']:.1%}  RSS {report['peak_rss_mb']} MB")
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 검색 벤치마크")
+    parser.add_argument('-s', '--scenario', action='append', choices=sorted(SCENARIOS), help="실행할 시나리오 (여러 번 지정 가능, 기본: 전체)")
+    parser.add_argument('--users', type=int, default=10, help="동시 사용자 수")
+    parser.add_argument('--requests', type=int, default=50, help="사용자당 요청 수")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="가짜 서버 오류 응답 비율 (0~1)")
+    parser.add_argument('--mcp-latency', type=float, default=0.02, help="가짜 MCP 서버 평균 지연 (초)")
+    parser.add_argument('--mcp-payload-bytes', type=int, default=4096, help="가짜 MCP 서버 응답 크기 (바이트)")
+    parser.add_argument('--mcp-pool-size', type=int, default=1, help="MCP 워커 풀 크기")
+    parser.add_argument('--ddg-latency', type=float, default=0.02, help="가짜 DuckDuckGo 서버 평균 지연 (초)")
+    parser.add_argument('--ddg-topics', type=int, default=20, help="가짜 DuckDuckGo 응답의 RelatedTopics 수")
+    parser.add_argument('--ddg-capacity', type=int, default=0,
+                        help="가짜 DuckDuckGo 서버가 429 없이 받는 동시 요청 수 (0이면 제한 없음)")
+    parser.add_argument('--ddg-rate', type=float, default=0.0, help="가짜 DuckDuckGo 호스트 초당 요청 제한 (0이면 제한 없음)")
+    parser.add_argument('--output', help="결과 JSON 경로 (기본: benchmarks/results/bench-<시각>.json)")
+    parser.add_argument('--compare', help="비교할 이전 결과 JSON")
+    parser.add_argument('--no-isolate', action='store_true', help="시나리오를 현재 프로세스에서 실행 (RSS가 누적됨)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="INFO 로그 출력")
+    options = parser.parse_args()
+    
+    names = options.scenario or list(SCENARIOS)
+    results = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'options': {key: value for key, value in vars(options).items() if key not in ('output', 'compare', 'scenario')},
+        'scenarios': {}
+    }
+    
+    print(f"벤치마크 시작: 사용자 {options.users}명 × {options.requests}회")
+    for name in names:
+        report = run_scenario(name, options) if options.no_isolate else run_isolated(name, options)
+        results['scenarios'][name] = report
+        print_report(name, report)
+    
+    output = options.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"bench-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {output}")
+    
+    if options.compare:
+        with open(options.compare, 'r', encoding='utf-8') as f:
+            compare(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""벤치마크용 가짜 DuckDuckGo Instant Answer 서버 (aiohttp)
+
+api.duckduckgo.com과 같은 형식(Abstract, RelatedTopics, Results)의 JSON을
+application/x-javascript로 돌려줍니다. 지연 시간, 관련 주제 수, 오류율을 설정할 수 있고,
+--max-concurrency를 주면 그보다 많은 동시 요청에는 429로 응답합니다.
+시작하면 표준 출력 첫 줄에 "PORT <번호>"를 출력합니다.
+
+사용법:
+    python stub_ddg_server.py --port 0 --latency 0.03 --topics 20 --error-rate 0.01 --max-concurrency 4
+"""
+import argparse
+import asyncio
+import json
+import random
+from typing import Dict, Any, Optional
+
+from aiohttp import web
+
+class StubDuckDuckGo:
+    """DuckDuckGo Instant Answer 응답 생성기"""
+    
+    def __init__(self, latency: float = 0.03, jitter: float = 0.0, topics: int = 20,
+                 error_rate: float = 0.0, seed: Optional[int] = None, max_concurrency: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.topics = topics
+        self.error_rate = error_rate
+        self.max_concurrency = max_concurrency
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.in_flight = 0
+    
+    def payload(self, query: str) -> Dict[str, Any]:
+        slug = query.lower().replace(' ', '-')
+        return {
+            "Heading": query,
+            "Abstract": f"{query}에 대한 요약 설명입니다. " * 3,
+            "AbstractURL": f"https://stub.example.com/{slug}",
+            "RelatedTopics": [
+                {
+                    "Text": f"{query} 관련 주제 {i} - 자세한 설명과 예제",
+                    "FirstURL": f"https://stub.example.com/{slug}/{i}"
+                }
+                for i in range(1, self.topics + 1)
+            ],
+            "Results": [
+                {
+                    "Text": f"{query} 공식 사이트",
+                    "FirstURL": f"https://stub.example.com/{slug}/official"
+                }
+            ]
+        }
+    
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if self.max_concurrency and self.in_flight >= self.max_concurrency:
+            return web.Response(status=429, text="too many requests")
+        self.in_flight += 1
+        try:
+            await asyncio.sleep(max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter)))
+        finally:
+            self.in_flight -= 1
+        if self.random.random() < self.error_rate:
+            return web.Response(status=500, text="stub error")
+        # 실제 API처럼 Content-Type이 application/json이 아님
+        return web.Response(
+            text=json.dumps(self.payload(request.query.get('q', '')), ensure_ascii=False),
+            content_type='application/x-javascript'
+        )
+    
+    def app(self) -> web.Application:
+        application = web.Application()
+        application.router.add_get('/', self.handle)
+        return application
+
+async def start_server(stub: StubDuckDuckGo, host: str = '127.0.0.1', port: int = 0) -> web.AppRunner:
+    """현재 이벤트 루프에서 서버 시작 (runner.addresses로 실제 포트 확인)"""
+    runner = web.AppRunner(stub.app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+async def serve(stub: StubDuckDuckGo, host: str, port: int):
+    runner = await start_server(stub, host, port)
+    print(f"PORT {runner.addresses[0][1]}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+def main():
+    parser = argparse.ArgumentParser(description="벤치마크용 가짜 DuckDuckGo 서버")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0, help="0이면 빈 포트 자동 선택")
+    parser.add_argument('--latency', type=float, default=0.03, help="평균 응답 지연 (초)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="지연 편차 (±초)")
+    parser.add_argument('--topics', type=int, default=20, help="RelatedTopics 항목 수")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="HTTP 500 응답 비율 (0~1)")
+    parser.add_argument('--seed', type=int, default=None, help="난수 시드")
+    parser.add_argument('--max-concurrency', type=int, default=0, help="429 없이 받는 동시 요청 수 (0이면 제한 없음)")
+    args = parser.parse_args()
+    
+    stub = StubDuckDuckGo(args.latency, args.jitter, args.topics, args.error_rate, args.seed, args.max_concurrency)
+    try:
+        asyncio.run(serve(stub, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""벤치마크용 가짜 MCP 서버 (JSON-RPC over stdio)
+
+npx나 인터넷 없이 MCPClient를 측정하기 위해 MCP handshake와 search / tools/call 요청에
+설정한 지연 시간, 응답 크기, 오류율로 응답합니다. 요청마다 스레드에서 처리하므로
+여러 요청이 동시에 진행되며, JSON-RPC 배치(배열) 요청도 처리합니다.
+
+사용법:
+    python stub_mcp_server.py --latency 0.05 --jitter 0.02 --payload-bytes 4096 --error-rate 0.01
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+SERVER_INFO = {
+    "name": "stub-mcp-server",
+    "version": "1.0.0"
+}
+SEARCH_TOOL = {
+    "name": "search",
+    "description": "벤치마크용 가짜 검색",
+    "inputSchema": {
+        "type": "object",
+        "properties": {
+            "query": {"type": "string"},
+            "max_results": {"type": "integer"}
+        },
+        "required": ["query"]
+    }
+}
+
+class StubMCPServer:
+    """stdin에서 요청을 읽어 stdout으로 응답하는 가짜 MCP 서버"""
+    
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0, payload_bytes: int = 2048,
+                 error_rate: float = 0.0, startup_delay: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.payload_bytes = payload_bytes
+        self.error_rate = error_rate
+        self.startup_delay = startup_delay
+        self.random = random.Random(seed)
+        self._write_lock = threading.Lock()
+    
+    def _delay(self) -> float:
+        return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+    
+    def _search_results(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """payload_bytes 크기에 맞춘 검색 결과 목록"""
+        query = str(params.get('query', ''))
+        max_results = max(1, int(params.get('max_results', 10)))
+        snippet_size = max(16, self.payload_bytes // max_results - 64)
+        return [
+            {
+                "title": f"{query} 결과 {i}",
+                "url": f"https://stub.example.com/{i}",
+                "snippet": ("stub " * (snippet_size // 5 + 1))[:snippet_size]
+            }
+            for i in range(1, max_results + 1)
+        ]
+    
+    def handle(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """요청 하나 처리 (알림이면 None)"""
+        method = message.get('method')
+        if 'id' not in message:
+            return None
+        
+        if method == 'initialize':
+            time.sleep(self.startup_delay)
+            result: Any = {
+                "protocolVersion": message.get('params', {}).get('protocolVersion', "2024-11-05"),
+                "capabilities": {"tools": {}},
+                "serverInfo": SERVER_INFO
+            }
+        else:
+            time.sleep(self._delay())
+            if self.random.random() < self.error_rate:
+                return {"jsonrpc": "2.0", "id": message['id'], "error": {"code": -32000, "message": "stub error"}}
+            if method == 'tools/list':
+                result = {"tools": [SEARCH_TOOL]}
+            elif method == 'tools/call':
+                text = json.dumps(self._search_results(message.get('params', {}).get('arguments', {})), ensure_ascii=False)
+                result = {"content": [{"type": "text", "text": text}]}
+            elif method == 'search':
+                result = self._search_results(message.get('params', {}))
+            else:
+                return {"jsonrpc": "2.0", "id": message['id'], "error": {"code": -32601, "message": f"Method not found: {method}"}}
+        return {"jsonrpc": "2.0", "id": message['id'], "result": result}
+    
+    def _write(self, payload: Any):
+        with self._write_lock:
+            sys.stdout.write(json.dumps(payload, ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+    
+    def _respond(self, message: Dict[str, Any]):
+        response = self.handle(message)
+        if response is not None:
+            self._write(response)
+    
+    def _respond_batch(self, messages: List[Dict[str, Any]]):
+        # 배치 안의 요청도 개별 요청처럼 동시에 처리
+        with ThreadPoolExecutor(max_workers=max(1, len(messages))) as executor:
+            responses = [response for response in executor.map(self.handle, messages) if response is not None]
+        if responses:
+            self._write(responses)
+    
+    def serve(self):
+        """stdin이 닫힐 때까지 요청 처리"""
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                self._write({"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}})
+                continue
+            target = self._respond_batch if isinstance(message, list) else self._respond
+            threading.Thread(target=target, args=(message,), daemon=True).start()
+
+def main():
+    parser = argparse.ArgumentParser(description="벤치마크용 가짜 MCP 서버")
+    parser.add_argument('--latency', type=float, default=0.05, help="평균 응답 지연 (초)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="지연 편차 (±초)")
+    parser.add_argument('--payload-bytes', type=int, default=2048, help="검색 응답 크기 (바이트, 대략)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="JSON-RPC 오류 응답 비율 (0~1)")
+    parser.add_argument('--startup-delay', type=float, default=0.0, help="initialize 응답 지연 (초)")
+    parser.add_argument('--seed', type=int, default=None, help="난수 시드")
+    args = parser.parse_args()
+    
+    StubMCPServer(
+        latency=args.latency,
+        jitter=args.jitter,
+        payload_bytes=args.payload_bytes,
+        error_rate=args.error_rate,
+        startup_delay=args.startup_delay,
+        seed=args.seed
+    ).serve()
+
+if __name__ == "__main__":
+    main()
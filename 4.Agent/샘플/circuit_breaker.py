@@ -0,0 +1,166 @@
+"""검색 엔진 / MCP 서버별 서킷 브레이커
+
+연속 실패가 failure_threshold번 쌓이면 열림(open) 상태가 되어 reset_timeout초 동안 호출을
+보내지 않고 바로 CircuitOpenError를 냅니다. 실패하는 upstream마다 타임아웃을 끝까지 기다리지
+않으므로 호출자는 곧바로 이전 결과나 "사용 불가" 상태로 넘어갈 수 있습니다. 시간이 지나면
+반열림(half-open) 상태에서 시험 호출 half_open_calls개만 보내고, 성공하면 닫힘(closed)으로
+돌아가고 실패하면 다시 열립니다.
+
+요청 제한(RateLimitError)이나 취소처럼 upstream 상태와 무관한 예외는 실패로 세지 않습니다.
+"""
+import asyncio
+import contextlib
+import time
+from typing import Dict, Any, AsyncIterator, Callable, Optional, Tuple, Type
+import logging
+
+from rate_limit import RateLimitError
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+# Prometheus 게이지용 상태 값
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+DEFAULT_FAILURE_THRESHOLD = 5   # 열림으로 바뀌는 연속 실패 수
+DEFAULT_RESET_TIMEOUT = 30.0    # 열림 상태 유지 시간 (초)
+DEFAULT_HALF_OPEN_CALLS = 1     # 반열림 상태에서 동시에 보내는 시험 호출 수
+
+# 실패로 세지 않는 예외
+NEUTRAL_EXCEPTIONS: Tuple[Type[BaseException], ...] = (RateLimitError, asyncio.CancelledError)
+
+class CircuitOpenError(Exception):
+    """서킷이 열려 있어 호출하지 않음"""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"'{name}' 서킷 열림 ({retry_in:.1f}초 후 재시도)")
+        self.name = name
+        self.retry_in = retry_in
+
+class CircuitBreaker:
+    """upstream 하나의 닫힘 → 열림 → 반열림 상태 기계 (이벤트 루프 하나에서 사용)"""
+
+    def __init__(self, name: str, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT, half_open_calls: int = DEFAULT_HALF_OPEN_CALLS):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = max(1, half_open_calls)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trials = 0
+        self.consecutive_failures = 0
+        self.counters = {
+            'calls': 0,
+            'failures': 0,
+            'rejected': 0,
+            'opened': 0
+        }
+
+    @property
+    def state(self) -> str:
+        """현재 상태 (열린 지 reset_timeout이 지났으면 반열림)"""
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._trials = 0
+            logger.info(f"'{self.name}' 서킷 반열림: 시험 호출 허용")
+        return self._state
+
+    def allow(self):
+        """호출해도 되면 그대로 반환, 아니면 CircuitOpenError (반열림이면 시험 호출 한 자리 차지)"""
+        state = self.state
+        if state == CLOSED:
+            self.counters['calls'] += 1
+            return
+        if state == HALF_OPEN and self._trials < self.half_open_calls:
+            self._trials += 1
+            self.counters['calls'] += 1
+            return
+        self.counters['rejected'] += 1
+        retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)) if state == OPEN else 0.0
+        raise CircuitOpenError(self.name, retry_in)
+
+    def record_success(self):
+        if self._state != CLOSED:
+            logger.info(f"'{self.name}' 서킷 닫힘: 시험 호출 성공")
+        self._state = CLOSED
+        self.consecutive_failures = 0
+
+    def record_failure(self):
+        self.counters['failures'] += 1
+        self.consecutive_failures += 1
+        if self._state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def record_neutral(self):
+        """결과를 판단할 수 없는 종료 (반열림 시험 자리만 반환)"""
+        if self._state == HALF_OPEN:
+            self._trials = max(0, self._trials - 1)
+
+    def _open(self):
+        if self._state != OPEN:
+            self.counters['opened'] += 1
+            logger.warning(
+                f"'{self.name}' 서킷 열림: 연속 실패 {self.consecutive_failures}회, {self.reset_timeout:.0f}초 동안 호출 중지"
+            )
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+
+    @contextlib.asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """async with 블록을 호출 하나로 보고 예외 여부로 성공/실패 기록"""
+        self.allow()
+        try:
+            yield
+        except NEUTRAL_EXCEPTIONS:
+            self.record_neutral()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        else:
+            self.record_success()
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        return {
+            'state': STATE_VALUES[state],
+            'consecutive_failures': self.consecutive_failures,
+            **self.counters
+        }
+
+class CircuitBreakerRegistry:
+    """이름별 CircuitBreaker 모음
+
+    설정은 configure()로 준 값, options_for(이름)가 돌려준 값(엔진/서버 설정 파일), 기본값 순으로 적용합니다.
+    """
+
+    def __init__(self, options_for: Optional[Callable[[str], Dict[str, Any]]] = None, **defaults):
+        self.defaults = defaults
+        self.options_for = options_for
+        self._options: Dict[str, Dict[str, Any]] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def configure(self, name: str, **options):
+        """이름별 설정 (이미 만든 브레이커는 새 설정으로 교체)"""
+        self._options[name] = options
+        self._breakers.pop(name, None)
+
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            configured = self.options_for(name) if self.options_for is not None else {}
+            breaker = self._breakers[name] = CircuitBreaker(
+                name, **{**self.defaults, **configured, **self._options.get(name, {})}
+            )
+        return breaker
+
+    def states(self) -> Dict[str, str]:
+        """이름별 상태 문자열 (화면 표시용)"""
+        return {name: breaker.state for name, breaker in list(self._breakers.items())}
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """이름별 상태 값(0 닫힘, 1 반열림, 2 열림)과 카운터"""
+        return {name: breaker.stats() for name, breaker in list(self._breakers.items())}
@@ -0,0 +1,158 @@
+"""검색 결과 중복 제거
+
+URL을 정규화해(스킴, www, 기본 포트, 끝 슬래시, 추적 파라미터, fragment) 같은 페이지를 묶고,
+URL이 달라도 요약이 거의 같은 결과는 64비트 SimHash 서명의 해밍 거리로 묶습니다.
+서명을 16비트씩 4구간으로 나눠 구간별 버킷에 넣으므로(비둘기집 원리로 거리 3 이하면
+적어도 한 구간이 같음) 결과마다 버킷의 후보 몇 개(최대 MAX_BUCKET_SIZE)만 비교해 전체 결과 수에
+선형으로 동작합니다.
+
+중복 결과는 먼저 나온 결과(엔진 순서, 순위 순) 하나로 합치고, 합쳐진 결과의 출처와 URL은
+provenance에 남깁니다. 원래 결과 객체는 캐시와 공유하므로 고치지 않고 새 객체를 만듭니다.
+"""
+import collections
+import functools
+import hashlib
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import logging
+
+import numpy as np
+
+from relevance import tokenize
+from search_models import SearchResult
+
+logger = logging.getLogger(__name__)
+
+# 정규화 시 제거하는 추적용 쿼리 파라미터 (utm_로 시작하는 파라미터도 제거)
+TRACKING_PARAMS = frozenset({
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    '_ga', '_gl', 'ref', 'ref_src', 'ref_url', 'si', 'spm'
+})
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+# 요약이 이 토큰 수보다 짧으면 근사 중복 비교를 하지 않음 ("요약 없음" 같은 값끼리 묶이지 않도록)
+MIN_SIMHASH_TOKENS = 6
+# 이 해밍 거리 이하인 SimHash 서명은 근사 중복으로 판단 (64비트 중)
+MAX_HAMMING_DISTANCE = 3
+SIMHASH_BANDS = 4
+# 구간 버킷 하나에 보관하는 최대 서명 수 (비슷한 결과가 몰려도 비교 횟수가 늘지 않도록)
+MAX_BUCKET_SIZE = 8
+_BAND_BITS = 64 // SIMHASH_BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+def canonicalize_url(url: str) -> Optional[str]:
+    """같은 페이지를 가리키는 URL을 하나의 문자열로 정규화 (URL이 아니면 None)
+
+    예: "HTTP://www.Example.com:80/a/?utm_source=x&b=2&a=1#top" → "example.com/a?a=1&b=2"
+    """
+    if not url:
+        return None
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if scheme not in DEFAULT_PORTS or not host:
+        return None
+
+    if host.startswith('www.'):
+        host = host[4:]
+    if port is not None and port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+    path = parts.path.rstrip('/')
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    ))
+    # http와 https는 같은 페이지로 취급하므로 스킴은 남기지 않음
+    return urlunsplit(('', host, path, query, '')).lstrip('/')
+
+@functools.lru_cache(maxsize=65536)
+def _token_hash(token: str) -> int:
+    """토큰의 64비트 해시 (프로세스와 무관하게 같은 값)"""
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+
+def simhash(text: str) -> Optional[int]:
+    """토큰 빈도 가중 64비트 SimHash (토큰이 MIN_SIMHASH_TOKENS보다 적으면 None)"""
+    tokens = tokenize(text)
+    if len(tokens) < MIN_SIMHASH_TOKENS:
+        return None
+    counts = collections.Counter(tokens)
+    hashes = np.fromiter((_token_hash(token) for token in counts), dtype=np.uint64, count=len(counts))
+    # (토큰 수, 64) 비트 행렬에서 비트별로 +가중치 / -가중치 합산
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+    weights = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+    signature = np.packbits(weights @ (bits.astype(np.int64) * 2 - 1) > 0, bitorder='little')
+    return int.from_bytes(signature.tobytes(), 'little')
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+class ResultDeduplicator:
+    """결과 목록을 차례로 받아 앞서 나온 결과와 중복인 항목을 합치는 상태 객체
+
+    search_all처럼 모든 결과를 한 번에 처리할 때와 search_stream처럼 엔진별 결과가
+    나눠 도착할 때 모두 쓸 수 있습니다. add()가 반환한 목록의 항목은 뒤에 도착한 중복이
+    합쳐지면 provenance가 갱신된 새 객체로 바뀝니다.
+    """
+
+    def __init__(self, max_distance: int = MAX_HAMMING_DISTANCE):
+        self.max_distance = max_distance
+        self._by_url: Dict[str, Tuple[List[SearchResult], int]] = {}
+        self._bands: List[Dict[int, List[Tuple[int, List[SearchResult], int]]]] = [{} for _ in range(SIMHASH_BANDS)]
+        self.duplicates = 0
+
+    def _find_near(self, signature: int) -> Optional[Tuple[List[SearchResult], int]]:
+        """해밍 거리 max_distance 이하인 이전 결과 위치"""
+        for band, buckets in enumerate(self._bands):
+            for other, kept, index in buckets.get((signature >> (band * _BAND_BITS)) & _BAND_MASK, ()):
+                if hamming_distance(signature, other) <= self.max_distance:
+                    return kept, index
+        return None
+
+    def add(self, results: List[SearchResult]) -> List[SearchResult]:
+        """중복을 뺀 새 목록 반환 (순서 유지, 입력 목록은 그대로)"""
+        kept: List[SearchResult] = []
+        for result in results:
+            url_key = canonicalize_url(result.url)
+            signature = simhash(f"{result.title} {result.snippet}")
+
+            match = self._by_url.get(url_key) if url_key else None
+            if match is None and signature is not None:
+                match = self._find_near(signature)
+            if match is not None:
+                self._merge(match, result)
+            else:
+                match = (kept, len(kept))
+                kept.append(result)
+            # 합쳐진 결과의 URL/서명으로도 찾을 수 있게 등록
+            self._index(url_key, signature, match)
+        return kept
+
+    def _index(self, url_key: Optional[str], signature: Optional[int], location: Tuple[List[SearchResult], int]):
+        if url_key:
+            self._by_url.setdefault(url_key, location)
+        if signature is not None:
+            for band, buckets in enumerate(self._bands):
+                bucket = buckets.setdefault((signature >> (band * _BAND_BITS)) & _BAND_MASK, [])
+                if len(bucket) < MAX_BUCKET_SIZE:
+                    bucket.append((signature, *location))
+
+    def _merge(self, location: Tuple[List[SearchResult], int], duplicate: SearchResult):
+        """먼저 나온 결과에 중복 결과의 출처를 더하고 관련도는 큰 쪽을 사용"""
+        self.duplicates += 1
+        results, index = location
+        original = results[index]
+        data = original.to_dict()
+        data['provenance'] = tuple(original.provenance) + ((duplicate.source, duplicate.url),) + tuple(duplicate.provenance)
+        data['relevance_score'] = max(original.relevance_score, duplicate.relevance_score)
+        results[index] = SearchResult.from_dict(data)
+
+def deduplicate(*result_lists: List[SearchResult]) -> List[List[SearchResult]]:
+    """여러 엔진의 결과 목록을 순서대로 중복 제거 (목록별로 반환)"""
+    deduplicator = ResultDeduplicator()
+    deduplicated = [deduplicator.add(results) for results in result_lists]
+    if deduplicator.duplicates:
+        logger.info(f"중복 결과 {deduplicator.duplicates}개 병합")
+    return deduplicated
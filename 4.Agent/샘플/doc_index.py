@@ -0,0 +1,590 @@
+"""오프라인 기술 문서 인덱스
+
+Markdown / HTML / reST 문서와 코드 예제 디렉터리를 읽어 메모리 매핑 가능한 역색인을 만들고,
+TechDocSearchEngine이 네트워크 없이 1ms 미만으로 조회할 수 있게 합니다.
+
+사용법:
+    python doc_index.py build ./docs --index-dir doc_index
+    python doc_index.py search "React hooks" --library React -k 10
+
+다시 색인할 때는 새 세대 디렉터리에 인덱스를 쓴 뒤 CURRENT.json을 원자적으로 교체합니다.
+조회 중인 프로세스가 메모리 매핑한 이전 세대는 옮기거나 지우지 않고 KEEP_GENERATIONS개까지 남겨 두므로,
+매핑 중인 파일을 지울 수 없는 Windows에서도 재색인이 실패하지 않습니다.
+
+    doc_index/
+    ├── CURRENT.json          # 현재 세대 이름
+    └── generations/<세대>/    # manifest.json, parsed.json, lexicon.json, 역색인/저장소 배열
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from collections import Counter
+from html.parser import HTMLParser
+from typing import Dict, List, Any, Optional, Tuple
+import logging
+
+import numpy as np
+
+from relevance import tokenize, DOC_FIELDS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_DIR = os.environ.get(
+    'DOC_INDEX_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'doc_index')
+)
+INDEX_VERSION = 2
+# 조회 중인 프로세스를 위해 남겨 두는 이전 세대 수
+KEEP_GENERATIONS = 2
+
+# 저장할 본문/코드 최대 길이 (문자)
+MAX_CONTENT_CHARS = 1000
+MAX_CODE_CHARS = 4000
+
+# BM25F 파라미터 (relevance.BM25FScorer와 동일)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+DOC_EXTENSIONS = {'.md': 'markdown', '.markdown': 'markdown', '.html': 'html', '.htm': 'html', '.rst': 'rst'}
+CODE_EXTENSIONS = {
+    '.py': 'python', '.js': 'javascript', '.jsx': 'javascript', '.ts': 'typescript', '.tsx': 'typescript',
+    '.java': 'java', '.go': 'go', '.rs': 'rust', '.rb': 'ruby', '.php': 'php', '.c': 'c', '.cpp': 'cpp',
+    '.cs': 'csharp', '.kt': 'kotlin', '.swift': 'swift', '.sh': 'bash', '.sql': 'sql'
+}
+
+# 인덱스 디렉터리 구성 파일
+CURRENT_FILE = 'CURRENT.json'
+GENERATIONS_DIR = 'generations'
+MANIFEST_FILE = 'manifest.json'
+PARSED_FILE = 'parsed.json'
+LEXICON_FILE = 'lexicon.json'
+POSTING_DOCS_FILE = 'postings_docs.i32'
+POSTING_TF_FILE = 'postings_tf.f32'
+STORE_FILE = 'store.bin'
+STORE_OFFSETS_FILE = 'store_offsets.u64'
+FACET_FILE = 'facets.u16'
+
+_MD_HEADING_RE = re.compile(r'^(#{1,6})\s+(.*)$')
+_MD_FENCE_RE = re.compile(r'^(```|~~~)\s*([\w+-]*)')
+_RST_UNDERLINE_RE = re.compile(r'^([=\-~^"\'`#*+])\1{2,}\s*$')
+_RST_CODE_RE = re.compile(r'^\.\.\s+(?:code-block|code|sourcecode)::\s*(\w*)')
+
+def _new_section(title: str) -> Dict[str, Any]:
+    return {'title': title, 'text': [], 'code': [], 'language': ''}
+
+def _finish_sections(sections: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """섹션 목록을 저장용 문서 dict로 변환 (본문과 코드가 모두 빈 섹션은 제외)"""
+    # 코드 언어가 없는 섹션은 같은 파일에서 처음 나온 언어를 따름
+    default_language = next((section['language'] for section in sections if section['language']), '')
+    docs = []
+    for section in sections:
+        content = ' '.join(' '.join(section['text']).split())
+        code = '\n\n'.join(block.strip('\n') for block in section['code'] if block.strip())
+        if not content and not code:
+            continue
+        docs.append({
+            'title': section['title'].strip(),
+            'content': content[:MAX_CONTENT_CHARS],
+            'code': code[:MAX_CODE_CHARS],
+            'language': section['language'] or default_language
+        })
+    return docs
+
+def parse_markdown(text: str, default_title: str) -> List[Dict[str, str]]:
+    """Markdown을 제목(#) 단위 섹션으로 분리"""
+    sections = [_new_section(default_title)]
+    fence = None
+    code_lines: List[str] = []
+    for line in text.splitlines():
+        if fence is not None:
+            if line.strip().startswith(fence):
+                sections[-1]['code'].append('\n'.join(code_lines))
+                fence = None
+            else:
+                code_lines.append(line)
+            continue
+        
+        fence_match = _MD_FENCE_RE.match(line.strip())
+        if fence_match:
+            fence = fence_match.group(1)
+            code_lines = []
+            if fence_match.group(2) and not sections[-1]['language']:
+                sections[-1]['language'] = fence_match.group(2).lower()
+            continue
+        
+        heading = _MD_HEADING_RE.match(line)
+        if heading:
+            sections.append(_new_section(heading.group(2)))
+        else:
+            sections[-1]['text'].append(line)
+    return _finish_sections(sections)
+
+def parse_rst(text: str, default_title: str) -> List[Dict[str, str]]:
+    """reST를 밑줄 제목 단위 섹션으로 분리 (code-block / :: 리터럴 블록은 코드로)"""
+    lines = text.splitlines()
+    sections = [_new_section(default_title)]
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        next_line = lines[i + 1] if i + 1 < len(lines) else ''
+        if line.strip() and _RST_UNDERLINE_RE.match(next_line) and len(next_line.strip()) >= len(line.strip()):
+            sections.append(_new_section(line.strip()))
+            i += 2
+            continue
+        
+        code_match = _RST_CODE_RE.match(line.strip())
+        if code_match or line.rstrip().endswith('::'):
+            if code_match and code_match.group(1) and not sections[-1]['language']:
+                sections[-1]['language'] = code_match.group(1).lower()
+            if not code_match:
+                sections[-1]['text'].append(line.rstrip(':'))
+            # 들여쓴 블록(빈 줄 포함)을 코드로 수집
+            i += 1
+            block = []
+            while i < len(lines) and (not lines[i].strip() or lines[i].startswith((' ', '\t'))):
+                block.append(lines[i])
+                i += 1
+            sections[-1]['code'].append('\n'.join(block))
+            continue
+        
+        if not line.startswith('..'):
+            sections[-1]['text'].append(line)
+        i += 1
+    return _finish_sections(sections)
+
+class _HTMLSectionParser(HTMLParser):
+    """h1~h3 제목 기준으로 본문과 <pre> 코드를 섹션별로 수집"""
+    
+    HEADINGS = {'h1', 'h2', 'h3'}
+    SKIP = {'script', 'style', 'nav', 'footer'}
+    
+    def __init__(self, default_title: str):
+        super().__init__(convert_charrefs=True)
+        self.sections = [_new_section(default_title)]
+        self._heading: Optional[List[str]] = None
+        self._pre: Optional[List[str]] = None
+        self._skip_depth = 0
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skip_depth += 1
+        elif tag in self.HEADINGS:
+            self._heading = []
+        elif tag == 'pre':
+            self._pre = []
+        elif tag == 'code' and self._pre is not None and not self.sections[-1]['language']:
+            classes = dict(attrs).get('class') or ''
+            match = re.search(r'language-([\w+-]+)', classes)
+            if match:
+                self.sections[-1]['language'] = match.group(1).lower()
+    
+    def handle_endtag(self, tag):
+        if tag in self.SKIP and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag in self.HEADINGS and self._heading is not None:
+            self.sections.append(_new_section(''.join(self._heading)))
+            self._heading = None
+        elif tag == 'pre' and self._pre is not None:
+            self.sections[-1]['code'].append(''.join(self._pre))
+            self._pre = None
+    
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._heading is not None:
+            self._heading.append(data)
+        elif self._pre is not None:
+            self._pre.append(data)
+        else:
+            self.sections[-1]['text'].append(data)
+
+def parse_html(text: str, default_title: str) -> List[Dict[str, str]]:
+    """HTML을 h1~h3 제목 단위 섹션으로 분리"""
+    parser = _HTMLSectionParser(default_title)
+    parser.feed(text)
+    parser.close()
+    return _finish_sections(parser.sections)
+
+def parse_code(text: str, default_title: str, language: str) -> List[Dict[str, str]]:
+    """코드 예제 파일은 파일 하나를 문서 하나로 (앞쪽 주석/docstring을 본문으로)"""
+    header = []
+    for line in text.splitlines()[:30]:
+        stripped = line.strip()
+        if stripped.startswith(('#', '//', '/*', '*', '"""', "'''")):
+            header.append(stripped.strip('#/*"\' '))
+        elif stripped and header:
+            break
+    return [{
+        'title': default_title,
+        'content': ' '.join(' '.join(header).split())[:MAX_CONTENT_CHARS],
+        'code': text[:MAX_CODE_CHARS],
+        'language': language
+    }]
+
+def parse_file(path: str, relpath: str, library: str) -> List[Dict[str, Any]]:
+    """파일 하나를 검색 문서 목록으로 변환"""
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        text = f.read()
+    
+    title = os.path.splitext(os.path.basename(path))[0]
+    if ext in CODE_EXTENSIONS:
+        docs = parse_code(text, title, CODE_EXTENSIONS[ext])
+    elif DOC_EXTENSIONS.get(ext) == 'markdown':
+        docs = parse_markdown(text, title)
+    elif DOC_EXTENSIONS.get(ext) == 'rst':
+        docs = parse_rst(text, title)
+    else:
+        docs = parse_html(text, title)
+    
+    url = relpath.replace(os.sep, '/')
+    for doc in docs:
+        doc['library'] = library
+        doc['url'] = url
+        # 필드별 토큰 빈도는 파일이 바뀔 때만 다시 계산
+        doc['terms'] = {}
+        doc['lengths'] = {}
+        for field, (keys, _) in DOC_FIELDS.items():
+            tokens = tokenize(doc.get(keys[0], ''))
+            doc['terms'][field] = dict(Counter(tokens))
+            doc['lengths'][field] = len(tokens)
+    return docs
+
+def _scan(docs_dir: str) -> Dict[str, str]:
+    """색인 대상 파일 목록 {상대 경로: 절대 경로}"""
+    files = {}
+    for root, dirnames, filenames in os.walk(docs_dir):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+        for filename in sorted(filenames):
+            ext = os.path.splitext(filename)[1].lower()
+            if ext in DOC_EXTENSIONS or ext in CODE_EXTENSIONS:
+                path = os.path.join(root, filename)
+                files[os.path.relpath(path, docs_dir)] = path
+    return files
+
+def _library_for(relpath: str, docs_dir: str, library: Optional[str]) -> str:
+    """라이브러리 이름 (지정값 > 최상위 하위 디렉터리 > 문서 디렉터리 이름)"""
+    if library:
+        return library
+    parts = relpath.split(os.sep)
+    if len(parts) > 1:
+        return parts[0]
+    return os.path.basename(os.path.abspath(docs_dir))
+
+def _file_sha1(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _load_json(path: str, default):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+def current_generation_dir(index_dir: str = DEFAULT_INDEX_DIR) -> Optional[str]:
+    """CURRENT.json이 가리키는 세대 디렉터리 (인덱스가 없으면 None)"""
+    current = _load_json(os.path.join(index_dir, CURRENT_FILE), None)
+    if not current or current.get('version') != INDEX_VERSION:
+        return None
+    return os.path.join(index_dir, GENERATIONS_DIR, current['generation'])
+
+def build_index(docs_dir: str, index_dir: str = DEFAULT_INDEX_DIR, library: Optional[str] = None,
+                full: bool = False) -> Dict[str, Any]:
+    """문서 디렉터리를 색인 (이전 인덱스가 있으면 바뀐 파일만 다시 파싱)"""
+    started_at = time.perf_counter()
+    generation_dir = None if full else current_generation_dir(index_dir)
+    previous = _load_json(os.path.join(generation_dir, PARSED_FILE), {}) if generation_dir else {}
+    manifest = _load_json(os.path.join(generation_dir, MANIFEST_FILE), {}) if generation_dir else {}
+    previous_files = manifest.get('files', {}) if manifest.get('version') == INDEX_VERSION else {}
+    
+    files = _scan(docs_dir)
+    parsed: Dict[str, Dict[str, Any]] = {}
+    file_meta: Dict[str, Dict[str, Any]] = {}
+    changed = 0
+    for relpath, path in files.items():
+        stat = os.stat(path)
+        meta = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+        old_meta = previous_files.get(relpath)
+        old_parsed = previous.get(relpath)
+        
+        if old_meta and old_parsed and old_meta['mtime_ns'] == meta['mtime_ns'] and old_meta['size'] == meta['size']:
+            meta['sha1'] = old_meta['sha1']
+        else:
+            meta['sha1'] = _file_sha1(path)
+        file_meta[relpath] = meta
+        
+        if old_parsed is not None and old_parsed.get('sha1') == meta['sha1']:
+            parsed[relpath] = old_parsed
+            continue
+        
+        changed += 1
+        try:
+            docs = parse_file(path, relpath, _library_for(relpath, docs_dir, library))
+        except Exception as e:
+            logger.warning(f"문서 파싱 실패 ({relpath}): {e}")
+            docs = []
+        parsed[relpath] = {'sha1': meta['sha1'], 'docs': docs}
+    
+    removed = len(set(previous) - set(files))
+    if not changed and not removed and previous:
+        # 바뀐 파일이 없으면 기존 인덱스를 그대로 사용
+        stats = {key: manifest[key] for key in ('docs', 'terms', 'postings')}
+    else:
+        stats = _write_index(index_dir, parsed, file_meta)
+    stats.update({
+        'files': len(files),
+        'changed_files': changed,
+        'removed_files': removed,
+        'seconds': time.perf_counter() - started_at
+    })
+    logger.info(
+        f"문서 인덱스 생성 완료: 파일 {len(files)}개 (변경 {changed}, 삭제 {removed}), "
+        f"문서 {stats['docs']}개, 용어 {stats['terms']}개, {stats['seconds']:.2f}s"
+    )
+    return stats
+
+def _write_index(index_dir: str, parsed: Dict[str, Dict[str, Any]], file_meta: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """파싱 결과로 역색인/저장소 파일을 새 세대 디렉터리에 쓰고 CURRENT.json을 원자적으로 교체"""
+    docs = [doc for relpath in sorted(parsed) for doc in parsed[relpath]['docs']]
+    doc_count = len(docs)
+    
+    # 필드별 평균 길이로 BM25F 가중 tf 미리 계산: tf' = Σ w_f * tf_f / (1 - b + b * len_f / avg_f)
+    averages = {
+        field: (sum(doc['lengths'][field] for doc in docs) / doc_count) if doc_count else 1.0
+        for field in DOC_FIELDS
+    }
+    postings: Dict[str, Dict[int, float]] = {}
+    for doc_id, doc in enumerate(docs):
+        for field, (_, weight) in DOC_FIELDS.items():
+            norm = 1.0 - BM25_B + BM25_B * doc['lengths'][field] / (averages[field] or 1.0)
+            for term, count in doc['terms'][field].items():
+                entry = postings.setdefault(term, {})
+                entry[doc_id] = entry.get(doc_id, 0.0) + weight * count / norm
+    
+    generation = time.time_ns()
+    generation_dir = os.path.join(index_dir, GENERATIONS_DIR, str(generation))
+    tmp_dir = generation_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    
+    # 역색인: 용어별 (시작 위치, 개수)와 이어 붙인 문서 번호 / 가중 tf 배열
+    lexicon = {}
+    doc_ids = np.empty(sum(len(entry) for entry in postings.values()), dtype=np.int32)
+    weights = np.empty(len(doc_ids), dtype=np.float32)
+    offset = 0
+    for term in sorted(postings):
+        entry = postings[term]
+        ids = np.fromiter(sorted(entry), dtype=np.int32, count=len(entry))
+        doc_ids[offset:offset + len(ids)] = ids
+        weights[offset:offset + len(ids)] = [entry[i] for i in ids]
+        lexicon[term] = [offset, len(ids)]
+        offset += len(ids)
+    doc_ids.tofile(os.path.join(tmp_dir, POSTING_DOCS_FILE))
+    weights.tofile(os.path.join(tmp_dir, POSTING_TF_FILE))
+    with open(os.path.join(tmp_dir, LEXICON_FILE), 'w', encoding='utf-8') as f:
+        f.write(json.dumps(lexicon, ensure_ascii=False, separators=(',', ':')))
+    
+    # 결과 표시용 저장소: 문서별 JSON을 이어 붙이고 시작 위치를 별도 배열로
+    libraries = sorted({doc['library'] for doc in docs})
+    languages = sorted({doc['language'] for doc in docs})
+    library_codes = {name: code for code, name in enumerate(libraries)}
+    language_codes = {name: code for code, name in enumerate(languages)}
+    facets = np.empty((doc_count, 2), dtype=np.uint16)
+    offsets = np.empty(doc_count + 1, dtype=np.uint64)
+    offsets[0] = 0
+    with open(os.path.join(tmp_dir, STORE_FILE), 'wb') as f:
+        for doc_id, doc in enumerate(docs):
+            stored = {key: doc[key] for key in ('title', 'url', 'content', 'code', 'library', 'language')}
+            data = json.dumps(stored, ensure_ascii=False).encode('utf-8')
+            f.write(data)
+            offsets[doc_id + 1] = offsets[doc_id] + len(data)
+            facets[doc_id] = (library_codes[doc['library']], language_codes[doc['language']])
+    offsets.tofile(os.path.join(tmp_dir, STORE_OFFSETS_FILE))
+    facets.tofile(os.path.join(tmp_dir, FACET_FILE))
+    
+    with open(os.path.join(tmp_dir, PARSED_FILE), 'w', encoding='utf-8') as f:
+        f.write(json.dumps(parsed, ensure_ascii=False, separators=(',', ':')))
+    
+    manifest = {
+        'version': INDEX_VERSION,
+        'generation': generation,
+        'docs': doc_count,
+        'terms': len(lexicon),
+        'postings': int(offset),
+        'libraries': libraries,
+        'languages': languages,
+        'files': file_meta
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        f.write(json.dumps(manifest, ensure_ascii=False))
+    
+    # 완성된 세대를 CURRENT.json으로 가리킴 (조회 중인 프로세스는 CURRENT.json 변경으로 감지)
+    os.replace(tmp_dir, generation_dir)
+    current_path = os.path.join(index_dir, CURRENT_FILE)
+    with open(current_path + '.tmp', 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'version': INDEX_VERSION, 'generation': str(generation)}))
+    os.replace(current_path + '.tmp', current_path)
+    _remove_old_generations(index_dir, str(generation))
+    
+    return {'docs': doc_count, 'terms': len(lexicon), 'postings': int(offset)}
+
+def _remove_old_generations(index_dir: str, keep: str):
+    """최근 KEEP_GENERATIONS개를 제외한 세대 삭제
+
+    아직 매핑 중인 파일은 POSIX에서는 삭제 후에도 유효하고, Windows에서는 삭제에 실패하면
+    남겨 두었다가 다음 재색인 때 다시 지웁니다.
+    """
+    generations_dir = os.path.join(index_dir, GENERATIONS_DIR)
+    names = sorted((name for name in os.listdir(generations_dir) if name.isdigit()), key=int)
+    for name in names[:-KEEP_GENERATIONS]:
+        if name == keep:
+            continue
+        shutil.rmtree(os.path.join(generations_dir, name), ignore_errors=True)
+        if os.path.exists(os.path.join(generations_dir, name)):
+            logger.info(f"사용 중인 이전 문서 인덱스 세대는 다음 재색인 때 삭제: {name}")
+
+def _memmap(path: str, dtype) -> np.ndarray:
+    """빈 파일도 다룰 수 있는 읽기 전용 메모리 매핑"""
+    if os.path.getsize(path) == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r')
+
+class DocIndex:
+    """메모리 매핑된 기술 문서 인덱스 (읽기 전용)"""
+    
+    def __init__(self, index_dir: str = DEFAULT_INDEX_DIR):
+        self.index_dir = index_dir
+        generation_dir = current_generation_dir(index_dir)
+        if generation_dir is None:
+            raise FileNotFoundError(f"문서 인덱스가 없습니다: {index_dir}")
+        self.generation_dir = generation_dir
+        with open(os.path.join(generation_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        with open(os.path.join(generation_dir, LEXICON_FILE), 'r', encoding='utf-8') as f:
+            self.lexicon: Dict[str, List[int]] = json.load(f)
+        
+        self.generation = self.manifest['generation']
+        self.size = self.manifest['docs']
+        self.libraries = self.manifest['libraries']
+        self.languages = self.manifest['languages']
+        self.doc_ids = _memmap(os.path.join(generation_dir, POSTING_DOCS_FILE), np.int32)
+        self.weights = _memmap(os.path.join(generation_dir, POSTING_TF_FILE), np.float32)
+        self.offsets = _memmap(os.path.join(generation_dir, STORE_OFFSETS_FILE), np.uint64)
+        self.facets = _memmap(os.path.join(generation_dir, FACET_FILE), np.uint16).reshape(-1, 2)
+        self.store = _memmap(os.path.join(generation_dir, STORE_FILE), np.uint8)
+    
+    @staticmethod
+    def exists(index_dir: str = DEFAULT_INDEX_DIR) -> bool:
+        return current_generation_dir(index_dir) is not None
+    
+    @staticmethod
+    def manifest_stamp(index_dir: str = DEFAULT_INDEX_DIR) -> Optional[Tuple[int, int]]:
+        """CURRENT.json의 (inode, mtime) - 인덱스 재생성 감지용 (없으면 None)"""
+        try:
+            stat = os.stat(os.path.join(index_dir, CURRENT_FILE))
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+    
+    def _facet_mask(self, library: Optional[str], language: Optional[str]) -> Optional[np.ndarray]:
+        """library / language 필터 마스크 (필터가 없으면 None)"""
+        mask = None
+        for column, value, names in ((0, library, self.libraries), (1, language, self.languages)):
+            if not value:
+                continue
+            matches = [code for code, name in enumerate(names) if name.lower() == value.lower()]
+            column_mask = np.isin(self.facets[:, column], matches)
+            mask = column_mask if mask is None else mask & column_mask
+        return mask
+    
+    def _load_doc(self, doc_id: int) -> Dict[str, Any]:
+        start, end = int(self.offsets[doc_id]), int(self.offsets[doc_id + 1])
+        return json.loads(self.store[start:end].tobytes())
+    
+    def search(self, query: str, max_results: int = 100, library: Optional[str] = None,
+               language: Optional[str] = None) -> List[Dict[str, Any]]:
+        """BM25F 상위 max_results개 문서 (relevance_score는 0~1로 정규화)"""
+        terms = [term for term in dict.fromkeys(tokenize(query)) if term in self.lexicon]
+        if not terms or not self.size:
+            return []
+        
+        scores = np.zeros(self.size, dtype=np.float32)
+        idf_sum = 0.0
+        for term in terms:
+            start, count = self.lexicon[term]
+            idf = float(np.log1p((self.size - count + 0.5) / (count + 0.5)))
+            idf_sum += idf
+            tf = self.weights[start:start + count]
+            scores[self.doc_ids[start:start + count]] += idf * tf / (BM25_K1 + tf)
+        
+        mask = self._facet_mask(library, language)
+        if mask is not None:
+            scores[~mask] = 0.0
+        
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > max_results:
+            top = np.argpartition(scores[candidates], -max_results)[-max_results:]
+            candidates = candidates[top]
+        ranked = candidates[np.argsort(-scores[candidates], kind='stable')]
+        
+        results = []
+        for doc_id in ranked:
+            doc = self._load_doc(int(doc_id))
+            doc['relevance_score'] = round(float(scores[doc_id]) / idf_sum, 4)
+            results.append(doc)
+        return results
+    
+    def close(self):
+        """메모리 매핑 해제"""
+        for name in ('doc_ids', 'weights', 'offsets', 'facets', 'store'):
+            array = getattr(self, name)
+            if isinstance(array, np.memmap):
+                array._mmap.close()
+        self.doc_ids = self.weights = self.offsets = self.facets = self.store = None
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="오프라인 기술 문서 인덱스")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    build_parser = subparsers.add_parser('build', help="문서 디렉터리 색인 (변경된 파일만 다시 처리)")
+    build_parser.add_argument('docs_dir', help="Markdown/HTML/reST 문서와 코드 예제 디렉터리")
+    build_parser.add_argument('--index-dir', default=DEFAULT_INDEX_DIR)
+    build_parser.add_argument('--library', help="모든 문서에 지정할 라이브러리 이름 (기본: 최상위 하위 디렉터리 이름)")
+    build_parser.add_argument('--full', action='store_true', help="이전 인덱스를 무시하고 전체 재색인")
+    
+    search_parser = subparsers.add_parser('search', help="인덱스 검색")
+    search_parser.add_argument('query')
+    search_parser.add_argument('--index-dir', default=DEFAULT_INDEX_DIR)
+    search_parser.add_argument('--library')
+    search_parser.add_argument('--language')
+    search_parser.add_argument('-k', type=int, default=10)
+    
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    
+    if args.command == 'build':
+        stats = build_index(args.docs_dir, args.index_dir, args.library, args.full)
+        print(json.dumps(stats, ensure_ascii=False, indent=2))
+        return
+    
+    index = DocIndex(args.index_dir)
+    started_at = time.perf_counter()
+    results = index.search(args.query, args.k, args.library, args.language)
+    elapsed_ms = (time.perf_counter() - started_at) * 1000
+    for rank, result in enumerate(results, 1):
+        print(f"{rank:3d}. [{result['relevance_score']:.3f}] {result['title']} "
+              f"({result['library']}/{result['language']}) {result['url']}")
+    print(f"{len(results)}개 결과, {elapsed_ms:.3f}ms", file=sys.stderr)
+    index.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""검색 엔진 레지스트리
+
+mcp_config.json의 searchEngines 항목으로 검색 엔진을 구성합니다. 엔진 객체는 처음 쓰일 때 만들고,
+idle_timeout(초) 동안 쓰이지 않으면 닫아 메모리를 돌려준 뒤 다음 검색 때 다시 만듭니다.
+레지스트리를 만들거나 모듈을 임포트하는 것만으로는 설정 파일을 읽지 않습니다.
+
+    "searchEngines": {
+        "web": {"type": "duckduckgo"},
+        "docs": {"type": "docs", "idle_timeout": 900},
+        "ddg_mcp": {"type": "mcp", "server": "ddg_search", "source": "웹 검색"}
+    }
+
+"type"은 register_engine_type()으로 등록한 엔진 유형 이름이고, 레지스트리 설정(REGISTRY_KEYS)을
+뺀 나머지 항목은 엔진 생성자에 키워드 인자로 전달됩니다. "circuit_breaker"는 SearchAggregator가
+엔진별 서킷 브레이커 설정으로 읽습니다. web / docs 항목이 없으면 기본 구성(DEFAULT_ENGINES)을 사용합니다.
+"""
+import asyncio
+import contextlib
+import json
+import time
+from typing import Dict, List, Any, Callable, Optional, AsyncIterator
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG_PATH = "mcp_config.json"
+# 엔진 유휴 종료 기본 시간 (초, 0이면 종료하지 않음. 엔진 설정의 idle_timeout으로 변경 가능)
+DEFAULT_ENGINE_IDLE_TIMEOUT = 600.0
+# searchEngines 항목이 없거나 일부만 있을 때 사용하는 기본 구성
+DEFAULT_ENGINES: Dict[str, Dict[str, Any]] = {
+    'web': {'type': 'duckduckgo'},
+    'docs': {'type': 'docs'}
+}
+
+# 엔진 생성자에 전달하지 않는 설정 항목
+REGISTRY_KEYS = ('type', 'idle_timeout', 'circuit_breaker')
+
+# 엔진 유형 이름 → 엔진 생성 함수
+ENGINE_TYPES: Dict[str, Callable[..., Any]] = {}
+
+def register_engine_type(type_name: str, factory: Callable[..., Any]):
+    """설정의 "type"으로 쓸 수 있는 엔진 유형 등록"""
+    ENGINE_TYPES[type_name] = factory
+
+class EngineSlot:
+    """레지스트리에 등록된 엔진 하나 (처음 쓰이기 전에는 설정만 보관)"""
+
+    def __init__(self, name: str, config: Dict[str, Any]):
+        self.name = name
+        self.config = config
+        self.idle_timeout = float(config.get('idle_timeout', DEFAULT_ENGINE_IDLE_TIMEOUT))
+        self.engine: Any = None
+        self.in_flight = 0
+        self.loads = 0
+        self.last_used = time.monotonic()
+
+class EngineRegistry:
+    """설정 기반 지연 로딩 검색 엔진 레지스트리"""
+
+    def __init__(self, config_path: str = DEFAULT_CONFIG_PATH, engines: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.config_path = config_path
+        self._engine_configs = engines
+        self._slots: Optional[Dict[str, EngineSlot]] = None
+        self._reaper_task: Optional[asyncio.Task] = None
+
+    def _load_config(self) -> Dict[str, Dict[str, Any]]:
+        """searchEngines 설정 로드 (없으면 기본 구성)"""
+        try:
+            with open(self.config_path, 'r', encoding='utf-8') as f:
+                configured = json.load(f).get('searchEngines') or {}
+        except FileNotFoundError:
+            configured = {}
+        except Exception as e:
+            logger.error(f"검색 엔진 설정 로드 실패: {e}")
+            configured = {}
+        engines = {**DEFAULT_ENGINES, **configured}
+        logger.info(f"검색 엔진 설정 로드 완료: {', '.join(engines)}")
+        return engines
+
+    @property
+    def slots(self) -> Dict[str, EngineSlot]:
+        """엔진 이름 → EngineSlot (처음 접근할 때 설정을 읽음)"""
+        if self._slots is None:
+            configs = self._engine_configs if self._engine_configs is not None else self._load_config()
+            self._slots = {name: EngineSlot(name, dict(config)) for name, config in configs.items()}
+        return self._slots
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.slots)
+
+    def get(self, name: str) -> Any:
+        """엔진 반환 (처음 쓰일 때 생성)"""
+        slot = self.slots.get(name)
+        if slot is None:
+            raise KeyError(f"등록되지 않은 검색 엔진: {name}")
+
+        if slot.engine is None:
+            type_name = slot.config.get('type')
+            factory = ENGINE_TYPES.get(type_name)
+            if factory is None:
+                raise ValueError(f"검색 엔진 '{name}'의 유형을 알 수 없습니다: {type_name}")
+            options = {key: value for key, value in slot.config.items() if key not in REGISTRY_KEYS}
+            started_at = time.perf_counter()
+            slot.engine = factory(**options)
+            slot.loads += 1
+            slot.last_used = time.monotonic()
+            logger.info(f"검색 엔진 '{name}' 로드 ({type_name}, {time.perf_counter() - started_at:.3f}s)")
+        return slot.engine
+
+    @contextlib.asynccontextmanager
+    async def use(self, name: str) -> AsyncIterator[Any]:
+        """엔진을 빌려 쓰는 동안은 유휴 종료 대상에서 제외"""
+        engine = self.get(name)
+        slot = self.slots[name]
+        slot.in_flight += 1
+        self._ensure_reaper()
+        try:
+            yield engine
+        finally:
+            slot.in_flight -= 1
+            slot.last_used = time.monotonic()
+
+    def _ensure_reaper(self):
+        """유휴 엔진 정리 태스크를 현재 이벤트 루프에서 실행"""
+        if self._reaper_task is not None and not self._reaper_task.done():
+            return
+        timeouts = [slot.idle_timeout for slot in self.slots.values() if slot.idle_timeout > 0]
+        if timeouts:
+            self._reaper_task = asyncio.ensure_future(self._reap_idle_engines(min(timeouts)))
+
+    async def _reap_idle_engines(self, idle_timeout: float):
+        interval = max(1.0, idle_timeout / 2)
+        while any(slot.engine is not None for slot in self.slots.values()):
+            await asyncio.sleep(interval)
+            await self.close_idle()
+
+    async def close_idle(self) -> List[str]:
+        """idle_timeout 동안 쓰이지 않은 엔진을 닫고 이름 목록 반환"""
+        now = time.monotonic()
+        idle = [
+            slot for slot in self.slots.values()
+            if slot.engine is not None and slot.idle_timeout > 0 and slot.in_flight == 0
+            and now - slot.last_used >= slot.idle_timeout
+        ]
+        for slot in idle:
+            logger.info(f"검색 엔진 '{slot.name}' 유휴 종료 ({now - slot.last_used:.0f}s 미사용)")
+            await self._close_engine(slot)
+        return [slot.name for slot in idle]
+
+    async def _close_engine(self, slot: EngineSlot):
+        """엔진의 aclose()가 있으면 호출하고 객체를 버림"""
+        engine, slot.engine = slot.engine, None
+        close = getattr(engine, 'aclose', None)
+        if close is not None:
+            try:
+                await close()
+            except Exception as e:
+                logger.warning(f"검색 엔진 '{slot.name}' 종료 실패: {e}")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """엔진별 로드 여부, 진행 중 검색 수, 로드 횟수 (설정을 읽기 전이면 빈 dict)"""
+        if self._slots is None:
+            return {}
+        now = time.monotonic()
+        return {
+            name: {
+                'type': slot.config.get('type'),
+                'loaded': slot.engine is not None,
+                'in_flight': slot.in_flight,
+                'loads': slot.loads,
+                'idle_seconds': now - slot.last_used if slot.engine is not None else None
+            }
+            for name, slot in self._slots.items()
+        }
+
+    async def aclose(self):
+        """정리 태스크를 멈추고 로드된 엔진을 모두 닫음"""
+        if self._reaper_task is not None:
+            self._reaper_task.cancel()
+            await asyncio.gather(self._reaper_task, return_exceptions=True)
+            self._reaper_task = None
+        if self._slots is not None:
+            for slot in self._slots.values():
+                if slot.engine is not None:
+                    await self._close_engine(slot)
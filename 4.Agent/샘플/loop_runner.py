@@ -0,0 +1,152 @@
+import asyncio
+import atexit
+import concurrent.futures
+import inspect
+import queue
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 종료 시 정리 작업과 남은 작업 취소에 기다리는 최대 시간 (초)
+DEFAULT_SHUTDOWN_TIMEOUT = 10.0
+
+# 비동기 제너레이터 → 동기 이터레이터 전달용 표식
+_DONE = object()
+
+class _Raised:
+    """비동기 제너레이터에서 발생한 예외를 소비 쪽 스레드로 전달"""
+    
+    __slots__ = ('error',)
+    
+    def __init__(self, error: BaseException):
+        self.error = error
+
+class BackgroundLoop:
+    """전용 스레드에서 계속 도는 이벤트 루프
+
+    Streamlit처럼 스크립트가 매번 다시 실행되는 환경에서 연결 풀, MCP 서버 파이프,
+    캐시 갱신 작업을 하나의 루프에 묶어 프로세스가 끝날 때까지 재사용합니다.
+    다른 스레드에서는 submit() / run() / iterate()로 코루틴을 넘깁니다.
+    """
+    
+    def __init__(self, name: str = "background-loop"):
+        self.name = name
+        self.loop = asyncio.new_event_loop()
+        self._shutdown_hooks: List[Callable[[], Any]] = []
+        self._started = threading.Event()
+        self._stopped = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+    
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive() and not self._stopped
+    
+    def start(self) -> "BackgroundLoop":
+        """루프 스레드 시작 (루프가 돌기 시작할 때까지 대기)"""
+        self._thread.start()
+        self._started.wait()
+        logger.info(f"백그라운드 이벤트 루프 시작: {self.name}")
+        return self
+    
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._started.set)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+    
+    def add_shutdown_hook(self, hook: Callable[[], Any]):
+        """종료 시 루프 위에서 실행할 정리 함수 등록 (일반 함수 또는 코루틴 함수)"""
+        self._shutdown_hooks.append(hook)
+    
+    def submit(self, coro: Awaitable[Any]) -> concurrent.futures.Future:
+        """코루틴을 루프에 넘기고 스레드 안전한 Future 반환"""
+        if not self.running:
+            raise RuntimeError(f"이벤트 루프가 실행 중이 아닙니다: {self.name}")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+    
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """코루틴을 루프에서 실행하고 결과를 기다림 (시간 초과 시 작업 취소)"""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            # 시간 초과나 호출 측 중단 시 루프의 작업도 함께 취소
+            future.cancel()
+            raise
+    
+    def iterate(self, agen: AsyncIterator[Any]) -> Iterator[Any]:
+        """비동기 제너레이터를 루프에서 돌리며 항목을 호출 스레드에 차례로 전달
+
+        호출 측이 중간에 반복을 멈추면(예: Streamlit 재실행) 루프 쪽 작업도 취소합니다.
+        """
+        items: "queue.Queue[Any]" = queue.Queue()
+        
+        async def pump():
+            try:
+                async for item in agen:
+                    items.put(item)
+            except Exception as e:
+                items.put(_Raised(e))
+            finally:
+                items.put(_DONE)
+        
+        future = self.submit(pump())
+        try:
+            while True:
+                item = items.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, _Raised):
+                    raise item.error
+                yield item
+        finally:
+            if not future.done():
+                future.cancel()
+    
+    def stop(self, timeout: float = DEFAULT_SHUTDOWN_TIMEOUT):
+        """정리 함수 실행 → 남은 작업 취소 → 루프 종료 → 스레드 join"""
+        with self._lock:
+            if self._stopped or not self._thread.is_alive():
+                self._stopped = True
+                return
+            self._stopped = True
+        
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"백그라운드 루프 정리 중 오류: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        logger.info(f"백그라운드 이벤트 루프 종료: {self.name}")
+    
+    async def _shutdown(self):
+        # 진행 중인 검색을 먼저 취소해야 닫힌 연결을 쓰는 작업이 남지 않음
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        for hook in reversed(self._shutdown_hooks):
+            try:
+                result = hook()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"종료 정리 함수 실패 ({getattr(hook, '__qualname__', hook)}): {e}")
+        await self.loop.shutdown_asyncgens()
+
+def start_background_loop(name: str = "background-loop", shutdown_hooks: Optional[List[Callable[[], Any]]] = None) -> BackgroundLoop:
+    """루프를 시작하고 프로세스 종료 시 자동으로 정리되도록 등록"""
+    runner = BackgroundLoop(name)
+    for hook in shutdown_hooks or []:
+        runner.add_shutdown_hook(hook)
+    runner.start()
+    atexit.register(runner.stop)
+    return runner
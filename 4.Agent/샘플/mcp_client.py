@@ -1,154 +1,227 @@
 import asyncio
 import json
-import subprocess
-import sys
-from typing import Dict, List, Any, Optional
-import aiohttp
+import time
+from typing import Dict, List, Any, Optional, Tuple
 import logging
 
-# 로깅 설정
-logging.basicConfig(level=logging.INFO)
+from circuit_breaker import CircuitBreakerRegistry, CircuitOpenError
+from mcp_pool import MCPWorkerPool
+from metrics import metrics_registry
+
 logger = logging.getLogger(__name__)
 
+# 서버 유휴 종료 기본 시간 (초, 0이면 종료하지 않음. mcp_config.json의 idle_shutdown으로 변경 가능)
+DEFAULT_IDLE_SHUTDOWN = 600.0
+
+class MCPServerUnavailable(Exception):
+    """서버 워커 풀을 시작할 수 없음"""
+
 class MCPClient:
-    """MCP (Model Context Protocol) 클라이언트"""
+    """MCP (Model Context Protocol) 클라이언트
+    
+    설정 파일은 처음 필요할 때 읽고, 서버는 처음 요청할 때 시작합니다(start_all로 미리 시작 가능).
+    idle_shutdown(초) 동안 요청이 없던 서버는 종료했다가 다음 요청 때 다시 시작합니다.
+    
+    요청은 서버별 서킷 브레이커(서버 설정의 circuit_breaker 항목)를 거칩니다. 시작 실패나 요청
+    실패가 이어져 서킷이 열리면 서버를 다시 띄우거나 타임아웃을 기다리지 않고 바로 None을 반환합니다.
+    """
     
     def __init__(self, config_path: str = "mcp_config.json"):
         self.config_path = config_path
-        self.servers = {}
-        self.processes = {}
-        self.load_config()
+        self._servers: Optional[Dict[str, Dict[str, Any]]] = None
+        self.pools: Dict[str, MCPWorkerPool] = {}
+        self.startup_timings: Dict[str, Dict[str, Any]] = {}
+        self.last_start_all_seconds: Optional[float] = None
+        self.last_used: Dict[str, float] = {}
+        self._starting: Dict[str, asyncio.Task] = {}
+        self._reaper_task: Optional[asyncio.Task] = None
+        self.breakers = CircuitBreakerRegistry(
+            options_for=lambda name: dict(self.servers.get(name, {}).get('circuit_breaker') or {})
+        )
+    
+    @property
+    def servers(self) -> Dict[str, Dict[str, Any]]:
+        """서버 이름 → 서버 설정 (처음 접근할 때 설정 파일을 읽음)"""
+        if self._servers is None:
+            self.load_config()
+        return self._servers
     
     def load_config(self):
         """MCP 서버 설정 로드"""
         try:
             with open(self.config_path, 'r', encoding='utf-8') as f:
                 config = json.load(f)
-                self.servers = config.get('mcpServers', {})
-                logger.info(f"MCP 설정 로드 완료: {len(self.servers)}개 서버")
+                self._servers = config.get('mcpServers', {})
+                logger.info(f"MCP 설정 로드 완료: {len(self._servers)}개 서버")
         except Exception as e:
             logger.error(f"설정 파일 로드 실패: {e}")
-            self.servers = {}
+            self._servers = {}
     
-    async def start_server(self, server_name: str) -> bool:
-        """MCP 서버 시작"""
+    async def start_server(self, server_name: str, timeout: Optional[float] = None) -> bool:
+        """MCP 서버 워커 풀 시작 (initialize 응답 수신 시 준비 완료로 판단)"""
         if server_name not in self.servers:
             logger.error(f"서버 '{server_name}' 설정을 찾을 수 없습니다")
             return False
         
+        pool = MCPWorkerPool(server_name, self.servers[server_name])
         try:
-            server_config = self.servers[server_name]
-            command = server_config['command']
-            args = server_config['args']
-            
-            # Windows 환경에서 올바른 명령어 구성
-            if command == "cmd":
-                # cmd /c npx ... 형태로 실행
-                full_command = [command] + args
-            else:
-                # npx ... 형태로 직접 실행
-                full_command = [command] + args
-            
-            logger.info(f"서버 '{server_name}' 실행 명령어: {' '.join(full_command)}")
-            
-            # 서버 프로세스 시작
-            process = await asyncio.create_subprocess_exec(
-                *full_command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                stdin=asyncio.subprocess.PIPE,
-                text=True
-            )
-            
-            # 서버가 정상적으로 시작되었는지 확인
-            await asyncio.sleep(2)  # 서버 초기화 대기
-            
-            if process.returncode is not None:
-                # 프로세스가 즉시 종료된 경우
-                stderr_output = await process.stderr.read()
-                logger.error(f"서버 '{server_name}' 즉시 종료됨. 오류: {stderr_output}")
-                return False
-            
-            self.processes[server_name] = process
-            logger.info(f"MCP 서버 '{server_name}' 시작됨 (PID: {process.pid})")
-            return True
-            
+            ready = await pool.start(timeout)
         except Exception as e:
             logger.error(f"서버 '{server_name}' 시작 실패: {e}")
+            ready = False
+        
+        self.startup_timings[server_name] = pool.startup_timings
+        if not ready:
+            await pool.stop()
             return False
+        
+        self.pools[server_name] = pool
+        self.last_used[server_name] = time.monotonic()
+        self._ensure_reaper()
+        logger.info(
+            f"MCP 서버 '{server_name}' 시작됨 (워커 {pool.size}/{pool.pool_size}, "
+            f"{pool.startup_timings['total']:.3f}s)"
+        )
+        return True
+    
+    async def start_all(self, server_names: Optional[List[str]] = None, timeout: Optional[float] = None) -> Dict[str, bool]:
+        """설정된 모든 서버를 동시에 시작 (가장 느린 서버만큼만 소요)"""
+        names = [name for name in (server_names or self.servers) if name not in self.pools]
+        started_at = time.perf_counter()
+        
+        results = await asyncio.gather(
+            *(self.start_server(name, timeout) for name in names)
+        )
+        
+        self.last_start_all_seconds = time.perf_counter() - started_at
+        ready = dict(zip(names, results))
+        logger.info(
+            f"MCP 서버 일괄 시작 완료: {sum(ready.values())}/{len(ready)}개 준비 "
+            f"({self.last_start_all_seconds:.3f}s)"
+        )
+        return ready
+    
+    async def ensure_server(self, server_name: str) -> Optional[MCPWorkerPool]:
+        """실행 중인 워커 풀 반환 (없으면 시작, 동시에 호출해도 한 번만 시작)"""
+        pool = self.pools.get(server_name)
+        if pool is None:
+            task = self._starting.get(server_name)
+            if task is None:
+                task = asyncio.ensure_future(self.start_server(server_name))
+                self._starting[server_name] = task
+                task.add_done_callback(lambda _: self._starting.pop(server_name, None))
+            # 기다리던 호출자가 취소되어도 시작 작업은 계속 진행
+            if not await asyncio.shield(task):
+                return None
+            pool = self.pools.get(server_name)
+            if pool is None:
+                return None
+        self.last_used[server_name] = time.monotonic()
+        return pool
+    
+    def _idle_shutdown(self, server_name: str) -> float:
+        return float(self.servers.get(server_name, {}).get('idle_shutdown', DEFAULT_IDLE_SHUTDOWN))
+    
+    def _ensure_reaper(self):
+        """유휴 서버 정리 태스크를 현재 이벤트 루프에서 실행"""
+        if self._reaper_task is not None and not self._reaper_task.done():
+            return
+        timeouts = [self._idle_shutdown(name) for name in self.pools if self._idle_shutdown(name) > 0]
+        if timeouts:
+            self._reaper_task = asyncio.ensure_future(self._reap_idle_servers(min(timeouts)))
+    
+    async def _reap_idle_servers(self, idle_shutdown: float):
+        """idle_shutdown 동안 요청이 없던 서버 종료 (다음 요청 때 다시 시작)"""
+        interval = max(1.0, idle_shutdown / 2)
+        while self.pools:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            for server_name, pool in list(self.pools.items()):
+                timeout = self._idle_shutdown(server_name)
+                idle_seconds = now - self.last_used.get(server_name, now)
+                if timeout > 0 and pool.in_flight == 0 and idle_seconds >= timeout:
+                    logger.info(f"MCP 서버 '{server_name}' 유휴 종료 ({idle_seconds:.0f}s 미사용)")
+                    await self.stop_server(server_name)
+    
+    def get_startup_timings(self) -> Dict[str, Any]:
+        """서버별 시작 소요 시간 (spawn / initialize / total, 초 단위)"""
+        return {
+            'servers': {name: dict(timings) for name, timings in self.startup_timings.items()},
+            'start_all_seconds': self.last_start_all_seconds
+        }
+    
+    @property
+    def processes(self) -> Dict[str, List[asyncio.subprocess.Process]]:
+        """서버별 실행 중인 워커 프로세스 목록"""
+        return {name: pool.processes for name, pool in self.pools.items()}
+    
+    def get_pool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """서버별 워커 풀 상태"""
+        return {name: pool.stats() for name, pool in self.pools.items()}
     
     async def stop_server(self, server_name: str):
         """MCP 서버 중지"""
-        if server_name in self.processes:
-            process = self.processes[server_name]
-            process.terminate()
-            await process.wait()
-            del self.processes[server_name]
+        pool = self.pools.pop(server_name, None)
+        if pool is not None:
+            await pool.stop()
             logger.info(f"MCP 서버 '{server_name}' 중지됨")
     
     async def send_request(self, server_name: str, method: str, params: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
-        """MCP 서버에 요청 전송"""
-        if server_name not in self.processes:
-            logger.error(f"서버 '{server_name}'가 실행되지 않았습니다")
-            return None
+        """MCP 서버에 요청 전송 (서버가 없으면 시작, 가장 한가한 워커의 세션 사용)
         
+        실패하거나 서킷이 열려 있으면 None을 반환합니다.
+        """
         try:
-            process = self.processes[server_name]
-            
-            # MCP 초기화 요청
-            init_request = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "initialize",
-                "params": {
-                    "protocolVersion": "2024-11-05",
-                    "capabilities": {
-                        "roots": {
-                            "listChanged": True
-                        },
-                        "sampling": {}
-                    },
-                    "clientInfo": {
-                        "name": "streamlit-search-agent",
-                        "version": "1.0.0"
-                    }
-                }
-            }
-            
-            # 초기화 요청 전송
-            init_json = json.dumps(init_request) + "\n"
-            process.stdin.write(init_json.encode())
-            await process.stdin.drain()
-            
-            # 초기화 응답 읽기
-            init_response = await process.stdout.readline()
-            if init_response:
-                init_result = json.loads(init_response.decode().strip())
-                logger.info(f"서버 '{server_name}' 초기화 완료")
-            
-            # 실제 요청 전송
-            request = {
-                "jsonrpc": "2.0",
-                "id": 2,
-                "method": method,
-                "params": params or {}
-            }
-            
-            request_json = json.dumps(request) + "\n"
-            process.stdin.write(request_json.encode())
-            await process.stdin.drain()
-            
-            # 응답 읽기
-            response_line = await process.stdout.readline()
-            if response_line:
-                response = json.loads(response_line.decode().strip())
-                return response
-            
+            async with self.breakers.get(server_name).guard():
+                pool = await self._ensure_pool(server_name)
+                try:
+                    # 초기화는 워커당 한 번만 수행되고, 응답은 요청 id로 매칭됨
+                    return await pool.request(method, params)
+                finally:
+                    self.last_used[server_name] = time.monotonic()
+        except CircuitOpenError as e:
+            logger.debug(f"서버 '{server_name}' 요청 생략: {e}")
+            return None
         except Exception as e:
             logger.error(f"서버 '{server_name}' 요청 실패: {e}")
             return None
+    
+    async def send_batch(self, server_name: str, calls: List[Tuple[str, Optional[Dict[str, Any]]]]) -> List[Optional[Dict[str, Any]]]:
+        """여러 요청을 한 번에 전송 (서버 설정에 "batch": true면 JSON-RPC 배치 배열 사용)
         
-        return None
+        응답은 요청 순서대로 반환하며, 전송에 실패하면 모든 자리가 None입니다.
+        """
+        try:
+            async with self.breakers.get(server_name).guard():
+                pool = await self._ensure_pool(server_name)
+                try:
+                    return await pool.request_batch(calls)
+                finally:
+                    self.last_used[server_name] = time.monotonic()
+        except CircuitOpenError as e:
+            logger.debug(f"서버 '{server_name}' 배치 요청 생략: {e}")
+            return [None] * len(calls)
+        except Exception as e:
+            logger.error(f"서버 '{server_name}' 배치 요청 실패: {e}")
+            return [None] * len(calls)
+    
+    async def _ensure_pool(self, server_name: str) -> MCPWorkerPool:
+        """ensure_server()와 같지만 시작할 수 없으면 MCPServerUnavailable (서킷 실패로 기록되도록)"""
+        pool = await self.ensure_server(server_name)
+        if pool is None:
+            raise MCPServerUnavailable(f"서버 '{server_name}'를 시작할 수 없습니다")
+        return pool
+    
+    async def search_batch(self, server_name: str, queries: List[str], max_results: int = 10) -> List[List[Dict[str, Any]]]:
+        """여러 검색어를 한 번에 검색 (검색어 순서대로 결과 목록 반환)"""
+        responses = await self.send_batch(
+            server_name,
+            [("search", {"query": query, "max_results": max_results}) for query in queries]
+        )
+        return [
+            response["result"] if response and "result" in response else []
+            for response in responses
+        ]
     
     async def search_web(self, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
         """DuckDuckGo를 통한 웹 검색"""
@@ -190,8 +263,14 @@ class MCPClient:
     
     async def cleanup(self):
         """모든 서버 정리"""
-        for server_name in list(self.processes.keys()):
+        if self._reaper_task is not None:
+            self._reaper_task.cancel()
+            await asyncio.gather(self._reaper_task, return_exceptions=True)
+            self._reaper_task = None
+        for server_name in list(self.pools.keys()):
             await self.stop_server(server_name)
 
-# 전역 MCP 클라이언트 인스턴스
+# 전역 MCP 클라이언트 인스턴스 (설정은 처음 쓰일 때 로드)
 mcp_client = MCPClient()
+metrics_registry.register_collector('mcp_pool', mcp_client.get_pool_stats, label='server')
+metrics_registry.register_collector('mcp_circuit', mcp_client.breakers.stats, label='server')
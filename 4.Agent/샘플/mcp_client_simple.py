@@ -6,110 +6,166 @@ from typing import Dict, List, Any, Optional
 import logging
 import aiohttp
 
-# 로깅 설정
-logging.basicConfig(level=logging.INFO)
+from metrics import metrics_registry
+from rate_limit import RateLimiter, RateLimitError
+
 logger = logging.getLogger(__name__)
 
+# HTTP 연결 풀 설정
+CONNECTION_LIMIT = 100           # 전체 동시 연결 수
+CONNECTION_LIMIT_PER_HOST = 10   # 호스트별 동시 연결 수
+KEEPALIVE_TIMEOUT = 30           # 유휴 연결 유지 시간 (초)
+DNS_CACHE_TTL = 300              # DNS 캐시 유지 시간 (초)
+REQUEST_TIMEOUT = 10             # 요청 전체 타임아웃 (초)
+
+class WebSearchError(Exception):
+    """DuckDuckGo API 오류 응답"""
+
 class SimpleMCPClient:
-    """간소화된 MCP 클라이언트 - 실제 HTTP API 사용"""
+    """간소화된 MCP 클라이언트 - 실제 HTTP API 사용
+    
+    하나의 aiohttp 세션(연결 풀)을 계속 재사용하므로 검색마다 TCP/TLS 연결과
+    DNS 조회를 새로 하지 않습니다. 사용이 끝나면 aclose()로 닫거나
+    async with 블록으로 사용합니다.
+    
+    DuckDuckGo 요청은 rate_limiter(호스트별 토큰 버킷 + AIMD 동시 요청 창)를 거치며,
+    차례를 기다리다 시간이 지나면 RateLimitError를 냅니다. 실패를 모의 데이터로 대체하지 않습니다.
+    """
     
     def __init__(self):
         self.web_search_url = "https://api.duckduckgo.com/"
         self.context7_url = "https://context7.upstash.io/"
         self.api_key = "본인 key 입력"
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        }
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.rate_limiter = RateLimiter()
+    
+    async def __aenter__(self):
+        await self._get_session()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """공유 세션 반환 (없거나 다른 이벤트 루프의 세션이면 새로 생성)"""
+        loop = asyncio.get_running_loop()
+        if self._session is not None and not self._session.closed and self._session_loop is loop:
+            return self._session
+        
+        if self._session is not None and not self._session.closed:
+            # 세션은 생성된 이벤트 루프에 묶여 있어 다른 루프에서 재사용할 수 없음
+            logger.debug("이벤트 루프가 바뀌어 HTTP 세션을 다시 생성합니다")
+            try:
+                await self._session.close()
+            except Exception:
+                pass
+        
+        connector = aiohttp.TCPConnector(
+            limit=CONNECTION_LIMIT,
+            limit_per_host=CONNECTION_LIMIT_PER_HOST,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            use_dns_cache=True,
+            ttl_dns_cache=DNS_CACHE_TTL
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        )
+        self._session_loop = loop
+        return self._session
+    
+    async def aclose(self):
+        """공유 세션 및 연결 풀 종료"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+    
+    def _build_params(self, query: str) -> Dict[str, str]:
+        """DuckDuckGo Instant Answer API 파라미터"""
+        return {
+            'q': query,
+            'format': 'json',
+            'no_html': '1',
+            'skip_disambig': '1'
+        }
+    
+    def _parse_instant_answer(self, data: Dict[str, Any], max_results: int) -> List[Dict[str, Any]]:
+        """DuckDuckGo Instant Answer 응답을 결과 목록으로 변환"""
+        results = []
+        
+        # Abstract (요약) 정보
+        if data.get('Abstract'):
+            results.append({
+                'title': data.get('Heading', 'DuckDuckGo 요약'),
+                'url': data.get('AbstractURL', ''),
+                'snippet': data.get('Abstract', ''),
+                'source': 'DuckDuckGo 요약',
+                'rank': 1
+            })
+        
+        # Related Topics (관련 주제)
+        for i, topic in enumerate(data.get('RelatedTopics', [])[:max_results-1], 2):
+            if isinstance(topic, dict) and 'Text' in topic:
+                results.append({
+                    'title': topic.get('Text', '').split(' - ')[0],
+                    'url': topic.get('FirstURL', ''),
+                    'snippet': topic.get('Text', ''),
+                    'source': 'DuckDuckGo 관련 주제',
+                    'rank': i
+                })
+        
+        # Results (검색 결과)
+        for i, result in enumerate(data.get('Results', [])[:max_results-len(results)], len(results)+1):
+            results.append({
+                'title': result.get('Text', '').split(' - ')[0],
+                'url': result.get('FirstURL', ''),
+                'snippet': result.get('Text', ''),
+                'source': 'DuckDuckGo 검색 결과',
+                'rank': i
+            })
+        
+        return results
     
     async def search_web_direct(self, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
-        """DuckDuckGo 직접 API 호출"""
+        """DuckDuckGo 직접 API 호출 (공유 연결 풀 사용)
+        
+        HTTP 오류는 WebSearchError, 호스트별 요청 제한을 넘으면 RateLimitError, 네트워크 오류는
+        aiohttp 예외 그대로 전달합니다.
+        """
         try:
-            # DuckDuckGo Instant Answer API 사용
-            params = {
-                'q': query,
-                'format': 'json',
-                'no_html': '1',
-                'skip_disambig': '1'
-            }
+            session = await self._get_session()
+            async with await self.rate_limiter.acquire(self.web_search_url) as permit:
+                with metrics_registry.span('http_fetch', engine='web'):
+                    async with session.get(self.web_search_url, params=self._build_params(query)) as response:
+                        status = response.status
+                        permit.record(status, response.headers.get('Retry-After'))
+                        # DuckDuckGo는 application/x-javascript로 응답하므로 Content-Type 검사를 생략
+                        data = await response.json(content_type=None) if status == 200 else None
+            
+            if status != 200:
+                raise WebSearchError(f"DuckDuckGo API 오류: {status}")
             
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
+            with metrics_registry.span('http_parse', engine='web'):
+                results = self._parse_instant_answer(data, max_results)
             
-            async with aiohttp.ClientSession(headers=headers) as session:
-                async with session.get(self.web_search_url, params=params, timeout=10) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        results = []
-                        
-                        # Abstract (요약) 정보
-                        if data.get('Abstract'):
-                            results.append({
-                                'title': data.get('Heading', 'DuckDuckGo 요약'),
-                                'url': data.get('AbstractURL', ''),
-                                'snippet': data.get('Abstract', ''),
-                                'source': 'DuckDuckGo 요약',
-                                'rank': 1
-                            })
-                        
-                        # Related Topics (관련 주제)
-                        for i, topic in enumerate(data.get('RelatedTopics', [])[:max_results-1], 2):
-                            if isinstance(topic, dict) and 'Text' in topic:
-                                results.append({
-                                    'title': topic.get('Text', '').split(' - ')[0],
-                                    'url': topic.get('FirstURL', ''),
-                                    'snippet': topic.get('Text', ''),
-                                    'source': 'DuckDuckGo 관련 주제',
-                                    'rank': i
-                                })
-                        
-                        # Results (검색 결과)
-                        for i, result in enumerate(data.get('Results', [])[:max_results-len(results)], len(results)+1):
-                            results.append({
-                                'title': result.get('Text', '').split(' - ')[0],
-                                'url': result.get('FirstURL', ''),
-                                'snippet': result.get('Text', ''),
-                                'source': 'DuckDuckGo 검색 결과',
-                                'rank': i
-                            })
-                        
-                        logger.info(f"웹 검색 완료: {len(results)}개 결과")
-                        return results
-                    else:
-                        logger.error(f"DuckDuckGo API 오류: {response.status}")
-                        # API 오류 시 모의 데이터 반환
-                        return self._get_mock_web_results(query, max_results)
-                        
+            logger.info(f"웹 검색 완료: {len(results)}개 결과")
+            return results
+        
+        except RateLimitError as e:
+            metrics_registry.increment('errors', stage='rate_limit', engine='web')
+            logger.warning(f"웹 검색 요청 제한: {e}")
+            raise
         except Exception as e:
+            # 실패를 모의 데이터로 감추지 않고 호출자(서킷 브레이커, 이전 결과 대체)에 전달
+            metrics_registry.increment('errors', stage='http_fetch', engine='web')
             logger.error(f"웹 검색 실패: {e}")
-            # 예외 발생 시 모의 데이터 반환
-            return self._get_mock_web_results(query, max_results)
-    
-    def _get_mock_web_results(self, query: str, max_results: int) -> List[Dict[str, Any]]:
-        """모의 웹 검색 결과 생성"""
-        mock_results = [
-            {
-                'title': f'{query}에 대한 최신 정보',
-                'url': f'https://example.com/{query.lower().replace(" ", "-")}',
-                'snippet': f'{query}에 대한 상세한 정보와 최신 뉴스를 제공합니다.',
-                'source': '웹 검색 (모의 데이터)',
-                'rank': 1
-            },
-            {
-                'title': f'{query} 가이드 및 튜토리얼',
-                'url': f'https://tutorial.com/{query.lower().replace(" ", "-")}',
-                'snippet': f'{query}를 배우고 싶다면 이 가이드를 확인해보세요.',
-                'source': '웹 검색 (모의 데이터)',
-                'rank': 2
-            },
-            {
-                'title': f'{query} 관련 뉴스 및 업데이트',
-                'url': f'https://news.com/{query.lower().replace(" ", "-")}',
-                'snippet': f'{query}와 관련된 최신 뉴스와 업데이트를 확인할 수 있습니다.',
-                'source': '웹 검색 (모의 데이터)',
-                'rank': 3
-            }
-        ]
-        
-        return mock_results[:max_results]
+            raise
     
     async def search_docs_mock(self, query: str, max_results: int = 50) -> List[Dict[str, Any]]:
         """Context7 대신 모의 기술 문서 검색"""
@@ -170,55 +226,37 @@ class SimpleMCPClient:
             return []
     
     async def search_web_with_requests(self, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
-        """requests 라이브러리를 사용한 웹 검색 (대안)"""
+        """requests 라이브러리를 사용한 웹 검색 (대안, 스레드에서 실행)"""
         try:
-            import requests
-            
-            # DuckDuckGo Instant Answer API
-            params = {
-                'q': query,
-                'format': 'json',
-                'no_html': '1',
-                'skip_disambig': '1'
-            }
+            # 블로킹 호출이 이벤트 루프를 막지 않도록 스레드 풀에서 실행
+            results = await asyncio.to_thread(self._search_web_blocking, query, max_results)
+            if results is None:
+                return []
             
-            response = requests.get(self.web_search_url, params=params, timeout=10)
+            logger.info(f"웹 검색 완료: {len(results)}개 결과")
+            return results
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                results = []
-                
-                # Abstract
-                if data.get('Abstract'):
-                    results.append({
-                        'title': data.get('Heading', 'DuckDuckGo 요약'),
-                        'url': data.get('AbstractURL', ''),
-                        'snippet': data.get('Abstract', ''),
-                        'source': 'DuckDuckGo 요약',
-                        'rank': 1
-                    })
-                
-                # Related Topics
-                for i, topic in enumerate(data.get('RelatedTopics', [])[:max_results-1], 2):
-                    if isinstance(topic, dict) and 'Text' in topic:
-                        results.append({
-                            'title': topic.get('Text', '').split(' - ')[0],
-                            'url': topic.get('FirstURL', ''),
-                            'snippet': topic.get('Text', ''),
-                            'source': 'DuckDuckGo 관련 주제',
-                            'rank': i
-                        })
-                
-                logger.info(f"웹 검색 완료: {len(results)}개 결과")
-                return results
-            else:
-                logger.error(f"DuckDuckGo API 오류: {response.status_code}")
-                return []
-                
         except Exception as e:
             logger.error(f"웹 검색 실패: {e}")
             return []
+    
+    def _search_web_blocking(self, query: str, max_results: int) -> Optional[List[Dict[str, Any]]]:
+        """requests로 DuckDuckGo 호출 (블로킹)"""
+        import requests
+        
+        response = requests.get(
+            self.web_search_url,
+            params=self._build_params(query),
+            headers=self.headers,
+            timeout=REQUEST_TIMEOUT
+        )
+        
+        if response.status_code != 200:
+            logger.error(f"DuckDuckGo API 오류: {response.status_code}")
+            return None
+        
+        return self._parse_instant_answer(response.json(), max_results)
 
 # 전역 클라이언트 인스턴스
 simple_mcp_client = SimpleMCPClient()
+metrics_registry.register_collector('rate_limit', simple_mcp_client.rate_limiter.stats, label='host')
@@ -0,0 +1,362 @@
+import asyncio
+import time
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+import logging
+
+from metrics import metrics_registry
+from mcp_session import MCPSession, MCPSessionError
+from mcp_transport import DEFAULT_MAX_MESSAGE_BYTES, STREAM_LIMIT_BYTES
+
+logger = logging.getLogger(__name__)
+
+# 서버별 initialize 응답 대기 기본 시간 (초, mcp_config.json의 startup_timeout으로 변경 가능)
+DEFAULT_STARTUP_TIMEOUT = 30.0
+# 워커 풀 기본값 (mcp_config.json의 pool_size / min_pool_size / idle_timeout으로 변경 가능)
+DEFAULT_POOL_SIZE = 1
+DEFAULT_MIN_POOL_SIZE = 1
+DEFAULT_IDLE_TIMEOUT = 300.0
+# JSON-RPC 배치 하나에 담는 최대 요청 수 (mcp_config.json의 batch_size로 변경 가능)
+DEFAULT_BATCH_SIZE = 32
+# 비정상 종료된 워커 재시작 백오프 (초)
+RESTART_BACKOFF_BASE = 0.5
+RESTART_BACKOFF_MAX = 30.0
+
+async def launch_worker(server_name: str, server_config: Dict[str, Any], timeout: Optional[float] = None) -> MCPSession:
+    """서버 프로세스를 띄우고 initialize 응답을 받을 때까지 대기
+
+    반환된 세션의 startup_timings에 spawn / initialize / total 소요 시간이 기록됩니다.
+    실패하면 프로세스를 정리한 뒤 예외를 그대로 전달합니다.
+    """
+    started_at = time.perf_counter()
+    command = server_config['command']
+    args = server_config['args']
+    timeout = timeout or server_config.get('startup_timeout', DEFAULT_STARTUP_TIMEOUT)
+    
+    # Windows 환경에서는 cmd /c npx ..., 그 외에는 npx ... 형태로 직접 실행
+    full_command = [command] + args
+    logger.info(f"서버 '{server_name}' 실행 명령어: {' '.join(full_command)}")
+    
+    process = await asyncio.create_subprocess_exec(
+        *full_command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        stdin=asyncio.subprocess.PIPE,
+        limit=STREAM_LIMIT_BYTES
+    )
+    spawn_seconds = time.perf_counter() - started_at
+    
+    # 응답 리더를 하나만 띄워 두고 세션 전체에서 공유 (파이프는 바이트 단위로 읽고 씀)
+    session = MCPSession(
+        server_name,
+        process,
+        max_message_bytes=int(server_config.get('max_message_bytes', DEFAULT_MAX_MESSAGE_BYTES))
+    )
+    session.start()
+    
+    try:
+        # 고정 대기 대신 initialize 응답이 오면 준비 완료
+        init_started = time.perf_counter()
+        await session.initialize(timeout)
+    except Exception as e:
+        metrics_registry.increment('errors', stage='mcp_initialize', engine=server_name)
+        stderr_output = "\n".join(session.stderr_tail)
+        await session.close()
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise MCPSessionError(f"서버 '{server_name}' 시작 실패: {e!r} {stderr_output}") from e
+    
+    session.startup_timings = {
+        'spawn': spawn_seconds,
+        'initialize': time.perf_counter() - init_started,
+        'total': time.perf_counter() - started_at
+    }
+    metrics_registry.observe('mcp_spawn', spawn_seconds, engine=server_name)
+    metrics_registry.observe('mcp_initialize', session.startup_timings['initialize'], engine=server_name)
+    return session
+
+class MCPWorker:
+    """풀에 속한 서버 프로세스 하나"""
+    
+    def __init__(self, index: int, session: MCPSession):
+        self.index = index
+        self.session = session
+        self.last_used = time.monotonic()
+        self.watch_task: Optional[asyncio.Task] = None
+    
+    @property
+    def process(self) -> asyncio.subprocess.Process:
+        return self.session.process
+    
+    @property
+    def in_flight(self) -> int:
+        return self.session.in_flight
+    
+    @property
+    def healthy(self) -> bool:
+        return self.session.alive and self.session.server_info is not None
+
+class MCPWorkerPool:
+    """동일한 MCP 서버 프로세스 여러 개를 묶은 워커 풀
+
+    요청은 가장 한가한(진행 중 요청이 가장 적은) 정상 워커로 보냅니다.
+    비정상 종료된 워커는 지수 백오프로 자동 재시작하고, 오래 쉬는 워커는
+    min_pool_size까지 줄였다가 부하가 생기면 pool_size까지 다시 늘립니다.
+    """
+    
+    def __init__(self, server_name: str, server_config: Dict[str, Any]):
+        self.server_name = server_name
+        self.server_config = server_config
+        self.pool_size = max(1, int(server_config.get('pool_size', DEFAULT_POOL_SIZE)))
+        self.min_pool_size = min(
+            self.pool_size,
+            max(0, int(server_config.get('min_pool_size', DEFAULT_MIN_POOL_SIZE)))
+        )
+        self.idle_timeout = float(server_config.get('idle_timeout', DEFAULT_IDLE_TIMEOUT))
+        # 서버가 JSON-RPC 배치(배열) 요청을 지원하는 경우에만 설정에서 켬
+        self.supports_batch = bool(server_config.get('batch', False))
+        self.batch_size = max(1, int(server_config.get('batch_size', DEFAULT_BATCH_SIZE)))
+        self.workers: List[MCPWorker] = []
+        self.startup_timings: Dict[str, Any] = {}
+        self.restarts = 0
+        self._next_index = 0
+        self._launching = 0
+        self._consecutive_failures = 0
+        self._ready = asyncio.Event()
+        self._reaper_task: Optional[asyncio.Task] = None
+        self._background: set = set()
+        self._stopping = False
+    
+    @property
+    def size(self) -> int:
+        return len(self.workers)
+    
+    @property
+    def in_flight(self) -> int:
+        return sum(worker.in_flight for worker in self.workers)
+    
+    async def start(self, timeout: Optional[float] = None) -> bool:
+        """pool_size개 워커를 동시에 시작 (하나 이상 준비되면 성공)"""
+        started_at = time.perf_counter()
+        results = await asyncio.gather(
+            *(self._add_worker(timeout) for _ in range(self.pool_size))
+        )
+        
+        worker_timings = [result for result in results if result is not None]
+        fastest = min(worker_timings, key=lambda t: t['total'], default={})
+        self.startup_timings = {
+            'spawn': fastest.get('spawn'),
+            'initialize': fastest.get('initialize'),
+            'total': time.perf_counter() - started_at,
+            'ready': bool(worker_timings),
+            'workers': worker_timings
+        }
+        
+        if self.workers and self._reaper_task is None:
+            self._reaper_task = asyncio.create_task(self._reap_idle_workers())
+        return bool(self.workers)
+    
+    async def _add_worker(self, timeout: Optional[float] = None) -> Optional[Dict[str, float]]:
+        """워커 하나를 띄워 풀에 추가 (실패 시 None)"""
+        self._launching += 1
+        try:
+            session = await launch_worker(self.server_name, self.server_config, timeout)
+        except Exception as e:
+            logger.error(str(e))
+            return None
+        finally:
+            self._launching -= 1
+        
+        if self._stopping:
+            await self._close_session(session)
+            return None
+        
+        worker = MCPWorker(self._next_index, session)
+        self._next_index += 1
+        worker.watch_task = asyncio.create_task(self._watch_worker(worker))
+        self.workers.append(worker)
+        self._consecutive_failures = 0
+        self._ready.set()
+        logger.info(
+            f"MCP 서버 '{self.server_name}' 워커 #{worker.index} 시작됨 "
+            f"(PID: {worker.process.pid}, {len(self.workers)}/{self.pool_size})"
+        )
+        return session.startup_timings
+    
+    async def _watch_worker(self, worker: MCPWorker):
+        """워커 프로세스 종료 감시 후 비정상 종료면 재시작"""
+        await worker.process.wait()
+        if self._stopping or worker not in self.workers:
+            return
+        
+        self.workers.remove(worker)
+        await worker.session.close()
+        if not self.workers:
+            self._ready.clear()
+        logger.warning(
+            f"MCP 서버 '{self.server_name}' 워커 #{worker.index} 비정상 종료 "
+            f"(코드: {worker.process.returncode}, 남은 워커: {len(self.workers)})"
+        )
+        self._spawn_background(self._restart_worker())
+    
+    async def _restart_worker(self):
+        """지수 백오프 후 워커 재시작 (성공할 때까지 반복)"""
+        while not self._stopping:
+            delay = min(RESTART_BACKOFF_MAX, RESTART_BACKOFF_BASE * (2 ** self._consecutive_failures))
+            await asyncio.sleep(delay)
+            if self._stopping:
+                return
+            
+            self.restarts += 1
+            if await self._add_worker() is not None:
+                return
+            self._consecutive_failures += 1
+            logger.warning(
+                f"MCP 서버 '{self.server_name}' 워커 재시작 실패 "
+                f"({self._consecutive_failures}회 연속)"
+            )
+    
+    def _spawn_background(self, coro):
+        """풀 수명 동안 참조를 유지하는 백그라운드 태스크 생성"""
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+    
+    def _maybe_scale_up(self, least_loaded: MCPWorker):
+        """모든 워커가 바쁘면 pool_size까지 워커 추가"""
+        if least_loaded.in_flight == 0:
+            return
+        if len(self.workers) + self._launching >= self.pool_size:
+            return
+        # 같은 틱에 여러 요청이 몰려도 한 번만 늘리도록 미리 예약
+        self._launching += 1
+        
+        async def scale_up():
+            self._launching -= 1
+            await self._add_worker()
+        
+        self._spawn_background(scale_up())
+    
+    async def _reap_idle_workers(self):
+        """idle_timeout 동안 쓰이지 않은 워커를 min_pool_size까지 정리"""
+        interval = max(1.0, self.idle_timeout / 2)
+        while not self._stopping:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            idle = [
+                worker for worker in self.workers
+                if worker.in_flight == 0 and now - worker.last_used >= self.idle_timeout
+            ]
+            for worker in idle:
+                if len(self.workers) <= self.min_pool_size:
+                    break
+                self.workers.remove(worker)
+                logger.info(
+                    f"MCP 서버 '{self.server_name}' 유휴 워커 #{worker.index} 종료 "
+                    f"(남은 워커: {len(self.workers)})"
+                )
+                await self._stop_worker(worker)
+            if not self.workers:
+                self._ready.clear()
+    
+    async def acquire(self, timeout: Optional[float] = None) -> MCPWorker:
+        """가장 한가한 정상 워커 선택 (없으면 재시작/재확장을 기다림)"""
+        healthy = [worker for worker in self.workers if worker.healthy]
+        if not healthy:
+            if not self._launching and not self._background:
+                # min_pool_size가 0이라 모두 정리된 경우 필요할 때 다시 띄움
+                self._spawn_background(self._add_worker())
+            try:
+                await asyncio.wait_for(
+                    self._ready.wait(),
+                    timeout or self.server_config.get('startup_timeout', DEFAULT_STARTUP_TIMEOUT)
+                )
+            except asyncio.TimeoutError:
+                raise MCPSessionError(f"서버 '{self.server_name}'에 사용 가능한 워커가 없습니다")
+            healthy = [worker for worker in self.workers if worker.healthy]
+            if not healthy:
+                raise MCPSessionError(f"서버 '{self.server_name}'에 사용 가능한 워커가 없습니다")
+        
+        worker = min(healthy, key=lambda w: w.in_flight)
+        self._maybe_scale_up(worker)
+        return worker
+    
+    async def request(self, method: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
+        """가장 한가한 워커로 요청 전송"""
+        worker = await self.acquire()
+        worker.last_used = time.monotonic()
+        try:
+            return await worker.session.request(method, params)
+        finally:
+            worker.last_used = time.monotonic()
+    
+    async def request_batch(self, calls: Sequence[Tuple[str, Optional[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+        """여러 요청을 전송하고 요청 순서대로 응답 반환
+        
+        배치를 지원하면 batch_size개씩 배열로 묶어 한 번에 쓰고, 묶음마다 가장 한가한 워커를
+        고릅니다. 지원하지 않으면 개별 요청을 같은 파이프로 동시에 보냅니다.
+        """
+        if not self.supports_batch:
+            return list(await asyncio.gather(*(self.request(method, params) for method, params in calls)))
+        
+        async def send_chunk(chunk):
+            worker = await self.acquire()
+            worker.last_used = time.monotonic()
+            try:
+                return await worker.session.request_batch(chunk)
+            finally:
+                worker.last_used = time.monotonic()
+        
+        chunks = [calls[i:i + self.batch_size] for i in range(0, len(calls), self.batch_size)]
+        responses = await asyncio.gather(*(send_chunk(chunk) for chunk in chunks))
+        return [response for chunk_responses in responses for response in chunk_responses]
+    
+    @property
+    def processes(self) -> List[asyncio.subprocess.Process]:
+        return [worker.process for worker in self.workers]
+    
+    def stats(self) -> Dict[str, Any]:
+        """풀 상태 (워커 수, 진행 중 요청, 재시작 횟수)"""
+        return {
+            'size': len(self.workers),
+            'pool_size': self.pool_size,
+            'min_pool_size': self.min_pool_size,
+            'launching': self._launching,
+            'in_flight': self.in_flight,
+            'restarts': self.restarts,
+            'workers': [
+                {
+                    'index': w.index, 'pid': w.process.pid, 'in_flight': w.in_flight, 'healthy': w.healthy,
+                    'bytes_in': w.session.transport.bytes_in, 'bytes_out': w.session.transport.bytes_out
+                }
+                for w in self.workers
+            ]
+        }
+    
+    async def _close_session(self, session: MCPSession):
+        """세션과 프로세스 종료"""
+        await session.close()
+        process = session.process
+        if process.returncode is None:
+            process.terminate()
+            await process.wait()
+    
+    async def _stop_worker(self, worker: MCPWorker):
+        """워커 하나 종료"""
+        if worker.watch_task is not None:
+            worker.watch_task.cancel()
+        await self._close_session(worker.session)
+    
+    async def stop(self):
+        """모든 워커 및 백그라운드 태스크 종료"""
+        self._stopping = True
+        tasks = list(self._background)
+        if self._reaper_task is not None:
+            tasks.append(self._reaper_task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        
+        workers, self.workers = self.workers, []
+        await asyncio.gather(*(self._stop_worker(worker) for worker in workers), return_exceptions=True)
+        self._ready.clear()
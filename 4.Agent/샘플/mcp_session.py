@@ -0,0 +1,270 @@
+import asyncio
+import collections
+import itertools
+import time
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+import logging
+
+from metrics import metrics_registry
+from mcp_transport import StdioTransport, MCPTransportError, DEFAULT_MAX_MESSAGE_BYTES
+
+logger = logging.getLogger(__name__)
+
+# MCP 프로토콜 정보
+PROTOCOL_VERSION = "2024-11-05"
+CLIENT_INFO = {
+    "name": "streamlit-search-agent",
+    "version": "1.0.0"
+}
+CLIENT_CAPABILITIES = {
+    "roots": {
+        "listChanged": True
+    },
+    "sampling": {}
+}
+
+class MCPSessionError(Exception):
+    """MCP 세션 오류 (연결 종료, 초기화 실패 등)"""
+
+class MCPSession:
+    """MCP 서버 프로세스 하나에 대한 JSON-RPC 세션
+
+    초기화 handshake는 프로세스당 한 번만 수행하고, 요청 id는 단조 증가로 발급합니다.
+    백그라운드 리더 태스크 하나가 stdout을 읽어 각 응답을 id별 Future로 전달하므로
+    여러 요청이 하나의 stdio 파이프 위에서 동시에 진행될 수 있습니다.
+    파이프 입출력과 메시지 프레이밍은 StdioTransport가 바이트 단위로 처리합니다.
+    """
+    
+    def __init__(self, name: str, process: asyncio.subprocess.Process, request_timeout: float = 30.0,
+                 max_message_bytes: int = DEFAULT_MAX_MESSAGE_BYTES):
+        self.name = name
+        self.process = process
+        self.transport = StdioTransport(name, process, max_message_bytes)
+        self.request_timeout = request_timeout
+        self.server_info: Optional[Dict[str, Any]] = None
+        self.startup_timings: Dict[str, float] = {}
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._reader_task: Optional[asyncio.Task] = None
+        self._stderr_task: Optional[asyncio.Task] = None
+        self.stderr_tail = collections.deque(maxlen=20)
+        self._init_task: Optional[asyncio.Future] = None
+        self._closed = False
+    
+    @property
+    def in_flight(self) -> int:
+        """응답을 기다리는 요청 수"""
+        return len(self._pending)
+    
+    @property
+    def alive(self) -> bool:
+        """세션과 프로세스가 모두 살아 있는지 여부"""
+        return not self._closed and self.process.returncode is None
+    
+    def start(self):
+        """응답 리더 및 stderr 수집 태스크 시작"""
+        if self._reader_task is None:
+            self._reader_task = asyncio.create_task(self._read_loop())
+        if self._stderr_task is None and self.process.stderr is not None:
+            # stderr를 비워 주지 않으면 파이프가 가득 차 서버가 멈출 수 있음
+            self._stderr_task = asyncio.create_task(self._drain_stderr())
+    
+    async def initialize(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """초기화 handshake (최초 호출 시에만 실제로 전송)"""
+        if self._init_task is None:
+            self._init_task = asyncio.ensure_future(self._handshake(timeout))
+            # 대기자가 모두 취소되어도 결과/예외가 회수되도록 함
+            self._init_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return await asyncio.shield(self._init_task)
+    
+    async def _handshake(self, timeout: Optional[float]) -> Dict[str, Any]:
+        """initialize 요청 후 initialized 알림 전송"""
+        response = await self._call(
+            "initialize",
+            {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": CLIENT_CAPABILITIES,
+                "clientInfo": CLIENT_INFO
+            },
+            timeout
+        )
+        if "error" in response:
+            raise MCPSessionError(f"서버 '{self.name}' 초기화 오류: {response['error']}")
+        
+        await self.notify("notifications/initialized")
+        self.server_info = response.get("result", {})
+        logger.info(f"서버 '{self.name}' 초기화 완료")
+        return self.server_info
+    
+    async def request(self, method: str, params: Dict[str, Any] = None, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """요청 전송 후 해당 id의 응답 대기"""
+        await self.initialize()
+        return await self._call(method, params, timeout)
+    
+    async def request_batch(self, calls: Sequence[Tuple[str, Optional[Dict[str, Any]]]],
+                            timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """여러 요청을 JSON-RPC 배치(배열) 하나로 전송하고 요청 순서대로 응답 반환
+        
+        배치를 지원하는 서버에서만 사용합니다. 응답 배열은 순서가 보장되지 않으므로 id로 매칭합니다.
+        """
+        await self.initialize()
+        if not self.alive:
+            raise MCPSessionError(f"서버 '{self.name}' 세션이 종료되었습니다")
+        if not calls:
+            return []
+        
+        loop = asyncio.get_running_loop()
+        request_ids = [next(self._ids) for _ in calls]
+        futures = []
+        for request_id in request_ids:
+            future = loop.create_future()
+            self._pending[request_id] = future
+            futures.append(future)
+        
+        started_at = time.perf_counter()
+        try:
+            await self._write([
+                {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params or {}}
+                for request_id, (method, params) in zip(request_ids, calls)
+            ])
+            responses = await asyncio.wait_for(asyncio.gather(*futures), timeout or self.request_timeout)
+            metrics_registry.observe('mcp_batch', time.perf_counter() - started_at, engine=self.name)
+            errors = sum(1 for response in responses if "error" in response)
+            if errors:
+                metrics_registry.increment('errors', errors, stage='mcp_request', engine=self.name)
+            return list(responses)
+        except (asyncio.TimeoutError, MCPSessionError):
+            metrics_registry.increment('errors', len(calls), stage='mcp_request', engine=self.name)
+            raise
+        finally:
+            for request_id in request_ids:
+                self._pending.pop(request_id, None)
+    
+    async def notify(self, method: str, params: Dict[str, Any] = None):
+        """응답이 없는 알림 전송"""
+        message = {"jsonrpc": "2.0", "method": method}
+        if params:
+            message["params"] = params
+        await self._write(message)
+    
+    async def _call(self, method: str, params: Optional[Dict[str, Any]], timeout: Optional[float]) -> Dict[str, Any]:
+        """id를 발급하고 응답 Future를 등록한 뒤 요청 전송"""
+        if not self.alive:
+            raise MCPSessionError(f"서버 '{self.name}' 세션이 종료되었습니다")
+        
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        started_at = time.perf_counter()
+        try:
+            await self._write({
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "method": method,
+                "params": params or {}
+            })
+            response = await asyncio.wait_for(future, timeout or self.request_timeout)
+            metrics_registry.observe('mcp_request', time.perf_counter() - started_at, engine=self.name)
+            if "error" in response:
+                metrics_registry.increment('errors', stage='mcp_request', engine=self.name)
+            return response
+        except (asyncio.TimeoutError, MCPSessionError):
+            metrics_registry.increment('errors', stage='mcp_request', engine=self.name)
+            raise
+        finally:
+            self._pending.pop(request_id, None)
+    
+    async def _write(self, message: Any):
+        """한 줄 단위 JSON 메시지(또는 배치 배열) 쓰기"""
+        with metrics_registry.span('mcp_write', engine=self.name):
+            await self.transport.write(message)
+    
+    async def _read_loop(self):
+        """stdout에서 응답을 읽어 id별 Future로 전달"""
+        try:
+            async for message in self.transport.messages():
+                # 배치 요청의 응답은 배열 하나로 도착
+                if isinstance(message, list):
+                    for item in message:
+                        if isinstance(item, dict):
+                            self._dispatch(item)
+                else:
+                    self._dispatch(message)
+        except asyncio.CancelledError:
+            raise
+        except MCPTransportError as e:
+            metrics_registry.increment('errors', stage='mcp_read', engine=self.name)
+            logger.error(f"서버 '{self.name}' 응답 읽기 중단: {e}")
+        except Exception as e:
+            logger.error(f"서버 '{self.name}' 응답 읽기 실패: {e}")
+        finally:
+            self._closed = True
+            self._fail_pending(MCPSessionError(f"서버 '{self.name}' 연결이 종료되었습니다"))
+    
+    async def _drain_stderr(self):
+        """stderr 출력을 읽어 최근 몇 줄만 보관"""
+        try:
+            while True:
+                try:
+                    line = await self.process.stderr.readline()
+                except ValueError:
+                    # 버퍼 한도를 넘는 줄은 StreamReader가 버리므로 다음 줄부터 계속 읽음
+                    continue
+                if not line:
+                    break
+                text = line.decode("utf-8", errors="replace").rstrip()
+                if text:
+                    self.stderr_tail.append(text)
+                    logger.debug(f"서버 '{self.name}' stderr: {text}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug(f"서버 '{self.name}' stderr 읽기 실패: {e}")
+    
+    def _dispatch(self, message: Dict[str, Any]):
+        """응답은 대기 중인 Future로, 서버 요청/알림은 별도 처리"""
+        if "method" in message:
+            if "id" in message:
+                # 서버 → 클라이언트 요청은 지원하지 않으므로 표준 오류로 응답
+                asyncio.create_task(self._reply_unsupported(message["id"], message["method"]))
+            else:
+                logger.debug(f"서버 '{self.name}' 알림: {message['method']}")
+            return
+        
+        future = self._pending.get(message.get("id"))
+        if future is not None and not future.done():
+            future.set_result(message)
+        else:
+            logger.warning(f"서버 '{self.name}' 대기 중이 아닌 응답 무시: id={message.get('id')}")
+    
+    async def _reply_unsupported(self, request_id: Any, method: str):
+        """지원하지 않는 서버 요청에 Method not found 응답"""
+        try:
+            await self._write({
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "error": {"code": -32601, "message": f"Method not found: {method}"}
+            })
+        except Exception as e:
+            logger.debug(f"서버 '{self.name}' 요청 응답 실패: {e}")
+    
+    def _fail_pending(self, error: Exception):
+        """대기 중인 모든 요청을 오류로 종료"""
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
+    
+    async def close(self):
+        """리더 태스크 중지 및 대기 요청 정리"""
+        self._closed = True
+        for task in (self._reader_task, self._stderr_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._reader_task = None
+        self._stderr_task = None
+        self._fail_pending(MCPSessionError(f"서버 '{self.name}' 세션이 닫혔습니다"))
@@ -0,0 +1,164 @@
+"""MCP stdio 전송 계층 (줄 단위 JSON 메시지 프레이밍)
+
+asyncio StreamReader.readline()은 기본 64 KiB 한도를 넘는 줄에서 예외를 내므로, stdout을
+청크 단위로 읽어 bytearray 버퍼에 쌓고 새로 들어온 구간에서만 줄바꿈을 찾습니다.
+완성된 메시지는 str로 바꾸지 않고 바이트 그대로 JSON 파서에 넘기며, orjson이 설치되어
+있으면 버퍼의 memoryview를 복사 없이 파싱합니다.
+"""
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Dict, Iterator
+import logging
+
+from metrics import metrics_registry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# 메시지 하나의 최대 크기 (바이트, mcp_config.json의 max_message_bytes로 변경 가능)
+DEFAULT_MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+# stdout에서 한 번에 읽는 크기 (바이트)
+READ_CHUNK_BYTES = 256 * 1024
+# 서버 프로세스 파이프의 StreamReader 버퍼 한도 (stderr readline에도 적용)
+STREAM_LIMIT_BYTES = 1024 * 1024
+
+JSON_BACKEND = 'orjson' if orjson is not None else 'json'
+WHITESPACE = frozenset(b' \t\r\n')
+
+def dumps_bytes(message: Any) -> bytes:
+    """JSON 직렬화 후 UTF-8 바이트로 반환 (줄바꿈 미포함)"""
+    if orjson is not None:
+        return orjson.dumps(message)
+    return json.dumps(message, ensure_ascii=False).encode('utf-8')
+
+def loads_bytes(data) -> Any:
+    """bytes / memoryview에서 JSON 파싱 (orjson이 없으면 표준 json 사용)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(bytes(data))
+
+class MCPTransportError(Exception):
+    """MCP 전송 오류 (메시지 크기 초과 등)"""
+
+class LineFramer:
+    """바이트 청크를 받아 줄바꿈으로 구분된 메시지를 꺼내는 버퍼
+
+    feed()로 받은 청크는 버퍼 끝에 붙이고, 이미 검사한 구간은 다시 찾지 않으므로
+    여러 MB짜리 메시지가 잘게 나뉘어 들어와도 전체 처리 비용은 메시지 크기에 비례합니다.
+    """
+
+    def __init__(self, max_message_bytes: int = DEFAULT_MAX_MESSAGE_BYTES):
+        self.max_message_bytes = max_message_bytes
+        self._buffer = bytearray()
+        self._scanned = 0
+
+    @property
+    def buffered(self) -> int:
+        """아직 메시지로 꺼내지 않은 바이트 수"""
+        return len(self._buffer)
+
+    def feed(self, chunk: bytes) -> Iterator[memoryview]:
+        """청크를 추가하고 완성된 메시지(줄바꿈과 앞뒤 공백 제외, 빈 줄 제외)를 차례로 반환
+
+        반환된 memoryview는 다음 메시지를 꺼내기 전까지만 유효합니다.
+        """
+        buffer = self._buffer
+        buffer += chunk
+        start = 0
+        try:
+            while True:
+                end = buffer.find(b'\n', max(start, self._scanned))
+                if end < 0:
+                    break
+                first, last = start, end
+                start = self._scanned = end + 1
+                if last - first > self.max_message_bytes:
+                    raise MCPTransportError(
+                        f"메시지 크기 한도 초과: {last - first} > {self.max_message_bytes} bytes"
+                    )
+                while first < last and buffer[first] in WHITESPACE:
+                    first += 1
+                while last > first and buffer[last - 1] in WHITESPACE:
+                    last -= 1
+                if first == last:
+                    continue
+                with memoryview(buffer) as view, view[first:last] as message:
+                    yield message
+        finally:
+            # 꺼낸 메시지는 청크마다 한 번에 버퍼 앞에서 제거
+            if start:
+                del buffer[:start]
+            self._scanned = len(buffer)
+
+        if len(buffer) > self.max_message_bytes:
+            raise MCPTransportError(
+                f"메시지 크기 한도 초과: {len(buffer)}+ > {self.max_message_bytes} bytes"
+            )
+
+class StdioTransport:
+    """MCP 서버 프로세스 하나의 stdin / stdout 바이트 파이프
+
+    메시지 쓰기는 dumps_bytes() + 줄바꿈, 읽기는 LineFramer + loads_bytes()로 처리하고
+    서버별로 주고받은 바이트 수, 메시지 수, 디코딩 시간을 metrics_registry에 기록합니다.
+    """
+
+    def __init__(self, name: str, process: asyncio.subprocess.Process,
+                 max_message_bytes: int = DEFAULT_MAX_MESSAGE_BYTES, chunk_size: int = READ_CHUNK_BYTES):
+        self.name = name
+        self.process = process
+        self.chunk_size = chunk_size
+        self.framer = LineFramer(max_message_bytes)
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.messages_in = 0
+        self.messages_out = 0
+        self._write_lock = asyncio.Lock()
+
+    async def write(self, message: Any):
+        """메시지(또는 배치 배열) 하나를 한 줄로 쓰기"""
+        data = dumps_bytes(message) + b'\n'
+        async with self._write_lock:
+            self.process.stdin.write(data)
+            await self.process.stdin.drain()
+        self.bytes_out += len(data)
+        self.messages_out += 1
+        metrics_registry.increment('mcp_bytes', len(data), direction='out', engine=self.name)
+
+    async def messages(self) -> AsyncIterator[Any]:
+        """stdout이 닫힐 때까지 파싱된 메시지를 차례로 반환 (JSON이 아닌 줄은 건너뜀)"""
+        stdout = self.process.stdout
+        while True:
+            chunk = await stdout.read(self.chunk_size)
+            if not chunk:
+                if self.framer.buffered:
+                    logger.warning(f"서버 '{self.name}' 줄바꿈 없이 끝난 출력 {self.framer.buffered} bytes 무시")
+                return
+            self.bytes_in += len(chunk)
+            metrics_registry.increment('mcp_bytes', len(chunk), direction='in', engine=self.name)
+
+            for line in self.framer.feed(chunk):
+                started_at = time.perf_counter()
+                try:
+                    message = loads_bytes(line)
+                except ValueError:
+                    logger.warning(f"서버 '{self.name}' JSON이 아닌 출력 무시: {bytes(line[:200])!r}")
+                    continue
+                finally:
+                    metrics_registry.observe('mcp_decode', time.perf_counter() - started_at, engine=self.name)
+                self.messages_in += 1
+                yield message
+
+    def stats(self) -> Dict[str, int]:
+        """주고받은 바이트 / 메시지 수"""
+        return {
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'messages_in': self.messages_in,
+            'messages_out': self.messages_out,
+            'buffered': self.framer.buffered
+        }
@@ -0,0 +1,237 @@
+import asyncio
+import bisect
+import collections
+import contextlib
+import os
+import threading
+import time
+from typing import Dict, List, Any, Optional, Callable, Iterator, Tuple
+import logging
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# 지연 시간 히스토그램 버킷 경계 (초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 백분위수 계산에 쓰는 최근 표본 수
+DEFAULT_WINDOW = 512
+# Prometheus 텍스트 파일 갱신 주기 (초)
+DEFAULT_EXPORT_INTERVAL = 15.0
+
+# (지표 이름, 정렬된 (레이블, 값) 목록)
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+class LatencyHistogram:
+    """지연 시간 히스토그램 (누적 버킷 + 최근 표본 기반 백분위수)"""
+    
+    def __init__(self, buckets=DEFAULT_BUCKETS, window: int = DEFAULT_WINDOW):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._recent = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+    
+    def observe(self, seconds: float):
+        """표본 하나 기록"""
+        with self._lock:
+            self.bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.count += 1
+            self.sum += seconds
+            self._recent.append(seconds)
+    
+    def percentile(self, p: float) -> Optional[float]:
+        """최근 표본의 p 백분위수 (0~100, 표본이 없으면 None)"""
+        with self._lock:
+            samples = sorted(self._recent)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, int(round(p / 100 * len(samples))) - 1))
+        return samples[index]
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """요약 통계"""
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99)
+        }
+
+def _label_key(name: str, labels: Dict[str, Any]) -> MetricKey:
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: Optional[Tuple[str, str]] = None) -> str:
+    """Prometheus 레이블 표기 ({a="1",b="2"})"""
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = (
+        f'{key}="' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for key, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+class MetricsRegistry:
+    """검색 파이프라인 단계별 지연 시간과 카운터 모음
+
+    span(stage, engine=...)으로 감싼 구간의 소요 시간이 (단계, 엔진)별 히스토그램에 쌓이고,
+    캐시/워커 풀 통계처럼 다른 객체가 가진 값은 collector로 등록해 조회 시점에 읽습니다.
+    render_prometheus()는 Prometheus 텍스트 형식으로 내보냅니다.
+    """
+    
+    def __init__(self, prefix: str = "search"):
+        self.prefix = prefix
+        self._histograms: Dict[MetricKey, LatencyHistogram] = {}
+        self._counters: Dict[MetricKey, float] = collections.defaultdict(float)
+        self._collectors: Dict[str, Tuple[Callable[[], Dict[str, Any]], str]] = {}
+        self._lock = threading.Lock()
+    
+    def histogram(self, stage: str, **labels) -> LatencyHistogram:
+        """단계/레이블별 히스토그램 (없으면 생성)"""
+        key = _label_key(stage, labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, LatencyHistogram())
+        return histogram
+    
+    def observe(self, stage: str, seconds: float, **labels):
+        self.histogram(stage, **labels).observe(seconds)
+    
+    @contextlib.contextmanager
+    def span(self, stage: str, **labels) -> Iterator[None]:
+        """with 블록의 소요 시간 기록 (예외로 끝나도 기록)"""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started_at, **labels)
+    
+    def increment(self, name: str, amount: float = 1, **labels):
+        """카운터 증가 (예: 단계별 오류 수)"""
+        with self._lock:
+            self._counters[_label_key(name, labels)] += amount
+    
+    def register_collector(self, name: str, collect: Callable[[], Dict[str, Any]], label: str = 'name'):
+        """조회 시점에 읽을 통계 등록
+        
+        collect()는 {지표: 숫자} 또는 {레이블 값: {지표: 숫자}} 형태의 dict를 반환하며,
+        두 번째 형태는 label 이름의 레이블로 구분됩니다 (예: 서버별 워커 풀 통계).
+        """
+        self._collectors[name] = (collect, label)
+    
+    def _collect(self) -> List[Tuple[str, Tuple[Tuple[str, str], ...], float]]:
+        """등록된 collector 값을 (지표 이름, 레이블, 값) 목록으로 평탄화"""
+        samples = []
+        for name, values in self._collect_raw().items():
+            label = self._collectors[name][1]
+            for key, value in values.items():
+                if isinstance(value, dict):
+                    for inner_key, inner_value in value.items():
+                        if isinstance(inner_value, (int, float)):
+                            samples.append((f"{name}_{inner_key}", ((label, str(key)),), float(inner_value)))
+                elif isinstance(value, (int, float)):
+                    samples.append((f"{name}_{key}", (), float(value)))
+        return samples
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """단계별 요약 통계, 카운터, collector 값 (화면 표시용)"""
+        with self._lock:
+            histograms = list(self._histograms.items())
+            counters = list(self._counters.items())
+        return {
+            'stages': [
+                {'stage': stage, **dict(labels), **histogram.snapshot()}
+                for (stage, labels), histogram in sorted(histograms)
+            ],
+            'counters': [
+                {'name': name, **dict(labels), 'value': value}
+                for (name, labels), value in sorted(counters)
+            ],
+            'collectors': self._collect_raw()
+        }
+    
+    def _collect_raw(self) -> Dict[str, Any]:
+        """collector별 원본 값 (실패한 collector는 제외)"""
+        values = {}
+        for name, (collect, _) in self._collectors.items():
+            try:
+                values[name] = collect()
+            except Exception as e:
+                logger.warning(f"지표 수집 실패 ({name}): {e}")
+        return values
+    
+    def render_prometheus(self) -> str:
+        """Prometheus 텍스트 형식 (exposition format 0.0.4)"""
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+        
+        lines = []
+        metric = f"{self.prefix}_stage_seconds"
+        lines.append(f"# HELP {metric} 검색 파이프라인 단계별 소요 시간")
+        lines.append(f"# TYPE {metric} histogram")
+        for (stage, labels), histogram in histograms:
+            labels = (('stage', stage),) + labels
+            with histogram._lock:
+                bucket_counts = list(histogram.bucket_counts)
+                count, total = histogram.count, histogram.sum
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.buckets, bucket_counts):
+                cumulative += bucket_count
+                lines.append(f"{metric}_bucket{_format_labels(labels, ('le', repr(float(bound))))} {cumulative}")
+            lines.append(f"{metric}_bucket{_format_labels(labels, ('le', '+Inf'))} {count}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {count}")
+        
+        seen = set()
+        for (name, labels), value in counters:
+            metric = f"{self.prefix}_{name}_total"
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_format_labels(labels)} {value}")
+        
+        for name, labels, value in sorted(self._collect()):
+            metric = f"{self.prefix}_{name}"
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+    
+    def write_prometheus(self, path: str):
+        """텍스트 파일로 저장 (node_exporter textfile collector용, 원자적 교체)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+async def start_metrics_server(registry: MetricsRegistry, host: str = '127.0.0.1', port: int = 9464) -> web.AppRunner:
+    """현재 이벤트 루프에서 /metrics HTTP 엔드포인트 시작"""
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(text=registry.render_prometheus(), content_type='text/plain', charset='utf-8',
+                            headers={'X-Prometheus-Format': '0.0.4'})
+    
+    application = web.Application()
+    application.router.add_get('/metrics', handle)
+    runner = web.AppRunner(application, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"지표 엔드포인트 시작: http://{host}:{port}/metrics")
+    return runner
+
+async def export_metrics_file(registry: MetricsRegistry, path: str, interval: float = DEFAULT_EXPORT_INTERVAL):
+    """interval초마다 Prometheus 텍스트 파일 갱신 (취소될 때까지)"""
+    while True:
+        try:
+            await asyncio.to_thread(registry.write_prometheus, path)
+        except Exception as e:
+            logger.warning(f"지표 파일 저장 실패 ({path}): {e}")
+        await asyncio.sleep(interval)
+
+# 전역 지표 레지스트리
+metrics_registry = MetricsRegistry()
@@ -0,0 +1,243 @@
+"""upstream 호스트별 클라이언트 측 요청 제한 (토큰 버킷 + AIMD 동시 요청 창)
+
+토큰 버킷은 초당 요청 수(rate)와 순간 허용량(burst)을 지키고, 동시 요청 창(window)은
+응답에 따라 크기를 바꿉니다. 성공하면 창이 1/window씩 늘어(창 하나만큼 성공하면 +1)
+상한(max_window)까지 커지고, 429 / 5xx / 타임아웃이면 절반으로 줄어듭니다. 이미 보낸 요청들이
+한꺼번에 실패해도 창은 한 번만 줄도록, 마지막으로 줄인 뒤에 시작한 요청의 실패만 반영합니다.
+429 응답의 Retry-After는 그 시간 동안 새 요청을 보내지 않는 것으로 따릅니다.
+
+바로 보낼 수 없는 요청은 최대 max_queue개까지 도착 순서대로 기다리고, queue_timeout 안에
+차례가 오지 않으면 RateLimitTimeout, 대기열이 가득 차 있으면 RateLimitExceeded를 냅니다.
+"""
+import asyncio
+import collections
+import time
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+import logging
+
+from metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE = 5.0             # 초당 요청 수 (0이면 제한 없음)
+DEFAULT_BURST = 10             # 토큰 버킷 크기
+DEFAULT_INITIAL_WINDOW = 4     # 시작 동시 요청 수
+DEFAULT_MIN_WINDOW = 1
+DEFAULT_MAX_WINDOW = 10        # 호스트별 연결 수 한도와 같게
+DEFAULT_MAX_QUEUE = 64         # 대기 요청 수 한도
+DEFAULT_QUEUE_TIMEOUT = 5.0    # 대기 최대 시간 (초)
+MAX_RETRY_AFTER = 60.0         # Retry-After를 따르는 최대 시간 (초)
+
+class RateLimitError(Exception):
+    """요청 제한으로 upstream에 보내지 못함"""
+
+class RateLimitExceeded(RateLimitError):
+    """대기열이 가득 참"""
+
+class RateLimitTimeout(RateLimitError):
+    """대기 시간 안에 차례가 오지 않음"""
+
+def is_overload_status(status: int) -> bool:
+    """창을 줄여야 하는 응답 (429 또는 5xx)"""
+    return status == 429 or 500 <= status < 600
+
+class Permit:
+    """허가 하나 (async with 블록 안에서 record()로 응답 상태를 알림)
+
+    record() 없이 블록이 끝나면 타임아웃 예외는 과부하로, 그 밖의 예외와 취소는 결과 없음으로 처리합니다.
+    """
+
+    __slots__ = ('limiter', 'started_at', 'waited', '_released')
+
+    def __init__(self, limiter: "HostLimiter", waited: float):
+        self.limiter = limiter
+        self.started_at = time.monotonic()
+        self.waited = waited
+        self._released = False
+
+    def record(self, status: int, retry_after: Optional[str] = None):
+        """HTTP 응답 상태 반영"""
+        if self._released:
+            return
+        self._released = True
+        if status == 429 and retry_after:
+            self.limiter.pause(retry_after)
+        self.limiter.release(self.started_at, overloaded=is_overload_status(status), succeeded=status < 400)
+
+    async def __aenter__(self) -> "Permit":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if not self._released:
+            self._released = True
+            timed_out = exc_type is not None and issubclass(exc_type, asyncio.TimeoutError)
+            self.limiter.release(self.started_at, overloaded=timed_out, succeeded=False)
+
+class HostLimiter:
+    """호스트 하나의 토큰 버킷, AIMD 동시 요청 창, 대기열 (이벤트 루프 하나에서 사용)"""
+
+    def __init__(self, host: str, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST,
+                 initial_window: int = DEFAULT_INITIAL_WINDOW, min_window: int = DEFAULT_MIN_WINDOW,
+                 max_window: int = DEFAULT_MAX_WINDOW, max_queue: int = DEFAULT_MAX_QUEUE,
+                 queue_timeout: float = DEFAULT_QUEUE_TIMEOUT):
+        self.host = host
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.min_window = max(1, min_window)
+        self.max_window = max(self.min_window, max_window)
+        self.window = float(min(max(initial_window, self.min_window), self.max_window))
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.tokens = float(self.burst)
+        self.in_flight = 0
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._decreased_at = 0.0
+        self._waiters: "collections.deque[asyncio.Event]" = collections.deque()
+        self.counters = {
+            'admitted': 0,
+            'queued': 0,
+            'rejected': 0,
+            'timeouts': 0,
+            'overloads': 0,
+            'decreases': 0
+        }
+
+    def _refill(self, now: float):
+        if self.rate > 0:
+            self.tokens = min(float(self.burst), self.tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _try_start(self) -> bool:
+        """지금 보낼 수 있으면 토큰과 창 한 칸을 차지"""
+        now = time.monotonic()
+        if now < self._paused_until or self.in_flight >= int(self.window):
+            return False
+        self._refill(now)
+        if self.rate > 0:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+        self.in_flight += 1
+        self.counters['admitted'] += 1
+        return True
+
+    def _retry_delay(self) -> Optional[float]:
+        """대기열 맨 앞 요청이 다시 확인할 때까지의 시간 (창이 가득 차면 release()를 기다리므로 None)"""
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.in_flight >= int(self.window):
+            return None
+        if self.rate > 0 and self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        return 0.0
+
+    def _wake_next(self):
+        if self._waiters:
+            self._waiters[0].set()
+
+    async def acquire(self, timeout: Optional[float] = None) -> Permit:
+        """보낼 차례가 될 때까지 기다린 뒤 Permit 반환 (대기열이 가득 차거나 시간이 지나면 예외)"""
+        if not self._waiters and self._try_start():
+            return Permit(self, 0.0)
+        if len(self._waiters) >= self.max_queue:
+            self.counters['rejected'] += 1
+            raise RateLimitExceeded(f"{self.host} 대기열이 가득 참 ({self.max_queue}개)")
+
+        self.counters['queued'] += 1
+        started_at = time.monotonic()
+        deadline = started_at + (self.queue_timeout if timeout is None else timeout)
+        event = asyncio.Event()
+        self._waiters.append(event)
+        try:
+            while True:
+                if self._waiters[0] is event and self._try_start():
+                    waited = time.monotonic() - started_at
+                    metrics_registry.observe('rate_limit_wait', waited, engine=self.host)
+                    return Permit(self, waited)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.counters['timeouts'] += 1
+                    raise RateLimitTimeout(f"{self.host} 요청 대기 시간 초과 ({time.monotonic() - started_at:.1f}s)")
+                delay = self._retry_delay() if self._waiters[0] is event else None
+                event.clear()
+                try:
+                    await asyncio.wait_for(event.wait(), remaining if delay is None else min(delay, remaining))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            was_first = self._waiters[0] is event
+            self._waiters.remove(event)
+            if was_first:
+                self._wake_next()
+
+    def release(self, started_at: float, overloaded: bool, succeeded: bool):
+        """요청 종료 (과부하면 창을 절반으로, 성공이면 1/window만큼 키움)"""
+        self.in_flight -= 1
+        if overloaded:
+            self.counters['overloads'] += 1
+            # 마지막으로 줄인 뒤에 시작한 요청의 실패만 반영 (같은 혼잡으로 여러 번 줄이지 않도록)
+            if started_at >= self._decreased_at:
+                self.window = max(float(self.min_window), self.window / 2)
+                self._decreased_at = time.monotonic()
+                self.counters['decreases'] += 1
+                logger.info(f"{self.host} 과부하 응답으로 동시 요청 창 축소: {self.window:.1f}")
+        elif succeeded:
+            self.window = min(float(self.max_window), self.window + 1 / self.window)
+        self._wake_next()
+
+    def pause(self, retry_after: str):
+        """Retry-After(초) 동안 새 요청을 보내지 않음 (HTTP 날짜 형식은 무시)"""
+        try:
+            seconds = min(float(retry_after), MAX_RETRY_AFTER)
+        except ValueError:
+            return
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        logger.warning(f"{self.host} Retry-After {seconds:.1f}s 동안 요청 중지")
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill(time.monotonic())
+        return {
+            'queue_depth': self.queue_depth,
+            'in_flight': self.in_flight,
+            'window': round(self.window, 2),
+            'tokens': round(self.tokens, 2),
+            **self.counters
+        }
+
+class RateLimiter:
+    """URL의 호스트별 HostLimiter 모음 (configure()로 호스트별 설정, 나머지는 기본값)"""
+
+    def __init__(self, **defaults):
+        self.defaults = defaults
+        self._options: Dict[str, Dict[str, Any]] = {}
+        self._limiters: Dict[str, HostLimiter] = {}
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return urlsplit(url).netloc.lower()
+
+    def configure(self, host: str, **options):
+        """호스트별 설정 (이미 만든 limiter는 다음 요청부터 새 설정으로 교체)"""
+        self._options[host] = options
+        self._limiters.pop(host, None)
+
+    def for_url(self, url: str) -> HostLimiter:
+        host = self.host_of(url)
+        limiter = self._limiters.get(host)
+        if limiter is None:
+            limiter = self._limiters[host] = HostLimiter(host, **{**self.defaults, **self._options.get(host, {})})
+        return limiter
+
+    async def acquire(self, url: str, timeout: Optional[float] = None) -> Permit:
+        return await self.for_url(url).acquire(timeout)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """호스트별 대기열 길이, 창 크기, 카운터"""
+        return {host: limiter.stats() for host, limiter in list(self._limiters.items())}
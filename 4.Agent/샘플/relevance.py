@@ -0,0 +1,126 @@
+import re
+from collections import Counter
+from typing import Dict, List, Any, Sequence, Tuple
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 영문/숫자 단어 또는 한글 음절 연속 구간
+_TOKEN_RE = re.compile(r"[0-9a-z_]+|[가-힣]+")
+# 어디에나 나타나 점수를 왜곡하는 영어 불용어
+STOPWORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is',
+    'it', 'of', 'on', 'or', 'the', 'to', 'with'
+})
+
+# 필드 이름 → (결과 dict에서 찾을 키 목록, 가중치)
+WEB_FIELDS = {
+    'title': (('title',), 2.0),
+    'snippet': (('snippet',), 1.0)
+}
+DOC_FIELDS = {
+    'title': (('title',), 2.0),
+    'content': (('content', 'snippet'), 1.0),
+    'code': (('code', 'code_snippet'), 1.0)
+}
+
+def tokenize(text: str) -> List[str]:
+    """검색용 토큰화
+
+    영문은 소문자 단어 단위(한 글자 단어와 불용어 제외), 한글은 조사/어미가 붙어도
+    매칭되도록 음절 bigram으로 나눕니다. 예: "비동기" → ["비동", "동기"]
+    """
+    tokens = []
+    for word in _TOKEN_RE.findall(text.lower()):
+        if '가' <= word[0] <= '힣':
+            if len(word) == 1:
+                tokens.append(word)
+            else:
+                tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        elif len(word) > 1 and word not in STOPWORDS:
+            tokens.append(word)
+    return tokens
+
+def _field_text(result: Dict[str, Any], keys: Sequence[str]) -> str:
+    """후보 키 중 처음으로 값이 있는 필드의 텍스트"""
+    for key in keys:
+        value = result.get(key)
+        if value:
+            return str(value)
+    return ''
+
+class BatchIndex:
+    """결과 묶음 하나에 대한 필드별 메모리 역색인
+
+    각 결과의 각 필드를 한 번만 토큰화해 term → (문서 번호 배열, 출현 횟수 배열)로 보관합니다.
+    """
+    
+    def __init__(self, documents: List[Dict[str, Any]], fields: Dict[str, Tuple[Sequence[str], float]]):
+        self.size = len(documents)
+        self.lengths: Dict[str, np.ndarray] = {}
+        self.postings: Dict[str, Dict[str, Tuple[np.ndarray, np.ndarray]]] = {}
+        
+        for field, (keys, _) in fields.items():
+            lengths = np.zeros(self.size, dtype=np.float64)
+            postings: Dict[str, Tuple[List[int], List[int]]] = {}
+            for doc_id, document in enumerate(documents):
+                tokens = tokenize(_field_text(document, keys))
+                lengths[doc_id] = len(tokens)
+                for term, count in Counter(tokens).items():
+                    ids, counts = postings.setdefault(term, ([], []))
+                    ids.append(doc_id)
+                    counts.append(count)
+            
+            self.lengths[field] = lengths
+            self.postings[field] = {
+                term: (np.asarray(ids, dtype=np.int32), np.asarray(counts, dtype=np.float64))
+                for term, (ids, counts) in postings.items()
+            }
+    
+    def term_matrix(self, field: str, terms: Sequence[str]) -> np.ndarray:
+        """문서 × 질의어 출현 횟수 행렬"""
+        matrix = np.zeros((self.size, len(terms)), dtype=np.float64)
+        postings = self.postings[field]
+        for column, term in enumerate(terms):
+            entry = postings.get(term)
+            if entry is not None:
+                matrix[entry[0], column] = entry[1]
+        return matrix
+
+class BM25FScorer:
+    """필드 가중치를 적용한 BM25F 관련도 계산기
+
+    결과 묶음 전체를 NumPy로 한 번에 계산하며, 점수는 질의어 idf 합(이론상 최대값)으로
+    나눠 0~1 범위로 정규화합니다. 그래서 웹/문서 결과를 같은 척도로 통합 정렬할 수 있습니다.
+    """
+    
+    def __init__(self, fields: Dict[str, Tuple[Sequence[str], float]], k1: float = 1.2, b: float = 0.75):
+        self.fields = fields
+        self.k1 = k1
+        self.b = b
+    
+    def score(self, query: str, documents: List[Dict[str, Any]]) -> np.ndarray:
+        """문서별 관련도 점수 (0~1)"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not documents:
+            return np.zeros(len(documents), dtype=np.float64)
+        
+        index = BatchIndex(documents, self.fields)
+        weighted_tf = np.zeros((index.size, len(terms)), dtype=np.float64)
+        for field, (_, weight) in self.fields.items():
+            lengths = index.lengths[field]
+            average = lengths.mean() or 1.0
+            length_norm = 1.0 - self.b + self.b * lengths / average
+            weighted_tf += weight * index.term_matrix(field, terms) / length_norm[:, None]
+        
+        document_frequency = np.count_nonzero(weighted_tf, axis=0)
+        idf = np.log1p((index.size - document_frequency + 0.5) / (document_frequency + 0.5))
+        saturated = weighted_tf / (self.k1 + weighted_tf)
+        # tf 포화값은 1 미만이므로 idf 합이 도달 가능한 최대 점수
+        return saturated @ idf / idf.sum()
+
+def score_results(query: str, results: List[Dict[str, Any]], scorer: BM25FScorer) -> List[float]:
+    """결과 목록의 관련도 점수를 파이썬 float 목록으로 반환"""
+    return [round(float(score), 4) for score in scorer.score(query, results)]
@@ -0,0 +1,282 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple, Callable, Awaitable
+import logging
+from search_models import SearchResult
+
+logger = logging.getLogger(__name__)
+
+# 엔진별 캐시 유효 시간 (초) - 웹은 짧게, 문서는 길게
+DEFAULT_TTLS = {
+    'web': 300,
+    'docs': 86400
+}
+# 유효 시간이 지난 뒤에도 응답은 즉시 주고 백그라운드에서 갱신하는 기간 (초)
+DEFAULT_STALE_TTLS = {
+    'web': 3600,
+    'docs': 7 * 86400
+}
+# stale 기간이 지난 뒤에도 엔진 장애 때 "이전 결과"로 쓰기 위해 디스크에 남겨 두는 기간 (초)
+LAST_GOOD_RETENTION = 30 * 86400
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_DB_PATH = os.environ.get(
+    'SEARCH_CACHE_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'search_cache.db')
+)
+
+# (결과, fresh_until, stale_until)
+CacheEntry = Tuple[List[SearchResult], float, float]
+
+def normalize_query(query: str) -> str:
+    """캐시 키용 검색어 정규화 (유니코드 NFKC, 소문자, 공백 정리)"""
+    return ' '.join(unicodedata.normalize('NFKC', query).lower().split())
+
+def make_cache_key(engine: str, query: str, limit: int, filters: Optional[Dict[str, str]] = None) -> str:
+    """엔진 + 정규화된 검색어 + 결과 수 (+ 필터)로 캐시 키 생성"""
+    key = f"{engine}:{limit}:{normalize_query(query)}"
+    if filters:
+        key += ''.join(f"|{name}={value.lower()}" for name, value in sorted(filters.items()) if value)
+    return key
+
+class LRUCache:
+    """크기가 제한된 메모리 LRU 캐시"""
+    
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+    
+    def set(self, key: str, entry: CacheEntry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def clear(self):
+        self._entries.clear()
+
+class SQLiteCache:
+    """프로세스 재시작 후에도 유지되는 SQLite 디스크 캐시"""
+    
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "fresh_until REAL NOT NULL, stale_until REAL NOT NULL)"
+        )
+        self._conn.commit()
+    
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, fresh_until, stale_until FROM search_cache WHERE key = ?",
+                (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1], row[2]
+    
+    def set(self, key: str, entry: CacheEntry):
+        value, fresh_until, stale_until = entry
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, value, fresh_until, stale_until) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), fresh_until, stale_until)
+            )
+            self._conn.commit()
+    
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """stale 기간이 지나고 LAST_GOOD_RETENTION까지 지난 항목 삭제"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM search_cache WHERE stale_until < ?",
+                ((now or time.time()) - LAST_GOOD_RETENTION,)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+    
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM search_cache")
+            self._conn.commit()
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class SearchCache:
+    """검색 결과 2단계 캐시 (메모리 LRU + SQLite)
+
+    유효 시간(TTL) 안이면 캐시 결과를 바로 반환하고, TTL이 지났지만 stale 기간 안이면
+    기존 결과를 반환하면서 백그라운드에서 갱신합니다(stale-while-revalidate).
+    stale 기간이 지난 항목도 get_last_good()으로 엔진 장애 때 쓸 수 있도록 한동안 남겨 둡니다.
+    """
+    
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, stale_ttls: Optional[Dict[str, float]] = None,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, db_path: Optional[str] = DEFAULT_DB_PATH):
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.stale_ttls = {**DEFAULT_STALE_TTLS, **(stale_ttls or {})}
+        self.memory = LRUCache(max_entries)
+        self.db_path = db_path
+        self._disk: Optional[SQLiteCache] = None
+        self._disk_opened = not db_path
+        
+        self.counters = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'refresh_errors': 0,
+            'last_good_hits': 0
+        }
+        self._refreshing: Dict[str, asyncio.Task] = {}
+    
+    @property
+    def disk(self) -> Optional[SQLiteCache]:
+        """SQLite 디스크 캐시 (처음 조회/저장할 때 파일을 열고, 열 수 없으면 None)"""
+        if not self._disk_opened:
+            self._disk_opened = True
+            try:
+                self._disk = SQLiteCache(self.db_path)
+                self._disk.purge_expired()
+            except Exception as e:
+                logger.warning(f"디스크 캐시를 사용할 수 없습니다 ({self.db_path}): {e}")
+                self._disk = None
+        return self._disk
+    
+    def _lookup(self, key: str) -> Tuple[Optional[CacheEntry], Optional[str]]:
+        """메모리 → 디스크 순으로 조회 (디스크 적중 시 메모리로 승격)"""
+        entry = self.memory.get(key)
+        if entry is not None:
+            return entry, 'memory'
+        
+        if self.disk is not None:
+            try:
+                entry = self.disk.get(key)
+            except Exception as e:
+                logger.warning(f"디스크 캐시 조회 실패: {e}")
+                entry = None
+            if entry is not None:
+                results, fresh_until, stale_until = entry
+                entry = ([SearchResult.from_dict(result) for result in results], fresh_until, stale_until)
+                self.memory.set(key, entry)
+                return entry, 'disk'
+        return None, None
+    
+    def put(self, engine: str, key: str, results: List[SearchResult]):
+        """결과 저장 (빈 결과는 실패일 수 있으므로 저장하지 않음)"""
+        if not results:
+            return
+        now = time.time()
+        fresh_until = now + self.ttls.get(engine, DEFAULT_TTLS['web'])
+        entry = (results, fresh_until, fresh_until + self.stale_ttls.get(engine, 0))
+        self.memory.set(key, entry)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, ([result.to_dict() for result in results], entry[1], entry[2]))
+            except Exception as e:
+                logger.warning(f"디스크 캐시 저장 실패: {e}")
+    
+    async def get_or_fetch(self, engine: str, query: str, limit: int,
+                           fetch: Callable[[], Awaitable[List[SearchResult]]],
+                           filters: Optional[Dict[str, str]] = None) -> List[SearchResult]:
+        """캐시에서 결과를 찾고, 없으면 fetch로 가져와 저장"""
+        key = make_cache_key(engine, query, limit, filters)
+        entry, tier = self._lookup(key)
+        now = time.time()
+        
+        if entry is not None:
+            results, fresh_until, stale_until = entry
+            if now < stale_until:
+                self.counters[f'{tier}_hits'] += 1
+                if now >= fresh_until:
+                    self.counters['stale_hits'] += 1
+                    self._schedule_refresh(engine, key, fetch)
+                return self._copy(results)
+        
+        self.counters['misses'] += 1
+        results = await fetch()
+        self.put(engine, key, results)
+        return self._copy(results)
+    
+    def get_last_good(self, engine: str, query: str, limit: int,
+                      filters: Optional[Dict[str, str]] = None) -> Optional[List[SearchResult]]:
+        """유효 기간과 상관없이 이 검색어의 마지막 정상 결과 (없으면 None)"""
+        entry, _ = self._lookup(make_cache_key(engine, query, limit, filters))
+        if entry is None:
+            return None
+        self.counters['last_good_hits'] += 1
+        return self._copy(entry[0])
+    
+    def _schedule_refresh(self, engine: str, key: str, fetch: Callable[[], Awaitable[List[SearchResult]]]):
+        """같은 키는 한 번만 백그라운드 갱신"""
+        if key in self._refreshing:
+            return
+        
+        async def refresh():
+            try:
+                self.put(engine, key, await fetch())
+                self.counters['refreshes'] += 1
+            except Exception as e:
+                self.counters['refresh_errors'] += 1
+                logger.warning(f"캐시 백그라운드 갱신 실패 ({key}): {e}")
+            finally:
+                self._refreshing.pop(key, None)
+        
+        self._refreshing[key] = asyncio.create_task(refresh())
+    
+    @staticmethod
+    def _copy(results: List[SearchResult]) -> List[SearchResult]:
+        """목록만 새로 만들고 결과 객체는 공유 (결과는 읽기 전용)"""
+        return list(results)
+    
+    def stats(self) -> Dict[str, Any]:
+        """적중/미적중/제거 횟수 및 크기"""
+        hits = self.counters['memory_hits'] + self.counters['disk_hits']
+        lookups = hits + self.counters['misses']
+        return {
+            **self.counters,
+            'hits': hits,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'evictions': self.memory.evictions,
+            'memory_entries': len(self.memory),
+            'disk_enabled': self._disk is not None or not self._disk_opened
+        }
+    
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+    
+    def close(self):
+        for task in self._refreshing.values():
+            task.cancel()
+        self._refreshing.clear()
+        # 아직 열지 않았으면 닫으면서 파일을 새로 만들지 않음
+        self._disk_opened = True
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
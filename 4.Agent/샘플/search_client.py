@@ -0,0 +1,187 @@
+"""검색 서비스(search_service.py) 비동기 클라이언트
+
+SearchAggregator와 같은 이름의 메서드(search_all, search_web_only, search_docs_only, search_stream)를
+제공하므로 Streamlit 앱은 SEARCH_SERVICE_URL이 있을 때 이 클라이언트로 바꿔 쓰기만 하면 됩니다.
+검색 엔진, MCP 서버, 캐시는 서비스 프로세스 하나가 갖고, 이 모듈은 search_engines / mcp_client를
+임포트하지 않습니다.
+
+주소 형식:
+    http://127.0.0.1:8765
+    unix:///tmp/search_service.sock
+
+요청마다 X-Request-Id 헤더로 요청 번호를 보내고, 서버에는 timeout을 함께 보내 서버가 먼저
+시간 초과(504)로 응답하도록 합니다.
+"""
+import asyncio
+import uuid
+from typing import Dict, List, Any, AsyncIterator, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+import logging
+import aiohttp
+
+from mcp_transport import LineFramer, MCPTransportError, loads_bytes
+from search_models import SearchResult, SearchResponse
+
+logger = logging.getLogger(__name__)
+
+# 서비스와 클라이언트가 함께 쓰는 요청 번호 헤더
+REQUEST_ID_HEADER = 'X-Request-Id'
+DEFAULT_SERVICE_TIMEOUT = 30.0   # 요청 하나의 서버 처리 시간 한도 (초)
+CLIENT_TIMEOUT_MARGIN = 5.0      # 서버의 504 응답을 받을 수 있도록 클라이언트가 더 기다리는 시간 (초)
+
+class SearchServiceError(Exception):
+    """검색 서비스 오류 응답 또는 연결 실패"""
+
+    def __init__(self, message: str, status: Optional[int] = None, request_id: Optional[str] = None):
+        super().__init__(message)
+        self.status = status
+        self.request_id = request_id
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex
+
+def parse_service_url(url: str) -> Tuple[str, Optional[str]]:
+    """(HTTP 기본 주소, 유닉스 소켓 경로) - unix:// 주소면 소켓 경로를 돌려줌"""
+    parts = urlsplit(url)
+    if parts.scheme == 'unix':
+        return 'http://localhost', parts.path
+    return url.rstrip('/'), None
+
+class SearchServiceClient:
+    """검색 서비스 HTTP 클라이언트 (SimpleMCPClient처럼 이벤트 루프별 공유 세션 사용)"""
+
+    def __init__(self, url: str, timeout: float = DEFAULT_SERVICE_TIMEOUT):
+        self.url = url
+        self.base_url, self.socket_path = parse_service_url(url)
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def __aenter__(self):
+        await self._get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """공유 세션 반환 (없거나 다른 이벤트 루프의 세션이면 새로 생성)"""
+        loop = asyncio.get_running_loop()
+        if self._session is not None and not self._session.closed and self._session_loop is loop:
+            return self._session
+        if self._session is not None and not self._session.closed:
+            try:
+                await self._session.close()
+            except Exception:
+                pass
+
+        if self.socket_path:
+            connector = aiohttp.UnixConnector(path=self.socket_path)
+        else:
+            connector = aiohttp.TCPConnector()
+        self._session = aiohttp.ClientSession(connector=connector)
+        self._session_loop = loop
+        return self._session
+
+    async def aclose(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+
+    def _timeout(self, timeout: Optional[float]) -> float:
+        return self.timeout if timeout is None else timeout
+
+    async def _post(self, path: str, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """JSON 요청을 보내고 응답 본문 반환 (오류 응답이면 SearchServiceError)"""
+        timeout = self._timeout(timeout)
+        request_id = new_request_id()
+        session = await self._get_session()
+        try:
+            async with session.post(
+                f"{self.base_url}{path}",
+                json={**payload, 'timeout': timeout},
+                headers={REQUEST_ID_HEADER: request_id},
+                timeout=aiohttp.ClientTimeout(total=timeout + CLIENT_TIMEOUT_MARGIN)
+            ) as response:
+                data = await response.json(content_type=None)
+                if response.status != 200:
+                    raise SearchServiceError(
+                        f"검색 서비스 오류 ({response.status}): {data.get('error', '')}", response.status, request_id
+                    )
+                return data
+        except SearchServiceError:
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            raise SearchServiceError(f"검색 서비스 요청 실패 ({self.url}): {e!r}", request_id=request_id) from e
+
+    async def search_all(self, query: str, web_results: int = 10, doc_results: int = 50,
+                         deadline: Optional[float] = None, hedge: Optional[bool] = None,
+                         timeout: Optional[float] = None) -> SearchResponse:
+        """SearchAggregator.search_all과 같은 통합 검색"""
+        data = await self._post('/search', {
+            'mode': 'all', 'query': query, 'web_results': web_results, 'doc_results': doc_results,
+            'deadline': deadline, 'hedge': hedge
+        }, timeout)
+        return SearchResponse.from_dict(data['response'])
+
+    async def search_web_only(self, query: str, max_results: int = 10,
+                              timeout: Optional[float] = None) -> List[SearchResult]:
+        data = await self._post('/search', {'mode': 'web', 'query': query, 'web_results': max_results}, timeout)
+        return SearchResponse.from_dict(data['response']).web_results
+
+    async def search_docs_only(self, query: str, max_results: int = 50, library: Optional[str] = None,
+                               language: Optional[str] = None, timeout: Optional[float] = None) -> List[SearchResult]:
+        data = await self._post('/search', {
+            'mode': 'docs', 'query': query, 'doc_results': max_results, 'library': library, 'language': language
+        }, timeout)
+        return SearchResponse.from_dict(data['response']).doc_results
+
+    async def search_stream(self, query: str, web_results: int = 10, doc_results: int = 50,
+                            engines: Sequence[str] = ('web', 'docs'),
+                            timeout: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        """SearchAggregator.search_stream과 같은 형식의 엔진별 결과를 도착하는 대로 yield
+
+        서버는 한 줄에 JSON 하나(NDJSON)를 보내고 마지막에 {"done": true} 줄을 보냅니다.
+        결과 줄은 줄 길이 제한이 있는 readline() 대신 MCP 전송 계층의 LineFramer로 나눠 읽으므로
+        큰 줄이 잘게 나뉘어 와도 이미 검사한 구간을 다시 복사하거나 찾지 않습니다.
+        """
+        timeout = self._timeout(timeout)
+        request_id = new_request_id()
+        session = await self._get_session()
+        try:
+            async with session.post(
+                f"{self.base_url}/search/stream",
+                json={'query': query, 'web_results': web_results, 'doc_results': doc_results,
+                      'engines': list(engines), 'timeout': timeout},
+                headers={REQUEST_ID_HEADER: request_id},
+                timeout=aiohttp.ClientTimeout(total=timeout + CLIENT_TIMEOUT_MARGIN)
+            ) as response:
+                if response.status != 200:
+                    data = await response.json(content_type=None)
+                    raise SearchServiceError(
+                        f"검색 서비스 오류 ({response.status}): {data.get('error', '')}", response.status, request_id
+                    )
+                framer = LineFramer()
+                async for chunk in response.content.iter_any():
+                    # memoryview는 다음 메시지 전까지만 유효하므로 청크의 줄을 먼저 모두 파싱
+                    for record in [loads_bytes(message) for message in framer.feed(chunk)]:
+                        if record.get('done'):
+                            return
+                        yield {
+                            'engine': record['engine'],
+                            'results': [SearchResult.from_dict(result) for result in record['results']],
+                            'error': record.get('error'),
+                            'stale': record.get('stale', False)
+                        }
+        except SearchServiceError:
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, MCPTransportError) as e:
+            raise SearchServiceError(f"검색 서비스 요청 실패 ({self.url}): {e!r}", request_id=request_id) from e
+        raise SearchServiceError("검색 서비스 응답이 중간에 끊겼습니다", request_id=request_id)
+
+    async def health(self) -> Dict[str, Any]:
+        """서비스 상태 ({"status": "ok" | "draining", "in_flight": ...})"""
+        session = await self._get_session()
+        async with session.get(f"{self.base_url}/healthz", timeout=aiohttp.ClientTimeout(total=CLIENT_TIMEOUT_MARGIN)) as response:
+            return await response.json(content_type=None)
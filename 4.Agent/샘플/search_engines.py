@@ -1,20 +1,69 @@
 import asyncio
-import re
-from typing import List, Dict, Any, Optional
+import collections
+import time
+from typing import List, Dict, Any, Optional, AsyncIterator, Iterable, Sequence, Tuple
 from datetime import datetime
 import logging
 from mcp_client_simple import simple_mcp_client
+from circuit_breaker import CircuitBreakerRegistry
+from mcp_client import mcp_client
+from engine_registry import EngineRegistry, register_engine_type
+from search_cache import SearchCache, make_cache_key
+from singleflight import SingleFlight
+from dedup import ResultDeduplicator
+from metrics import LatencyHistogram, metrics_registry
+from relevance import BM25FScorer, WEB_FIELDS, DOC_FIELDS, score_results
+from doc_index import DocIndex, DEFAULT_INDEX_DIR
+from search_models import SearchResult, SearchResponse, ENGINE_OK, ENGINE_STALE
 
 logger = logging.getLogger(__name__)
 
+# search_many 기본 동시 검색 수
+DEFAULT_BATCH_CONCURRENCY = 8
+
+# 헤지 요청: 첫 호출이 엔진의 관측 p95를 넘기면 같은 요청을 한 번 더 보냄
+HEDGE_PERCENTILE = 95
+HEDGE_MIN_SAMPLES = 20  # 표본이 이보다 적으면 헤지하지 않음
+
+class EngineError(Exception):
+    """엔진 upstream 호출 실패 (오류 응답, 응답 없음 등)"""
+
+class EngineUnavailableError(EngineError):
+    """엔진 호출이 실패했고 이 검색어의 이전 결과도 없음"""
+
+def _format_web_results(results: List[Dict[str, Any]], scores: List[float], source: str) -> List[SearchResult]:
+    """웹 검색 결과 dict 목록을 SearchResult로 변환 (타임스탬프는 묶음 전체가 하나를 공유)"""
+    timestamp = datetime.now().isoformat()
+    return [
+        SearchResult(
+            rank=i,
+            title=result.get('title', '제목 없음'),
+            url=result.get('url', ''),
+            snippet=result.get('snippet', '요약 없음'),
+            source=source,
+            timestamp=timestamp,
+            relevance_score=score
+        )
+        for i, (result, score) in enumerate(zip(results, scores), 1)
+    ]
+
 class WebSearchEngine:
-    """DuckDuckGo 웹 검색 엔진"""
+    """DuckDuckGo 웹 검색 엔진
     
-    def __init__(self):
+    rate_limit(searchEngines 설정의 같은 이름 항목)을 주면 DuckDuckGo 호스트의 요청 제한
+    (rate, burst, initial_window, min_window, max_window, max_queue, queue_timeout)을 바꿉니다.
+    """
+    
+    def __init__(self, rate_limit: Optional[Dict[str, Any]] = None):
         self.name = "DuckDuckGo"
         self.max_results = 10
+        self.scorer = BM25FScorer(WEB_FIELDS)
+        if rate_limit:
+            simple_mcp_client.rate_limiter.configure(
+                simple_mcp_client.rate_limiter.host_of(simple_mcp_client.web_search_url), **rate_limit
+            )
     
-    async def search(self, query: str, max_results: int = None) -> List[Dict[str, Any]]:
+    async def search(self, query: str, max_results: int = None) -> List[SearchResult]:
         """웹 검색 수행"""
         try:
             results = await simple_mcp_client.search_web_direct(
@@ -22,147 +71,440 @@ class WebSearchEngine:
                 max_results or self.max_results
             )
             
-            # 결과 포맷팅
-            formatted_results = []
-            for i, result in enumerate(results, 1):
-                formatted_result = {
-                    'rank': i,
-                    'title': result.get('title', '제목 없음'),
-                    'url': result.get('url', ''),
-                    'snippet': result.get('snippet', '요약 없음'),
-                    'source': '웹 검색',
-                    'timestamp': datetime.now().isoformat(),
-                    'relevance_score': self._calculate_relevance(query, result)
-                }
-                formatted_results.append(formatted_result)
+            # 관련도는 결과 묶음 전체를 한 번에 계산
+            with metrics_registry.span('relevance', engine='web'):
+                scores = score_results(query, results, self.scorer)
             
+            formatted_results = _format_web_results(results, scores, '웹 검색')
             logger.info(f"웹 검색 완료: {len(formatted_results)}개 결과")
             return formatted_results
             
         except Exception as e:
+            # 빈 결과로 감추지 않고 전달 (SearchAggregator가 서킷 브레이커와 이전 결과로 처리)
+            metrics_registry.increment('errors', stage='engine', engine='web')
             logger.error(f"웹 검색 실패: {e}")
-            return []
+            raise
+    
+    async def aclose(self):
+        """유휴 종료 시 HTTP 연결 풀 반환 (다음 검색 때 다시 생성)"""
+        await simple_mcp_client.aclose()
+    
+class MCPSearchEngine:
+    """mcp_config.json의 MCP 서버로 검색하는 엔진 (서버는 첫 검색 때 시작)"""
+    
+    def __init__(self, server: str, source: str = '웹 검색', method: str = 'search', max_results: int = 10):
+        self.name = server
+        self.server = server
+        self.source = source
+        self.method = method
+        self.max_results = max_results
+        self.scorer = BM25FScorer(WEB_FIELDS)
+    
+    async def search(self, query: str, max_results: int = None, **filters: str) -> List[SearchResult]:
+        """MCP 서버 검색 수행 (filters는 요청 인자로 그대로 전달)"""
+        try:
+            response = await mcp_client.send_request(
+                self.server,
+                self.method,
+                {"query": query, "max_results": max_results or self.max_results, **filters}
+            )
+            if response is None:
+                raise EngineError(f"MCP 서버 '{self.server}' 응답 없음")
+            if 'error' in response:
+                raise EngineError(f"MCP 서버 '{self.server}' 오류: {response['error']}")
+            results = response.get('result')
+            if not isinstance(results, list):
+                results = []
+            
+            with metrics_registry.span('relevance', engine=self.server):
+                scores = score_results(query, results, self.scorer)
+            
+            formatted_results = _format_web_results(results, scores, self.source)
+            logger.info(f"MCP 검색 완료 ({self.server}): {len(formatted_results)}개 결과")
+            return formatted_results
+            
+        except Exception as e:
+            metrics_registry.increment('errors', stage='engine', engine=self.server)
+            logger.error(f"MCP 검색 실패 ({self.server}): {e}")
+            raise
     
-    def _calculate_relevance(self, query: str, result: Dict[str, Any]) -> float:
-        """관련도 점수 계산"""
-        title = result.get('title', '').lower()
-        snippet = result.get('snippet', '').lower()
-        query_terms = query.lower().split()
-        
-        score = 0.0
-        for term in query_terms:
-            if term in title:
-                score += 0.5
-            if term in snippet:
-                score += 0.3
-        
-        return min(score, 1.0)
-
 class TechDocSearchEngine:
-    """Context7 기술 문서 검색 엔진"""
+    """Context7 기술 문서 검색 엔진
+    
+    로컬 문서 인덱스(doc_index.py build로 생성)가 있으면 네트워크 없이 인덱스에서 찾고,
+    없으면 기존 모의 문서 검색을 사용합니다.
+    """
     
-    def __init__(self):
+    def __init__(self, index_dir: str = DEFAULT_INDEX_DIR):
         self.name = "Context7"
         self.max_results = 100
+        self.scorer = BM25FScorer(DOC_FIELDS)
+        self.index_dir = index_dir
+        self._index: Optional[DocIndex] = None
+        self._index_stamp = None
     
-    async def search(self, query: str, max_results: int = None) -> List[Dict[str, Any]]:
-        """기술 문서 검색 수행"""
+    def _get_index(self) -> Optional[DocIndex]:
+        """로컬 문서 인덱스 (없으면 None, 다시 생성되었으면 새로 열기)"""
+        stamp = DocIndex.manifest_stamp(self.index_dir)
+        if stamp != self._index_stamp:
+            if self._index is not None:
+                self._index.close()
+                self._index = None
+            if stamp is not None:
+                try:
+                    self._index = DocIndex(self.index_dir)
+                    logger.info(f"로컬 문서 인덱스 사용: {self.index_dir} ({self._index.size}개 문서)")
+                except Exception as e:
+                    logger.error(f"로컬 문서 인덱스 열기 실패: {e}")
+            self._index_stamp = stamp
+        return self._index
+    
+    async def search(self, query: str, max_results: int = None, library: Optional[str] = None,
+                     language: Optional[str] = None) -> List[SearchResult]:
+        """기술 문서 검색 수행 (library / language로 필터 가능)"""
         try:
-            results = await simple_mcp_client.search_docs_mock(
-                query, 
-                max_results or self.max_results
-            )
+            max_results = max_results or self.max_results
+            index = self._get_index()
+            if index is not None:
+                # 인덱스 조회는 1ms 안팎이라 이벤트 루프에서 바로 실행
+                with metrics_registry.span('doc_index', engine='docs'):
+                    results = index.search(query, max_results, library, language)
+            else:
+                results = await simple_mcp_client.search_docs_mock(query, max_results)
+                results = [
+                    result for result in results
+                    if (not library or result.get('library', '').lower() == library.lower())
+                    and (not language or result.get('language', '').lower() == language.lower())
+                ]
             
-            # 결과 포맷팅
-            formatted_results = []
-            for i, result in enumerate(results, 1):
-                formatted_result = {
-                    'rank': i,
-                    'title': result.get('title', '제목 없음'),
-                    'url': result.get('url', ''),
-                    'snippet': result.get('content', '내용 없음'),
-                    'source': '기술 문서',
-                    'timestamp': datetime.now().isoformat(),
-                    'relevance_score': self._calculate_relevance(query, result),
-                    'code_snippet': result.get('code', ''),
-                    'library': result.get('library', ''),
-                    'language': result.get('language', '')
-                }
-                formatted_results.append(formatted_result)
+            # 관련도는 결과 묶음 전체를 한 번에 계산 (인덱스 결과는 이미 점수가 있음)
+            if all('relevance_score' in result for result in results):
+                scores = [result['relevance_score'] for result in results]
+            else:
+                with metrics_registry.span('relevance', engine='docs'):
+                    scores = score_results(query, results, self.scorer)
+            
+            # 결과 포맷팅 (Context7는 content/code, 모의 데이터는 snippet/code_snippet 키 사용)
+            timestamp = datetime.now().isoformat()
+            formatted_results = [
+                SearchResult(
+                    rank=i,
+                    title=result.get('title', '제목 없음'),
+                    url=result.get('url', ''),
+                    snippet=result.get('content') or result.get('snippet') or '내용 없음',
+                    source='기술 문서',
+                    timestamp=timestamp,
+                    relevance_score=score,
+                    code_snippet=result.get('code') or result.get('code_snippet', ''),
+                    library=result.get('library', ''),
+                    language=result.get('language', '')
+                )
+                for i, (result, score) in enumerate(zip(results, scores), 1)
+            ]
             
             logger.info(f"기술 문서 검색 완료: {len(formatted_results)}개 결과")
             return formatted_results
             
         except Exception as e:
+            metrics_registry.increment('errors', stage='engine', engine='docs')
             logger.error(f"기술 문서 검색 실패: {e}")
-            return []
-    
-    def _calculate_relevance(self, query: str, result: Dict[str, Any]) -> float:
-        """관련도 점수 계산"""
-        title = result.get('title', '').lower()
-        content = result.get('content', '').lower()
-        code = result.get('code', '').lower()
-        query_terms = query.lower().split()
-        
-        score = 0.0
-        for term in query_terms:
-            if term in title:
-                score += 0.4
-            if term in content:
-                score += 0.3
-            if term in code:
-                score += 0.3
-        
-        return min(score, 1.0)
-
+            raise
+    
+    async def aclose(self):
+        """유휴 종료 시 문서 인덱스 메모리 맵 해제 (다음 검색 때 다시 열기)"""
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+        self._index_stamp = None
+    
 class SearchAggregator:
-    """통합 검색 시스템"""
+    """통합 검색 시스템
+    
+    엔진은 EngineRegistry(mcp_config.json의 searchEngines)에서 처음 쓰일 때 만들어집니다.
+    dedup이 True면 URL이 같거나 요약이 거의 같은 결과를 엔진 사이에서도 하나로 합칩니다.
+    
+    엔진 호출은 엔진별 서킷 브레이커(설정의 circuit_breaker 항목)를 거칩니다. 엔진이 실패하거나
+    서킷이 열려 있으면 캐시에 남은 이 검색어의 마지막 정상 결과를 stale로 표시해 반환하고,
+    그것도 없으면 그 엔진을 사용 불가(unavailable)로 표시합니다.
+    """
     
-    def __init__(self):
-        self.web_engine = WebSearchEngine()
-        self.doc_engine = TechDocSearchEngine()
+    def __init__(self, cache: Optional[SearchCache] = None, hedge: bool = False,
+                 registry: Optional[EngineRegistry] = None, dedup: bool = True):
+        self.registry = registry if registry is not None else EngineRegistry()
+        self.cache = cache if cache is not None else SearchCache()
+        self.single_flight = SingleFlight()
+        self.hedge = hedge
+        self.dedup = dedup
+        self.breakers = CircuitBreakerRegistry(options_for=self._breaker_options)
+        self.latency: Dict[str, LatencyHistogram] = collections.defaultdict(LatencyHistogram)
+        self.counters = {
+            'searches': 0,
+            'partial_responses': 0,
+            'hedged_requests': 0,
+            'hedge_wins': 0,
+            'duplicates_merged': 0,
+            'stale_responses': 0,
+            'unavailable_responses': 0
+        }
     
-    async def search_all(self, query: str, web_results: int = 10, doc_results: int = 50) -> Dict[str, List[Dict[str, Any]]]:
-        """모든 검색 엔진에서 동시 검색"""
+    def _breaker_options(self, engine: str) -> Dict[str, Any]:
+        """엔진 설정의 circuit_breaker 항목 (failure_threshold, reset_timeout, half_open_calls)"""
+        slot = self.registry.slots.get(engine)
+        return dict(slot.config.get('circuit_breaker') or {}) if slot is not None else {}
+    
+    async def _search(self, engine: str, query: str, max_results: int, hedge: bool = False,
+                      filters: Optional[Dict[str, str]] = None) -> Tuple[List[SearchResult], str]:
+        """캐시 → 요청 병합 → (헤지) 엔진 호출 순으로 검색해 (결과, 상태) 반환
+        
+        엔진 호출이 실패하면 이 검색어의 마지막 정상 결과를 ENGINE_STALE 상태로 반환하고,
+        이전 결과가 없으면 EngineUnavailableError를 냅니다.
+        """
+        try:
+            results = await self.cache.get_or_fetch(
+                engine, query, max_results,
+                lambda: self.single_flight.do(
+                    make_cache_key(engine, query, max_results, filters),
+                    lambda: self._fetch(engine, query, max_results, hedge, filters)
+                ),
+                filters
+            )
+            return results, ENGINE_OK
+        except Exception as e:
+            stale = self.cache.get_last_good(engine, query, max_results, filters)
+            if stale is not None:
+                self.counters['stale_responses'] += 1
+                logger.warning(f"{engine} 검색 실패로 이전 결과 {len(stale)}개 사용: {e}")
+                return stale, ENGINE_STALE
+            self.counters['unavailable_responses'] += 1
+            raise EngineUnavailableError(f"{engine} 검색을 사용할 수 없습니다: {e}") from e
+    
+    def _deduplicate(self, deduplicator: Optional[ResultDeduplicator], results: List[SearchResult],
+                     engine: str) -> List[SearchResult]:
+        """앞서 받은 결과와 중복인 항목을 합친 목록 (dedup이 꺼져 있으면 그대로)"""
+        if deduplicator is None:
+            return results
+        merged_before = deduplicator.duplicates
+        with metrics_registry.span('dedup', engine=engine):
+            results = deduplicator.add(results)
+        self.counters['duplicates_merged'] += deduplicator.duplicates - merged_before
+        return results
+    
+    async def _call_engine(self, engine: str, query: str, max_results: int,
+                           filters: Optional[Dict[str, str]] = None) -> List[SearchResult]:
+        """엔진 호출 및 지연 시간 기록 (서킷이 열려 있으면 호출 없이 CircuitOpenError)"""
+        started_at = time.perf_counter()
+        async with self.breakers.get(engine).guard():
+            async with self.registry.use(engine) as search_engine:
+                results = await search_engine.search(query, max_results, **(filters or {}))
+        # 헤지로 취소된 호출은 기록하지 않아 분포가 짧은 쪽으로 치우치지 않게 함
+        elapsed = time.perf_counter() - started_at
+        self.latency[engine].observe(elapsed)
+        metrics_registry.observe('engine', elapsed, engine=engine)
+        return results
+    
+    def _hedge_delay(self, engine: str) -> Optional[float]:
+        """헤지 요청을 보낼 기준 시간 (표본이 부족하면 None)"""
+        histogram = self.latency[engine]
+        if histogram.count < HEDGE_MIN_SAMPLES:
+            return None
+        return histogram.percentile(HEDGE_PERCENTILE)
+    
+    async def _fetch(self, engine: str, query: str, max_results: int, hedge: bool,
+                     filters: Optional[Dict[str, str]] = None) -> List[SearchResult]:
+        """엔진 호출 (헤지 시 p95를 넘기면 중복 요청 후 먼저 성공한 결과 사용)
+
+        먼저 끝난 호출이 실패하면 남은 호출을 계속 기다리고, 모든 호출이 실패했을 때만 원 요청의 오류를 올립니다.
+        """
+        delay = self._hedge_delay(engine) if hedge else None
+        if delay is None:
+            return await self._call_engine(engine, query, max_results, filters)
+        
+        primary = asyncio.ensure_future(self._call_engine(engine, query, max_results, filters))
+        calls = [primary]
+        try:
+            done, _ = await asyncio.wait(calls, timeout=delay)
+            if not done:
+                self.counters['hedged_requests'] += 1
+                logger.info(f"{engine} 검색이 p95({delay:.3f}s)를 넘어 헤지 요청 전송")
+                calls.append(asyncio.ensure_future(self._call_engine(engine, query, max_results, filters)))
+            while True:
+                # 같은 차례에 함께 끝났으면 성공한 쪽(둘 다 성공이면 원 요청)을 사용
+                for task in calls:
+                    if task in done and task.exception() is None:
+                        if task is not primary:
+                            self.counters['hedge_wins'] += 1
+                        return task.result()
+                pending = [task for task in calls if not task.done()]
+                if not pending:
+                    return primary.result()
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in calls:
+                if not task.done():
+                    task.cancel()
+    
+    async def search_all(self, query: str, web_results: int = 10, doc_results: int = 50,
+                         deadline: Optional[float] = None, hedge: Optional[bool] = None) -> SearchResponse:
+        """모든 검색 엔진에서 동시 검색
+        
+        deadline(초)을 주면 그 시간 안에 끝난 엔진의 결과만 모아 partial로 표시해 반환합니다.
+        늦은 엔진은 취소하지 않고 마저 실행되어 캐시를 채웁니다.
+        hedge가 True면 엔진별 p95를 넘긴 호출에 한해 중복 요청을 보냅니다.
+        실패한 엔진은 이전 결과를 쓰면 stale_engines, 결과가 없으면 unavailable_engines에 표시됩니다.
+        """
+        hedge = self.hedge if hedge is None else hedge
+        self.counters['searches'] += 1
+        hedged_before = self.counters['hedged_requests']
+        started_at = time.perf_counter()
+        
         try:
             # 병렬 검색 실행
-            web_task = self.web_engine.search(query, web_results)
-            doc_task = self.doc_engine.search(query, doc_results)
+            tasks = {
+                'web': asyncio.ensure_future(self._search('web', query, web_results, hedge)),
+                'docs': asyncio.ensure_future(self._search('docs', query, doc_results, hedge))
+            }
             
-            web_results, doc_results = await asyncio.gather(
-                web_task, doc_task, return_exceptions=True
-            )
+            await asyncio.wait(tasks.values(), timeout=deadline)
             
-            # 예외 처리
-            if isinstance(web_results, Exception):
-                logger.error(f"웹 검색 오류: {web_results}")
-                web_results = []
+            results = {}
+            timed_out = []
+            stale = []
+            unavailable = []
+            # 웹 결과를 먼저 넣어 웹과 겹치는 문서 결과는 웹 결과 쪽으로 합침
+            deduplicator = ResultDeduplicator() if self.dedup else None
+            for engine, task in tasks.items():
+                if not task.done():
+                    # 마감 시간 초과: 결과는 버리지만 작업은 계속 진행되어 캐시에 저장됨
+                    timed_out.append(engine)
+                    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                    results[engine] = []
+                elif task.exception() is not None:
+                    logger.error(f"{engine} 검색 오류: {task.exception()}")
+                    unavailable.append(engine)
+                    results[engine] = []
+                else:
+                    engine_results, status = task.result()
+                    if status == ENGINE_STALE:
+                        stale.append(engine)
+                    results[engine] = self._deduplicate(deduplicator, engine_results, engine)
             
-            if isinstance(doc_results, Exception):
-                logger.error(f"문서 검색 오류: {doc_results}")
-                doc_results = []
+            if timed_out:
+                self.counters['partial_responses'] += 1
+                logger.warning(f"검색 마감 시간({deadline}s) 초과로 부분 결과 반환: {timed_out}")
             
-            return {
-                'web_results': web_results,
-                'doc_results': doc_results,
-                'total_results': len(web_results) + len(doc_results)
-            }
+            elapsed = time.perf_counter() - started_at
+            metrics_registry.observe('search_all', elapsed, engine='all')
+            return SearchResponse(
+                web_results=results['web'],
+                doc_results=results['docs'],
+                partial=bool(timed_out),
+                timed_out_engines=timed_out,
+                stale_engines=stale,
+                unavailable_engines=unavailable,
+                hedged_requests=self.counters['hedged_requests'] - hedged_before,
+                elapsed_seconds=elapsed
+            )
             
         except Exception as e:
+            metrics_registry.increment('errors', stage='search_all', engine='all')
             logger.error(f"통합 검색 실패: {e}")
-            return {
-                'web_results': [],
-                'doc_results': [],
-                'total_results': 0
-            }
+            return SearchResponse()
+    
+    async def search_stream(self, query: str, web_results: int = 10, doc_results: int = 50,
+                            engines: Sequence[str] = ('web', 'docs')) -> AsyncIterator[Dict[str, Any]]:
+        """엔진별 결과를 끝나는 순서대로 yield
+        
+        각 항목은 {'engine': 'web' | 'docs', 'results': [...], 'error': 오류 메시지 또는 None,
+        'stale': 엔진 실패로 이전 결과를 쓴 경우 True} 형태이며,
+        가장 빠른 엔진의 결과를 가장 느린 엔진을 기다리지 않고 바로 받을 수 있습니다.
+        먼저 도착한 결과와 겹치는 결과는 빠지고, 먼저 받은 목록의 항목에 출처가 합쳐집니다.
+        """
+        limits = {'web': web_results, 'docs': doc_results}
+        tasks = {
+            asyncio.ensure_future(self._search(engine, query, limits.get(engine, web_results))): engine
+            for engine in engines
+        }
+        pending = set(tasks)
+        deduplicator = ResultDeduplicator() if self.dedup else None
+        
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    engine = tasks[task]
+                    try:
+                        results, status = task.result()
+                        results = self._deduplicate(deduplicator, results, engine)
+                        batch = {'engine': engine, 'results': results, 'error': None, 'stale': status == ENGINE_STALE}
+                    except Exception as e:
+                        logger.error(f"{engine} 검색 오류: {e}")
+                        batch = {'engine': engine, 'results': [], 'error': str(e), 'stale': False}
+                    yield batch
+        finally:
+            # 소비자가 중간에 멈추면 남은 검색 취소
+            for task in pending:
+                task.cancel()
+    
+    async def search_many(self, queries: Iterable[str], concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+                          web_results: int = 10, doc_results: int = 50,
+                          deadline: Optional[float] = None) -> AsyncIterator[Tuple[int, str, SearchResponse]]:
+        """여러 검색어를 동시에 최대 concurrency개씩 통합 검색하고 끝나는 순서대로 yield
+        
+        각 항목은 (입력 순서, 검색어, SearchResponse)입니다. 같은 검색어는 캐시/요청 병합으로
+        한 번만 실제 검색됩니다. 소비자가 중간에 멈추면 남은 검색은 취소합니다.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        completed: asyncio.Queue = asyncio.Queue()
+        
+        async def run(index: int, query: str):
+            async with semaphore:
+                response = await self.search_all(query, web_results, doc_results, deadline)
+            await completed.put((index, query, response))
+        
+        tasks = [asyncio.ensure_future(run(index, query)) for index, query in enumerate(queries)]
+        try:
+            for _ in range(len(tasks)):
+                yield await completed.get()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
     
-    async def search_web_only(self, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
-        """웹 검색만 수행"""
-        return await self.web_engine.search(query, max_results)
+    async def search_web_only(self, query: str, max_results: int = 10) -> List[SearchResult]:
+        """웹 검색만 수행 (실패 시 이전 결과, 그것도 없으면 EngineUnavailableError)"""
+        results, _ = await self._search('web', query, max_results)
+        return self._deduplicate(ResultDeduplicator() if self.dedup else None, results, 'web')
     
-    async def search_docs_only(self, query: str, max_results: int = 50) -> List[Dict[str, Any]]:
-        """문서 검색만 수행"""
-        return await self.doc_engine.search(query, max_results)
+    async def search_docs_only(self, query: str, max_results: int = 50, library: Optional[str] = None,
+                               language: Optional[str] = None) -> List[SearchResult]:
+        """문서 검색만 수행 (library / language 필터 가능, 실패 시 처리는 search_web_only와 같음)"""
+        filters = {name: value for name, value in (('library', library), ('language', language)) if value}
+        results, _ = await self._search('docs', query, max_results, filters=filters or None)
+        return self._deduplicate(ResultDeduplicator() if self.dedup else None, results, 'docs')
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """캐시 적중/미적중/제거 통계"""
+        return self.cache.stats()
+    
+    def get_coalescing_stats(self) -> Dict[str, Any]:
+        """동시 동일 검색 병합(single-flight) 통계"""
+        return self.single_flight.stats()
+    
+    def get_latency_stats(self) -> Dict[str, Any]:
+        """엔진별 지연 시간 분포와 부분 응답/헤지 횟수"""
+        return {
+            'engines': {name: histogram.snapshot() for name, histogram in list(self.latency.items())},
+            **self.counters
+        }
+
+register_engine_type('duckduckgo', WebSearchEngine)
+register_engine_type('docs', TechDocSearchEngine)
+register_engine_type('mcp', MCPSearchEngine)
 
-# 전역 검색 어그리게이터 인스턴스
+# 전역 검색 어그리게이터 인스턴스 (엔진, 설정, 디스크 캐시는 처음 쓰일 때 준비)
 search_aggregator = SearchAggregator()
+metrics_registry.register_collector('cache', search_aggregator.get_cache_stats)
+metrics_registry.register_collector('coalescing', search_aggregator.get_coalescing_stats)
+metrics_registry.register_collector('aggregator', lambda: dict(search_aggregator.counters))
+metrics_registry.register_collector('engines', search_aggregator.registry.stats, label='engine')
+metrics_registry.register_collector('circuit', search_aggregator.breakers.stats, label='engine')
@@ -0,0 +1,223 @@
+"""검색 결과 모델
+
+검색 엔진이 만드는 결과를 dict 대신 __slots__ 객체로 보관합니다. 결과 하나마다 키 문자열과
+해시 테이블을 두지 않고, 같은 묶음의 결과는 타임스탬프 문자열 하나를 함께 참조합니다.
+기존 코드와의 호환을 위해 result['title'], result.get('library') 형태의 읽기와
+to_dict() 변환을 지원합니다.
+
+메모리 벤치마크:
+    python search_models.py [--count 10000]
+"""
+import argparse
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 엔진별 결과 상태 (search_stream 항목의 status, SearchAggregator 내부 표시)
+ENGINE_OK = 'ok'                  # 캐시 또는 엔진 호출로 얻은 현재 결과
+ENGINE_STALE = 'stale'            # 엔진 실패로 쓴 이 검색어의 마지막 정상 결과
+ENGINE_UNAVAILABLE = 'unavailable'  # 엔진 실패, 이전 결과도 없음
+
+class _FieldAccess:
+    """slot 필드를 dict처럼 읽기 위한 공통 메서드"""
+    
+    __slots__ = ()
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default) if key in self.__slots__ else default
+    
+    def keys(self) -> Sequence[str]:
+        return self.__slots__
+
+class SearchResult(_FieldAccess):
+    """검색 결과 하나 (엔진이 만든 뒤에는 읽기 전용으로 공유)"""
+    
+    __slots__ = ('rank', 'title', 'url', 'snippet', 'source', 'timestamp', 'relevance_score',
+                 'code_snippet', 'library', 'language', 'provenance')
+    
+    def __init__(self, rank: int, title: str, url: str, snippet: str, source: str, timestamp: str,
+                 relevance_score: float = 0.0, code_snippet: str = '', library: str = '', language: str = '',
+                 provenance: Sequence[Tuple[str, str]] = ()):
+        self.rank = rank
+        self.title = title
+        self.url = url
+        self.snippet = snippet
+        self.source = source
+        self.timestamp = timestamp
+        self.relevance_score = relevance_score
+        self.code_snippet = code_snippet
+        self.library = library
+        self.language = language
+        # 중복 제거로 이 결과에 합쳐진 다른 결과의 (출처, URL) 목록
+        self.provenance = tuple(tuple(item) for item in provenance)
+    
+    def __repr__(self) -> str:
+        return f"SearchResult(rank={self.rank}, title={self.title!r}, source={self.source!r}, score={self.relevance_score})"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """기존 dict 형식으로 변환"""
+        return {name: getattr(self, name) for name in self.__slots__}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SearchResult":
+        """to_dict() 결과(또는 같은 키의 dict)에서 복원"""
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+
+class SearchResponse(_FieldAccess):
+    """통합 검색 응답 (웹/문서 결과 목록과 부분 응답 정보)
+
+    결과 목록은 탭/캐시 사이에서 복사하지 않고 그대로 공유합니다.
+    stale_engines는 실패해서 이전 결과를 쓴 엔진, unavailable_engines는 실패했고 이전 결과도 없는 엔진입니다.
+    """
+    
+    __slots__ = ('web_results', 'doc_results', 'partial', 'timed_out_engines', 'stale_engines', 'unavailable_engines',
+                 'hedged_requests', 'searched_at', 'elapsed_seconds')
+    # 저장하지 않고 계산하는 읽기 전용 필드
+    _COMPUTED = ('total_results', 'stale')
+    
+    def __init__(self, web_results: Optional[List[SearchResult]] = None, doc_results: Optional[List[SearchResult]] = None,
+                 partial: bool = False, timed_out_engines: Optional[List[str]] = None,
+                 stale_engines: Optional[List[str]] = None, unavailable_engines: Optional[List[str]] = None,
+                 hedged_requests: int = 0, searched_at: Optional[str] = None, elapsed_seconds: Optional[float] = None):
+        self.web_results = web_results if web_results is not None else []
+        self.doc_results = doc_results if doc_results is not None else []
+        self.partial = partial
+        self.timed_out_engines = timed_out_engines if timed_out_engines is not None else []
+        self.stale_engines = stale_engines if stale_engines is not None else []
+        self.unavailable_engines = unavailable_engines if unavailable_engines is not None else []
+        self.hedged_requests = hedged_requests
+        self.searched_at = searched_at or datetime.now().isoformat()
+        self.elapsed_seconds = elapsed_seconds
+    
+    @property
+    def total_results(self) -> int:
+        return len(self.web_results) + len(self.doc_results)
+    
+    @property
+    def stale(self) -> bool:
+        """이전 결과로 대체한 엔진이 있는지 (화면의 "이전 결과" 표시용)"""
+        return bool(self.stale_engines)
+    
+    def __getitem__(self, key: str) -> Any:
+        if key in self._COMPUTED:
+            return getattr(self, key)
+        return super().__getitem__(key)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._COMPUTED or super().__contains__(key)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self._COMPUTED else super().get(key, default)
+    
+    def keys(self) -> Sequence[str]:
+        return (*self.__slots__, *self._COMPUTED)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """기존 search_all() dict 형식으로 변환"""
+        return {
+            'web_results': [result.to_dict() for result in self.web_results],
+            'doc_results': [result.to_dict() for result in self.doc_results],
+            'total_results': self.total_results,
+            'partial': self.partial,
+            'timed_out_engines': list(self.timed_out_engines),
+            'stale': self.stale,
+            'stale_engines': list(self.stale_engines),
+            'unavailable_engines': list(self.unavailable_engines),
+            'hedged_requests': self.hedged_requests,
+            'searched_at': self.searched_at,
+            'elapsed_seconds': self.elapsed_seconds
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SearchResponse":
+        """to_dict() 결과에서 복원 (검색 서비스 응답 등)"""
+        return cls(
+            web_results=[SearchResult.from_dict(result) for result in data.get('web_results', [])],
+            doc_results=[SearchResult.from_dict(result) for result in data.get('doc_results', [])],
+            partial=data.get('partial', False),
+            timed_out_engines=list(data.get('timed_out_engines', [])),
+            stale_engines=list(data.get('stale_engines', [])),
+            unavailable_engines=list(data.get('unavailable_engines', [])),
+            hedged_requests=data.get('hedged_requests', 0),
+            searched_at=data.get('searched_at'),
+            elapsed_seconds=data.get('elapsed_seconds')
+        )
+
+def _measure(build) -> int:
+    """build()가 만든 객체가 차지하는 메모리 (바이트)"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        objects = build()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del objects
+    return size
+
+def main():
+    """dict 결과와 SearchResult의 메모리 사용량 비교"""
+    parser = argparse.ArgumentParser(description="검색 결과 모델 메모리 벤치마크")
+    parser.add_argument('--count', type=int, default=10000, help="만들 결과 수")
+    args = parser.parse_args()
+    
+    # 엔진이 받는 원본 데이터 (두 방식 모두 같은 문자열을 참조)
+    raw = [
+        {
+            'title': f"문서 제목 {i}",
+            'url': f"https://docs.example.com/page/{i}",
+            'snippet': f"검색 결과 요약 {i} " * 8,
+            'code': f"print({i})",
+            'library': 'Python',
+            'language': 'python'
+        }
+        for i in range(args.count)
+    ]
+    
+    def build_dicts():
+        # 기존 방식: 결과마다 dict와 타임스탬프 생성
+        return [
+            {
+                'rank': i,
+                'title': item['title'],
+                'url': item['url'],
+                'snippet': item['snippet'],
+                'source': '기술 문서',
+                'timestamp': datetime.now().isoformat(),
+                'relevance_score': 0.5,
+                'code_snippet': item['code'],
+                'library': item['library'],
+                'language': item['language']
+            }
+            for i, item in enumerate(raw, 1)
+        ]
+    
+    def build_results():
+        timestamp = datetime.now().isoformat()
+        return [
+            SearchResult(i, item['title'], item['url'], item['snippet'], '기술 문서', timestamp, 0.5,
+                         item['code'], item['library'], item['language'])
+            for i, item in enumerate(raw, 1)
+        ]
+    
+    dict_bytes = _measure(build_dicts)
+    slot_bytes = _measure(build_results)
+    per_10k = 10000 / args.count
+    print(f"결과 {args.count}개 기준, 1만 개당 메모리:")
+    print(f"  dict          : {dict_bytes * per_10k / 1024:8.1f} KiB")
+    print(f"  SearchResult  : {slot_bytes * per_10k / 1024:8.1f} KiB ({slot_bytes / dict_bytes:.0%})")
+
+if __name__ == "__main__":
+    main()
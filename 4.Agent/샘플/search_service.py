@@ -0,0 +1,337 @@
+"""독립 검색 백엔드 서비스
+
+SearchAggregator를 별도 asyncio 프로세스로 띄워 여러 Streamlit 프로세스가 함께 씁니다.
+MCP 서버(npx 자식 프로세스), HTTP 연결 풀, 검색 캐시는 이 프로세스에 하나씩만 있고,
+Streamlit 쪽은 SEARCH_SERVICE_URL을 설정하면 search_client.SearchServiceClient로 요청만 보냅니다.
+
+엔드포인트:
+    POST /search         {"mode": "all" | "web" | "docs", "query": ..., "web_results", "doc_results",
+                          "deadline", "hedge", "library", "language", "timeout"} → {"id", "response"}
+    POST /search/stream  {"query", "web_results", "doc_results", "engines", "timeout"}
+                         → 엔진별 결과 NDJSON 줄, 마지막 줄 {"id", "done": true, "timed_out": ...}
+    GET  /healthz        {"status": "ok" | "draining", "in_flight": ...} (종료 중이면 503)
+    GET  /metrics        Prometheus 텍스트 형식 지표
+
+요청 번호는 X-Request-Id 헤더로 받고(없으면 새로 만듦) 응답 헤더, 본문, 로그에 그대로 씁니다.
+timeout(초, 최대 MAX_REQUEST_TIMEOUT)이 지나면 504로 응답하고, 스트리밍 요청은 아직 오지 않은
+엔진을 시간 초과 오류 항목으로 보낸 뒤 끝냅니다.
+
+SIGTERM / SIGINT를 받으면 새 요청은 503으로 거절하고 진행 중인 요청이 끝나기를 drain_timeout초까지
+기다린 뒤(남은 요청은 취소) 검색 엔진, MCP 서버, 캐시를 정리하고 종료합니다.
+
+사용법:
+    python search_service.py --port 8765
+    python search_service.py --unix /tmp/search_service.sock --drain-timeout 30 --start-mcp
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import signal
+import time
+from typing import Dict, List, Any, Callable, Optional, Set
+import logging
+from aiohttp import web
+
+from search_client import REQUEST_ID_HEADER, DEFAULT_SERVICE_TIMEOUT, new_request_id
+from search_engines import SearchAggregator, search_aggregator
+from search_models import SearchResponse
+from mcp_client import mcp_client
+from mcp_client_simple import simple_mcp_client
+from metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+MAX_REQUEST_TIMEOUT = 120.0      # 클라이언트가 요청할 수 있는 최대 처리 시간 (초)
+DEFAULT_DRAIN_TIMEOUT = 30.0     # 종료 시 진행 중인 요청을 기다리는 최대 시간 (초)
+
+class BadRequest(Exception):
+    """요청 본문 오류 (400)"""
+
+class SearchService:
+    """SearchAggregator를 HTTP(TCP 또는 유닉스 소켓)로 제공하는 서비스"""
+
+    def __init__(self, aggregator: Optional[SearchAggregator] = None,
+                 cleanup_hooks: Optional[List[Callable[[], Any]]] = None):
+        self.aggregator = aggregator or search_aggregator
+        # 종료 시 등록 순서대로 실행할 정리 함수 (일반 함수 또는 코루틴 함수)
+        self.cleanup_hooks = list(cleanup_hooks or [])
+        self.draining = False
+        self.in_flight = 0
+        self._handlers: Set[asyncio.Task] = set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.counters = {
+            'requests': 0,
+            'rejected': 0,
+            'timeouts': 0,
+            'errors': 0
+        }
+
+    def app(self) -> web.Application:
+        application = web.Application(middlewares=[self._track])
+        application.router.add_post('/search', self.handle_search)
+        application.router.add_post('/search/stream', self.handle_stream)
+        application.router.add_get('/healthz', self.handle_health)
+        application.router.add_get('/metrics', self.handle_metrics)
+        return application
+
+    @web.middleware
+    async def _track(self, request: web.Request, handler) -> web.StreamResponse:
+        """요청 번호 부여, 종료 중 거절, 진행 중인 요청 수 집계"""
+        request_id = request.headers.get(REQUEST_ID_HEADER) or new_request_id()
+        request['request_id'] = request_id
+        if request.path == '/healthz' or request.path == '/metrics':
+            return await handler(request)
+        if self.draining:
+            self.counters['rejected'] += 1
+            return self._error(request_id, 503, "검색 서비스 종료 중")
+
+        self.counters['requests'] += 1
+        self.in_flight += 1
+        self._idle.clear()
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            response = await handler(request)
+        finally:
+            self._handlers.discard(task)
+            self.in_flight -= 1
+            if self.in_flight == 0:
+                self._idle.set()
+        if not response.prepared:
+            response.headers[REQUEST_ID_HEADER] = request_id
+        return response
+
+    @staticmethod
+    def _error(request_id: str, status: int, message: str) -> web.Response:
+        return web.json_response({'id': request_id, 'error': message}, status=status,
+                                 headers={REQUEST_ID_HEADER: request_id}, dumps=_dumps)
+
+    @staticmethod
+    async def _read_body(request: web.Request) -> Dict[str, Any]:
+        try:
+            body = await request.json()
+        except ValueError as e:
+            raise BadRequest(f"JSON 본문이 아닙니다: {e}")
+        if not isinstance(body, dict) or not str(body.get('query') or '').strip():
+            raise BadRequest("query가 필요합니다")
+        return body
+
+    @staticmethod
+    def _timeout(body: Dict[str, Any]) -> float:
+        try:
+            timeout = float(body.get('timeout') or DEFAULT_SERVICE_TIMEOUT)
+        except (TypeError, ValueError):
+            raise BadRequest(f"timeout이 숫자가 아닙니다: {body.get('timeout')!r}")
+        return min(max(timeout, 0.1), MAX_REQUEST_TIMEOUT)
+
+    async def _run_search(self, body: Dict[str, Any]) -> SearchResponse:
+        mode = body.get('mode', 'all')
+        query = body['query']
+        web_results = int(body.get('web_results') or 10)
+        doc_results = int(body.get('doc_results') or 50)
+        if mode == 'all':
+            return await self.aggregator.search_all(query, web_results, doc_results,
+                                                    deadline=body.get('deadline'), hedge=body.get('hedge'))
+        if mode == 'web':
+            return SearchResponse(web_results=await self.aggregator.search_web_only(query, web_results))
+        if mode == 'docs':
+            return SearchResponse(doc_results=await self.aggregator.search_docs_only(
+                query, doc_results, library=body.get('library'), language=body.get('language')
+            ))
+        raise BadRequest(f"알 수 없는 mode: {mode}")
+
+    async def handle_search(self, request: web.Request) -> web.Response:
+        request_id = request['request_id']
+        try:
+            body = await self._read_body(request)
+            timeout = self._timeout(body)
+            with metrics_registry.span('service', engine=body.get('mode', 'all')):
+                response = await asyncio.wait_for(self._run_search(body), timeout)
+        except BadRequest as e:
+            return self._error(request_id, 400, str(e))
+        except asyncio.TimeoutError:
+            self.counters['timeouts'] += 1
+            logger.warning(f"[{request_id}] 검색 시간 초과 ({timeout:.1f}s)")
+            return self._error(request_id, 504, f"검색 시간 초과 ({timeout:.1f}초)")
+        except Exception as e:
+            # 엔진 사용 불가(EngineUnavailableError) 등
+            self.counters['errors'] += 1
+            logger.error(f"[{request_id}] 검색 실패: {e}")
+            return self._error(request_id, 503, str(e))
+        return web.json_response({'id': request_id, 'response': response.to_dict()}, dumps=_dumps)
+
+    async def handle_stream(self, request: web.Request) -> web.StreamResponse:
+        """엔진별 결과를 도착하는 대로 NDJSON 줄로 전송"""
+        request_id = request['request_id']
+        try:
+            body = await self._read_body(request)
+            timeout = self._timeout(body)
+            engines = [engine for engine in body.get('engines') or ('web', 'docs') if engine in ('web', 'docs')]
+        except BadRequest as e:
+            return self._error(request_id, 400, str(e))
+
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson', REQUEST_ID_HEADER: request_id})
+        await response.prepare(request)
+
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + timeout
+        remaining_engines = list(engines)
+        timed_out = False
+        batches = self.aggregator.search_stream(
+            body['query'], int(body.get('web_results') or 10), int(body.get('doc_results') or 50), engines
+        )
+        with metrics_registry.span('service', engine='stream'):
+            try:
+                while remaining_engines:
+                    remaining = deadline_at - loop.time()
+                    try:
+                        if remaining <= 0:
+                            raise asyncio.TimeoutError
+                        batch = await asyncio.wait_for(batches.__anext__(), remaining)
+                    except StopAsyncIteration:
+                        break
+                    except asyncio.TimeoutError:
+                        timed_out = True
+                        break
+                    remaining_engines.remove(batch['engine'])
+                    await _write_line(response, {
+                        'id': request_id,
+                        'engine': batch['engine'],
+                        'results': [result.to_dict() for result in batch['results']],
+                        'error': batch['error'],
+                        'stale': batch.get('stale', False)
+                    })
+            finally:
+                await batches.aclose()
+
+            if timed_out:
+                self.counters['timeouts'] += 1
+                logger.warning(f"[{request_id}] 스트리밍 검색 시간 초과 ({timeout:.1f}s): {', '.join(remaining_engines)}")
+                for engine in remaining_engines:
+                    await _write_line(response, {
+                        'id': request_id, 'engine': engine, 'results': [],
+                        'error': f"검색 시간 초과 ({timeout:.1f}초)", 'stale': False
+                    })
+            await _write_line(response, {'id': request_id, 'done': True, 'timed_out': timed_out})
+        await response.write_eof()
+        return response
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {'status': 'draining' if self.draining else 'ok', 'in_flight': self.in_flight},
+            status=503 if self.draining else 200
+        )
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(text=metrics_registry.render_prometheus(), content_type='text/plain', charset='utf-8',
+                            headers={'X-Prometheus-Format': '0.0.4'})
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                    path: Optional[str] = None) -> web.AppRunner:
+        """현재 이벤트 루프에서 서비스 시작 (path를 주면 유닉스 소켓, 아니면 TCP)"""
+        runner = web.AppRunner(self.app(), access_log=None)
+        await runner.setup()
+        site = web.UnixSite(runner, path) if path else web.TCPSite(runner, host, port)
+        await site.start()
+        logger.info(f"검색 서비스 시작: {site.name}")
+        return runner
+
+    async def drain(self, timeout: float = DEFAULT_DRAIN_TIMEOUT) -> bool:
+        """새 요청을 거절하고 진행 중인 요청이 끝나기를 기다림 (시간이 지나면 남은 요청을 취소하고 False)"""
+        self.draining = True
+        logger.info(f"검색 서비스 종료 준비: 진행 중인 요청 {self.in_flight}개")
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning(f"종료 대기 시간 초과 ({timeout:.0f}s): 요청 {len(self._handlers)}개 취소")
+            handlers = list(self._handlers)
+            for task in handlers:
+                task.cancel()
+            await asyncio.gather(*handlers, return_exceptions=True)
+            return False
+
+    async def close(self):
+        """검색 엔진, MCP 서버, 캐시 정리"""
+        for hook in self.cleanup_hooks:
+            try:
+                result = hook()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"종료 정리 함수 실패 ({getattr(hook, '__qualname__', hook)}): {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {'in_flight': self.in_flight, 'draining': int(self.draining), **self.counters}
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+async def _write_line(response: web.StreamResponse, record: Dict[str, Any]):
+    await response.write(_dumps(record).encode('utf-8') + b'\n')
+
+def _install_stop_handlers(stop: asyncio.Event):
+    """SIGINT / SIGTERM을 받으면 stop 설정 (종료 준비 시작)
+
+    Windows 이벤트 루프는 add_signal_handler를 지원하지 않으므로 signal.signal로 등록합니다
+    (Ctrl+C는 SIGINT, 작업 관리자 등의 종료는 SIGTERM이 없을 수 있어 SIGBREAK도 함께 받음).
+    """
+    loop = asyncio.get_running_loop()
+    signals = [signal.SIGINT, signal.SIGTERM]
+    if hasattr(signal, 'SIGBREAK'):
+        signals.append(signal.SIGBREAK)
+    for sig in signals:
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            signal.signal(sig, lambda signum, frame: loop.call_soon_threadsafe(stop.set))
+
+async def serve(args: argparse.Namespace):
+    service = SearchService(cleanup_hooks=[
+        # 진행 중인 검색이 끝난 뒤 엔진 → HTTP 세션 → MCP 서버 → 캐시 순으로 정리
+        search_aggregator.registry.aclose,
+        simple_mcp_client.aclose,
+        mcp_client.cleanup,
+        search_aggregator.cache.close
+    ])
+    metrics_registry.register_collector('service', service.stats)
+
+    if args.start_mcp:
+        started_at = time.perf_counter()
+        ready = await mcp_client.start_all()
+        logger.info(f"MCP 서버 미리 시작: {ready} ({time.perf_counter() - started_at:.2f}s)")
+
+    runner = await service.start(args.host, args.port, args.unix)
+    stop = asyncio.Event()
+    _install_stop_handlers(stop)
+    await stop.wait()
+
+    await service.drain(args.drain_timeout)
+    await runner.cleanup()
+    await service.close()
+    logger.info("검색 서비스 종료")
+
+def main():
+    parser = argparse.ArgumentParser(description="독립 검색 백엔드 서비스")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', default=None, help="TCP 대신 사용할 유닉스 소켓 경로")
+    parser.add_argument('--drain-timeout', type=float, default=DEFAULT_DRAIN_TIMEOUT,
+                        help="종료 시 진행 중인 요청을 기다리는 최대 시간 (초)")
+    parser.add_argument('--start-mcp', action='store_true', help="시작할 때 설정된 MCP 서버를 미리 실행")
+    parser.add_argument('-v', '--verbose', action='store_true')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        # 신호 처리기를 등록하기 전(MCP 서버 시작 중 등)에 중단된 경우
+        pass
+
+if __name__ == "__main__":
+    main()
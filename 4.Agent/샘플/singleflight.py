@@ -0,0 +1,76 @@
+import asyncio
+from typing import Dict, Any, Callable, Awaitable
+import logging
+
+logger = logging.getLogger(__name__)
+
+class _Call:
+    """진행 중인 upstream 작업과 그 결과를 기다리는 호출 수"""
+    
+    __slots__ = ('task', 'waiters')
+    
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """같은 키의 동시 호출을 하나의 upstream 작업으로 합치는 요청 병합기
+
+    먼저 들어온 호출이 작업을 시작하고, 작업이 끝나기 전에 같은 키로 들어온 호출은
+    그 작업의 결과를 함께 받습니다. 대기자 하나가 취소되어도 공유 작업은 계속되며,
+    마지막 대기자까지 모두 취소된 경우에만 작업을 취소합니다.
+    """
+    
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self.counters = {
+            'calls': 0,
+            'executions': 0,
+            'coalesced': 0,
+            'cancelled_waiters': 0
+        }
+    
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+    
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """key로 진행 중인 작업이 있으면 합류하고, 없으면 fn()을 시작"""
+        self.counters['calls'] += 1
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task, key=key, call=call: self._finish(key, call))
+            self.counters['executions'] += 1
+        else:
+            self.counters['coalesced'] += 1
+        
+        call.waiters += 1
+        try:
+            # shield: 이 대기자가 취소되어도 공유 작업은 취소되지 않음
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            self.counters['cancelled_waiters'] += 1
+            raise
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                logger.debug(f"모든 대기자가 취소되어 작업 취소: {key}")
+                call.task.cancel()
+    
+    def _finish(self, key: str, call: _Call):
+        """완료된 작업 정리 (대기자가 없어도 예외를 회수)"""
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.task.cancelled():
+            call.task.exception()
+    
+    def stats(self) -> Dict[str, Any]:
+        """호출/실행/병합 횟수"""
+        calls = self.counters['calls']
+        return {
+            **self.counters,
+            'in_flight': self.in_flight,
+            'coalesce_rate': self.counters['coalesced'] / calls if calls else 0.0
+        }
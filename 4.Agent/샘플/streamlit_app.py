@@ -1,18 +1,37 @@
 import streamlit as st
-import asyncio
+import heapq
+import itertools
 import json
-from datetime import datetime
-from typing import Dict, List, Any
+import math
+import os
+import time
+from typing import Dict, List, Any, Optional, Tuple
 import logging
 
 # 로컬 모듈 임포트
 from mcp_client import mcp_client
+from mcp_client_simple import simple_mcp_client
 from search_engines import search_aggregator
+from search_models import SearchResult, SearchResponse
+from search_client import SearchServiceClient
+from loop_runner import BackgroundLoop, start_background_loop
+from metrics import metrics_registry, start_metrics_server, export_metrics_file
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 결과 탭 한 페이지에 표시할 결과 수
+RESULTS_PER_PAGE = 10
+# 페이지/코드 보기 위젯의 session_state 키 접두사 (새 검색 시 초기화)
+VIEW_STATE_PREFIX = "view_"
+# Prometheus 지표 내보내기 (설정한 경우에만): HTTP 포트 / 텍스트 파일 경로
+METRICS_PORT = os.environ.get('SEARCH_METRICS_PORT')
+METRICS_FILE = os.environ.get('SEARCH_METRICS_FILE')
+# 검색 서비스 주소 (예: http://127.0.0.1:8765, unix:///tmp/search_service.sock)
+# 설정하면 이 프로세스에서 검색 엔진/MCP 서버를 띄우지 않고 search_service.py에 요청
+SEARCH_SERVICE_URL = os.environ.get('SEARCH_SERVICE_URL')
+
 # 페이지 설정
 st.set_page_config(
     page_title="종합 정보 검색 AI Agent",
@@ -72,6 +91,10 @@ st.markdown("""
         color: #666;
         margin-top: 0.5rem;
     }
+    .provenance {
+        font-size: 0.8rem;
+        color: #888;
+    }
     .code-block {
         background-color: #f8f9fa;
         border: 1px solid #e9ecef;
@@ -84,33 +107,150 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def display_search_results(results: Dict[str, List[Dict[str, Any]]]):
-    """검색 결과 표시"""
-    
-    # 전체 통계
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        st.metric("총 결과", results['total_results'])
-    with col2:
-        st.metric("웹 검색", len(results['web_results']))
-    with col3:
-        st.metric("기술 문서", len(results['doc_results']))
-    with col4:
-        st.metric("검색 시간", datetime.now().strftime("%H:%M:%S"))
+def create_result_placeholders() -> Dict[str, Any]:
+    """통계 영역과 결과 탭을 만들고 각 영역의 placeholder 반환"""
+    placeholders = {'stats': st.empty()}
     
     # 탭으로 결과 분리
     tab1, tab2, tab3 = st.tabs(["🌐 웹 검색 결과", "📚 기술 문서", "📊 통합 결과"])
     
     with tab1:
-        display_web_results(results['web_results'])
+        placeholders['web'] = st.empty()
     
     with tab2:
-        display_doc_results(results['doc_results'])
+        placeholders['docs'] = st.empty()
     
     with tab3:
-        display_combined_results(results)
+        placeholders['combined'] = st.empty()
+    
+    return placeholders
+
+def render_result_stats(placeholder, results: SearchResponse):
+    """전체 통계 표시"""
+    with placeholder.container():
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("총 결과", results.total_results)
+        with col2:
+            st.metric("웹 검색", len(results.web_results))
+        with col3:
+            st.metric("기술 문서", len(results.doc_results))
+        with col4:
+            elapsed = results.elapsed_seconds
+            st.metric("검색 시간", f"{elapsed:.2f}초" if elapsed is not None else "-")
+        if results.stale:
+            st.caption(f"⏳ 이전 결과 표시 중: {', '.join(results.stale_engines)} (검색 엔진 일시 장애)")
+        if results.unavailable_engines:
+            st.caption(f"⛔ 사용할 수 없음: {', '.join(results.unavailable_engines)}")
+
+# 서킷 상태 값 (circuit_breaker.STATE_VALUES) → 표시 이름
+CIRCUIT_STATE_LABELS = {0: "정상", 1: "시험 중", 2: "차단"}
+
+def render_metrics_panel():
+    """사이드바 성능 지표 (단계별 지연 시간, 오류, 캐시/워커 풀/요청 제한/서킷 상태)"""
+    snapshot = metrics_registry.snapshot()
+    with st.expander("📈 성능 지표"):
+        if SEARCH_SERVICE_URL:
+            st.caption(f"검색 엔진/캐시/MCP 지표는 검색 서비스의 /metrics에서 확인하세요 ({SEARCH_SERVICE_URL})")
+        if not snapshot['stages']:
+            st.caption("아직 측정된 검색이 없습니다.")
+        else:
+            st.dataframe([
+                {
+                    '단계': item['stage'],
+                    '엔진': item.get('engine', ''),
+                    '횟수': item['count'],
+                    'p50(ms)': round(item['p50'] * 1000, 1),
+                    'p95(ms)': round(item['p95'] * 1000, 1),
+                    'p99(ms)': round(item['p99'] * 1000, 1)
+                }
+                for item in snapshot['stages']
+            ], hide_index=True, use_container_width=True)
+        
+        if snapshot['counters']:
+            st.markdown("**오류**")
+            for item in snapshot['counters']:
+                st.caption(f"{item.get('stage', '')} / {item.get('engine', '')}: {int(item['value'])}회")
+        
+        cache = snapshot['collectors'].get('cache', {})
+        if cache:
+            st.markdown("**캐시**")
+            st.caption(
+                f"적중률 {cache['hit_rate']:.0%} (메모리 {cache['memory_hits']}, 디스크 {cache['disk_hits']}, "
+                f"미적중 {cache['misses']}), 항목 {cache['memory_entries']}개"
+            )
+        
+        pools = snapshot['collectors'].get('mcp_pool', {})
+        if pools:
+            st.markdown("**MCP 워커 풀**")
+            for server, stats in pools.items():
+                st.caption(f"{server}: 워커 {stats['size']}/{stats['pool_size']}, 진행 중 {stats['in_flight']}, 재시작 {stats['restarts']}회")
+        
+        limiters = snapshot['collectors'].get('rate_limit', {})
+        if limiters:
+            st.markdown("**요청 제한**")
+            for host, stats in limiters.items():
+                st.caption(
+                    f"{host}: 동시 요청 창 {stats['window']:.1f} (진행 중 {stats['in_flight']}), 대기 {stats['queue_depth']}, "
+                    f"거부 {stats['rejected']}회, 대기 초과 {stats['timeouts']}회"
+                )
+        
+        circuits = {
+            **snapshot['collectors'].get('circuit', {}),
+            **{f"mcp:{server}": stats for server, stats in snapshot['collectors'].get('mcp_circuit', {}).items()}
+        }
+        if circuits:
+            st.markdown("**서킷 브레이커**")
+            for name, stats in circuits.items():
+                st.caption(
+                    f"{name}: {CIRCUIT_STATE_LABELS.get(stats['state'], stats['state'])}, "
+                    f"연속 실패 {stats['consecutive_failures']}회, 차단 {stats['rejected']}회"
+                )
+
+def render_result_tabs(placeholders: Dict[str, Any], results: SearchResponse, interactive: bool = False):
+    """결과 탭 내용 표시 (interactive면 페이지 이동/코드 보기 위젯 포함)"""
+    with placeholders['web'].container():
+        display_web_results(results.web_results)
+    
+    with placeholders['docs'].container():
+        display_doc_results(results.doc_results, f"{VIEW_STATE_PREFIX}docs" if interactive else None)
+    
+    with placeholders['combined'].container():
+        display_combined_results(results, f"{VIEW_STATE_PREFIX}combined" if interactive else None)
+
+def display_search_results(results: SearchResponse):
+    """검색 결과 표시"""
+    placeholders = create_result_placeholders()
+    render_result_stats(placeholders['stats'], results)
+    render_result_tabs(placeholders, results, interactive=True)
+
+def reset_result_view_state():
+    """이전 검색의 페이지 번호와 코드 보기 상태 제거"""
+    for key in [key for key in st.session_state if str(key).startswith(VIEW_STATE_PREFIX)]:
+        del st.session_state[key]
+
+def select_page(total: int, key: Optional[str]) -> Tuple[int, int]:
+    """페이지 선택 위젯을 그리고 현재 페이지의 (시작, 끝) 위치 반환
+
+    key가 없으면(결과가 아직 도착하는 중) 위젯 없이 첫 페이지만 표시합니다.
+    """
+    pages = max(1, math.ceil(total / RESULTS_PER_PAGE))
+    page = 1
+    if key is not None and pages > 1:
+        page = int(st.number_input(f"페이지 (총 {pages}쪽)", min_value=1, max_value=pages, step=1, key=f"{key}_page"))
+    start = (page - 1) * RESULTS_PER_PAGE
+    end = min(total, start + RESULTS_PER_PAGE)
+    st.caption(f"{total}개 중 {start + 1}-{end}번째 결과")
+    return start, end
 
-def display_web_results(web_results: List[Dict[str, Any]]):
+def provenance_html(result: SearchResult) -> str:
+    """중복 제거로 합쳐진 다른 출처 표시 (없으면 빈 문자열)"""
+    if not result.provenance:
+        return ""
+    sources = ", ".join(dict.fromkeys(source for source, _ in result.provenance))
+    return f'<div class="provenance">함께 찾은 출처: {sources} ({len(result.provenance)}건 병합)</div>'
+
+def display_web_results(web_results: List[SearchResult]):
     """웹 검색 결과 표시"""
     if not web_results:
         st.info("웹 검색 결과가 없습니다.")
@@ -120,115 +260,179 @@ def display_web_results(web_results: List[Dict[str, Any]]):
         with st.container():
             st.markdown(f"""
             <div class="result-card web-result">
-                <div class="source-badge web-badge">웹 검색 #{result['rank']}</div>
-                <h4>{result['title']}</h4>
-                <p>{result['snippet']}</p>
-                <a href="{result['url']}" target="_blank">🔗 링크 열기</a>
-                <div class="relevance-score">관련도: {result['relevance_score']:.2f}</div>
+                <div class="source-badge web-badge">웹 검색 #{result.rank}</div>
+                <h4>{result.title}</h4>
+                <p>{result.snippet}</p>
+                <a href="{result.url}" target="_blank">🔗 링크 열기</a>
+                <div class="relevance-score">관련도: {result.relevance_score:.2f}</div>
+                {provenance_html(result)}
             </div>
             """, unsafe_allow_html=True)
 
-def display_doc_results(doc_results: List[Dict[str, Any]]):
-    """기술 문서 결과 표시"""
+def display_doc_results(doc_results: List[SearchResult], key: Optional[str] = None):
+    """기술 문서 결과 표시 (현재 페이지만 렌더링)"""
     if not doc_results:
         st.info("기술 문서 검색 결과가 없습니다.")
         return
     
-    for result in doc_results:
+    start, end = select_page(len(doc_results), key)
+    for result in doc_results[start:end]:
         with st.container():
             # 라이브러리 정보
             library_info = ""
-            if result.get('library'):
-                library_info = f"<strong>라이브러리:</strong> {result['library']} | "
-            if result.get('language'):
-                library_info += f"<strong>언어:</strong> {result['language']}"
-            
-            # 코드 스니펫
-            code_snippet = ""
-            if result.get('code_snippet'):
-                code_snippet = f"""
-                <div class="code-block">
-                    <strong>코드 예제:</strong><br>
-                    <pre>{result['code_snippet']}</pre>
-                </div>
-                """
+            if result.library:
+                library_info = f"<strong>라이브러리:</strong> {result.library} | "
+            if result.language:
+                library_info += f"<strong>언어:</strong> {result.language}"
             
             st.markdown(f"""
             <div class="result-card doc-result">
-                <div class="source-badge doc-badge">기술 문서 #{result['rank']}</div>
-                <h4>{result['title']}</h4>
-                <p>{result['snippet']}</p>
+                <div class="source-badge doc-badge">기술 문서 #{result.rank}</div>
+                <h4>{result.title}</h4>
+                <p>{result.snippet}</p>
                 {library_info}
-                {code_snippet}
-                <a href="{result['url']}" target="_blank">🔗 문서 보기</a>
-                <div class="relevance-score">관련도: {result['relevance_score']:.2f}</div>
+                <a href="{result.url}" target="_blank">🔗 문서 보기</a>
+                <div class="relevance-score">관련도: {result.relevance_score:.2f}</div>
+                {provenance_html(result)}
             </div>
             """, unsafe_allow_html=True)
+            
+            # 코드 예제는 펼쳤을 때만 전송 (st.expander는 접혀 있어도 내용을 모두 보냄)
+            if result.code_snippet and key is not None:
+                if st.toggle("💻 코드 예제 보기", key=f"{key}_code_{result.rank}"):
+                    st.code(result.code_snippet, language=result.language or None)
 
-def display_combined_results(results: Dict[str, List[Dict[str, Any]]]):
-    """통합 결과 표시 (관련도 순으로 정렬)"""
-    all_results = []
-    
-    # 웹 결과 추가
-    for result in results['web_results']:
-        result['type'] = 'web'
-        all_results.append(result)
-    
-    # 문서 결과 추가
-    for result in results['doc_results']:
-        result['type'] = 'doc'
-        all_results.append(result)
-    
-    # 관련도 순으로 정렬
-    all_results.sort(key=lambda x: x['relevance_score'], reverse=True)
-    
-    if not all_results:
+def display_combined_results(results: SearchResponse, key: Optional[str] = None):
+    """통합 결과 표시 (관련도 순, 현재 페이지까지만 선택)"""
+    total = results.total_results
+    if not total:
         st.info("검색 결과가 없습니다.")
         return
     
-    st.subheader(f"관련도 순 정렬 ({len(all_results)}개 결과)")
+    st.subheader(f"관련도 순 정렬 ({total}개 결과)")
+    start, end = select_page(total, key)
     
-    for i, result in enumerate(all_results, 1):
-        result_type = "웹 검색" if result['type'] == 'web' else "기술 문서"
-        badge_class = "web-badge" if result['type'] == 'web' else "doc-badge"
+    # 공유 중인 결과는 건드리지 않고 (유형, 결과) 쌍에서 현재 페이지 끝까지만 힙으로 선택
+    tagged = itertools.chain(
+        (('web', result) for result in results.web_results),
+        (('doc', result) for result in results.doc_results)
+    )
+    top = heapq.nlargest(end, tagged, key=lambda item: item[1].relevance_score)
+    
+    for i, (source, result) in enumerate(top[start:end], start + 1):
+        result_type = "웹 검색" if source == 'web' else "기술 문서"
+        badge_class = "web-badge" if source == 'web' else "doc-badge"
         
         with st.container():
             st.markdown(f"""
             <div class="result-card">
                 <div class="source-badge {badge_class}">{result_type} #{i}</div>
-                <h4>{result['title']}</h4>
-                <p>{result['snippet']}</p>
-                <a href="{result['url']}" target="_blank">🔗 링크 열기</a>
-                <div class="relevance-score">관련도: {result['relevance_score']:.2f}</div>
+                <h4>{result.title}</h4>
+                <p>{result.snippet}</p>
+                <a href="{result.url}" target="_blank">🔗 링크 열기</a>
+                <div class="relevance-score">관련도: {result.relevance_score:.2f}</div>
+                {provenance_html(result)}
             </div>
             """, unsafe_allow_html=True)
 
-async def perform_search(query: str, search_type: str, max_web: int, max_docs: int):
-    """검색 수행"""
-    try:
-        if search_type == "전체 검색":
-            return await search_aggregator.search_all(query, max_web, max_docs)
-        elif search_type == "웹 검색만":
-            web_results = await search_aggregator.search_web_only(query, max_web)
-            return {
-                'web_results': web_results,
-                'doc_results': [],
-                'total_results': len(web_results)
-            }
-        elif search_type == "기술 문서만":
-            doc_results = await search_aggregator.search_docs_only(query, max_docs)
-            return {
-                'web_results': [],
-                'doc_results': doc_results,
-                'total_results': len(doc_results)
-            }
-    except Exception as e:
-        st.error(f"검색 중 오류가 발생했습니다: {e}")
-        return {
-            'web_results': [],
-            'doc_results': [],
-            'total_results': 0
-        }
+# 검색 유형별로 사용할 엔진
+SEARCH_TYPE_ENGINES = {
+    "전체 검색": ('web', 'docs'),
+    "웹 검색만": ('web',),
+    "기술 문서만": ('docs',)
+}
+
+@st.cache_resource
+def get_search_backend():
+    """검색 백엔드 (SEARCH_SERVICE_URL이 있으면 검색 서비스 클라이언트, 없으면 이 프로세스의 SearchAggregator)
+
+    둘 다 search_all / search_web_only / search_docs_only / search_stream을 같은 형식으로 제공합니다.
+    """
+    if SEARCH_SERVICE_URL:
+        logger.info(f"검색 서비스 사용: {SEARCH_SERVICE_URL}")
+        return SearchServiceClient(SEARCH_SERVICE_URL)
+    return search_aggregator
+
+@st.cache_resource
+def get_background_loop() -> BackgroundLoop:
+    """서버 프로세스당 하나인 백그라운드 이벤트 루프
+
+    검색 엔진과 MCP/HTTP 클라이언트(또는 검색 서비스 클라이언트)는 이 루프에 묶여 재실행 사이에도
+    연결과 캐시를 유지하고, 서버가 종료될 때 등록된 순서의 역순으로 정리됩니다.
+    """
+    if SEARCH_SERVICE_URL:
+        shutdown_hooks = [get_search_backend().aclose]
+    else:
+        shutdown_hooks = [
+            search_aggregator.cache.close,
+            search_aggregator.registry.aclose,
+            simple_mcp_client.aclose,
+            mcp_client.cleanup
+        ]
+    runner = start_background_loop("search-loop", shutdown_hooks)
+    
+    if METRICS_PORT:
+        try:
+            metrics_server = runner.run(start_metrics_server(metrics_registry, port=int(METRICS_PORT)))
+            runner.add_shutdown_hook(metrics_server.cleanup)
+        except Exception as e:
+            logger.error(f"지표 엔드포인트 시작 실패 (포트 {METRICS_PORT}): {e}")
+    if METRICS_FILE:
+        runner.submit(export_metrics_file(metrics_registry, METRICS_FILE))
+    return runner
+
+def perform_search_stream(query: str, search_type: str, max_web: int, max_docs: int,
+                          placeholders: Dict[str, Any], runner: BackgroundLoop):
+    """엔진별 결과가 도착하는 대로 화면에 표시
+
+    검색은 백그라운드 루프에서 돌고, 화면 갱신은 Streamlit 스크립트 스레드에서 수행합니다.
+    """
+    engines = SEARCH_TYPE_ENGINES.get(search_type, ('web', 'docs'))
+    results = SearchResponse()
+    started_at = time.perf_counter()
+    
+    # 아직 결과가 오지 않은 탭은 진행 중으로 표시
+    for engine in ('web', 'docs'):
+        if engine in engines:
+            placeholders[engine].info("검색 중...")
+    if 'web' not in engines:
+        with placeholders['web'].container():
+            display_web_results([])
+    if 'docs' not in engines:
+        with placeholders['docs'].container():
+            display_doc_results([])
+    render_result_stats(placeholders['stats'], results)
+    
+    for batch in runner.iterate(get_search_backend().search_stream(query, max_web, max_docs, engines)):
+        if batch['error']:
+            results.unavailable_engines.append(batch['engine'])
+            st.warning(f"{batch['engine']} 검색을 사용할 수 없습니다: {batch['error']}")
+        elif batch.get('stale'):
+            results.stale_engines.append(batch['engine'])
+        
+        results.elapsed_seconds = time.perf_counter() - started_at
+        with metrics_registry.span('render', engine=batch['engine']):
+            if batch['engine'] == 'web':
+                results.web_results = batch['results']
+                with placeholders['web'].container():
+                    display_web_results(results.web_results)
+            else:
+                results.doc_results = batch['results']
+                with placeholders['docs'].container():
+                    display_doc_results(results.doc_results)
+            
+            # 도착한 결과까지 반영해 통합 탭 재정렬
+            render_result_stats(placeholders['stats'], results)
+            with placeholders['combined'].container():
+                display_combined_results(results)
+    
+    # 마지막 결과 도착까지의 시간 (화면 갱신 시간 포함)
+    metrics_registry.observe('search_stream', results.elapsed_seconds or 0.0, engine='all')
+    
+    # 모든 결과가 도착하면 페이지 이동/코드 보기 위젯까지 포함해 다시 표시
+    with metrics_registry.span('render', engine='all'):
+        render_result_tabs(placeholders, results, interactive=True)
+    return results
 
 def main():
     """메인 애플리케이션"""
@@ -270,6 +474,7 @@ def main():
         st.success("✅ 검색 엔진 준비 완료")
         st.info("🌐 DuckDuckGo 웹 검색")
         st.info("📚 기술 문서 검색")
+        render_metrics_panel()
     
     # 메인 검색 인터페이스
     with st.container():
@@ -292,29 +497,35 @@ def main():
     
     # 검색 실행
     if search_button and query:
+        reset_result_view_state()
         with st.spinner("검색 중... 잠시만 기다려주세요."):
-            # 비동기 검색 실행
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+            # 비동기 검색은 프로세스 공용 백그라운드 루프에서 실행
+            runner = get_background_loop()
             
             try:
-                results = loop.run_until_complete(
-                    perform_search(query, search_type, max_web, max_docs)
-                )
-                
-                # 결과 표시
+                # 결과 영역을 먼저 만들고, 엔진별 결과가 도착하는 대로 채움
                 st.markdown("---")
                 st.subheader(f"📋 '{query}' 검색 결과")
-                display_search_results(results)
+                placeholders = create_result_placeholders()
+                
+                results = perform_search_stream(query, search_type, max_web, max_docs, placeholders, runner)
+                st.session_state['last_search'] = {'query': query, 'results': results}
                 
             except Exception as e:
                 st.error(f"검색 중 오류가 발생했습니다: {e}")
-            finally:
-                loop.close()
     
     elif clear_button:
+        st.session_state.pop('last_search', None)
+        reset_result_view_state()
         st.rerun()
     
+    elif 'last_search' in st.session_state:
+        # 페이지 이동/코드 보기로 인한 재실행은 다시 검색하지 않고 저장된 결과만 표시
+        last_search = st.session_state['last_search']
+        st.markdown("---")
+        st.subheader(f"📋 '{last_search['query']}' 검색 결과")
+        display_search_results(last_search['results'])
+    
     # 푸터
     st.markdown("---")
     st.markdown("""
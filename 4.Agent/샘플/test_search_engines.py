@@ -0,0 +1,78 @@
+"""SearchAggregator 헤지 요청 회귀 테스트 (가짜 엔진 사용, 네트워크 없음)
+
+    python -m unittest test_search_engines
+"""
+import asyncio
+import unittest
+
+from engine_registry import EngineRegistry, register_engine_type
+from search_cache import SearchCache
+from search_engines import SearchAggregator, HEDGE_MIN_SAMPLES
+from search_models import SearchResult
+
+class ScriptedEngine:
+    """호출 순서대로 (지연 시간, 오류 메시지 또는 None) 대본을 따르는 가짜 엔진"""
+
+    script = []
+    release: asyncio.Event = None
+
+    def __init__(self, **kwargs):
+        self.calls = 0
+
+    async def search(self, query, max_results, **filters):
+        delay, error = self.script[self.calls]
+        self.calls += 1
+        if delay is None:
+            await self.release.wait()
+        else:
+            await asyncio.sleep(delay)
+        if error:
+            raise RuntimeError(error)
+        return [SearchResult(1, f"{query} #{self.calls}", f"http://example.com/{self.calls}", '', 'scripted', 'web')]
+
+    async def aclose(self):
+        pass
+
+register_engine_type('scripted', ScriptedEngine)
+
+class HedgeTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.aggregator = SearchAggregator(
+            cache=SearchCache(db_path=None),
+            registry=EngineRegistry(engines={'web': {'type': 'scripted'}}),
+            hedge=True, dedup=False
+        )
+        # p95가 0.1초가 되도록 지연 시간 표본을 채워 0.1초 뒤 헤지 요청이 나가게 함
+        for _ in range(HEDGE_MIN_SAMPLES):
+            self.aggregator.latency['web'].observe(0.1)
+
+    async def asyncTearDown(self):
+        await self.aggregator.registry.aclose()
+        self.aggregator.cache.close()
+
+    async def test_failed_primary_falls_back_to_hedge(self):
+        ScriptedEngine.script = [(0.2, "primary failed"), (0.3, None)]
+        results = await self.aggregator._fetch('web', 'react', 5, hedge=True)
+        self.assertEqual(results[0].title, "react #2")
+        self.assertEqual(self.aggregator.counters['hedged_requests'], 1)
+        self.assertEqual(self.aggregator.counters['hedge_wins'], 1)
+
+    async def test_successful_call_wins_when_both_finish_together(self):
+        ScriptedEngine.release = asyncio.Event()
+        ScriptedEngine.script = [(None, "primary failed"), (None, None)]
+        fetch = asyncio.ensure_future(self.aggregator._fetch('web', 'react', 5, hedge=True))
+        while not self.aggregator.counters['hedged_requests']:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0)
+        ScriptedEngine.release.set()
+        results = await fetch
+        self.assertEqual(results[0].title, "react #2")
+
+    async def test_raises_primary_error_when_all_calls_fail(self):
+        ScriptedEngine.script = [(0.2, "primary failed"), (0.15, "backup failed")]
+        with self.assertRaisesRegex(RuntimeError, "primary failed"):
+            await self.aggregator._fetch('web', 'react', 5, hedge=True)
+
+if __name__ == '__main__':
+    unittest.main()